@@ -12,7 +12,7 @@ from werkzeug.security import generate_password_hash, check_password_hash
 from datetime import datetime, timedelta
 from flask import Flask, render_template, request, session, redirect, url_for, jsonify, send_from_directory
 from werkzeug.utils import secure_filename
-from urllib.parse import unquote
+from urllib.parse import unquote, urlparse, parse_qs
 # Simple admin protection decorator (use this for admin routes)
 from functools import wraps
 # Add these after your existing imports
@@ -30,6 +30,14 @@ from flask_limiter.util import get_remote_address
 
 # PAYMENT SYSTEM: Import payment calculation helpers
 from payment_calculations import calculate_order_totals, calculate_seller_payouts
+from product_model import fetch_products, fetch_product
+from search_settings import SEARCH_PAGE_SIZE, SEARCH_PRICE_BUCKETS
+import catalog_cache
+import http_cache
+import prefix_index
+import search_log
+import product_counters
+import product_views
 
 app = Flask(__name__)
 
@@ -111,19 +119,54 @@ print("✅ Rate limiting enabled - protecting against spam and attacks")
 DATABASE_TYPE = os.getenv('DATABASE_TYPE', 'postgresql' if os.getenv('DATABASE_URL') else 'sqlite')
 print(f"🔧 Database Type: {DATABASE_TYPE}")
 
+# Catalog cache invalidations are repeated at teardown, after the request's
+# transaction commits - registered before init_request_db() so it runs later
+catalog_cache.init_catalog_cache(app)
+
 if DATABASE_TYPE == 'postgresql':
     # Use PostgreSQL database
     from database_postgres import (
         get_db,
-        track_product_view,
+        get_product_page,
+        get_product_page_stamp,
+        get_product_reviews,
+        decode_review_cursor,
+        REVIEW_SORTS,
+        get_related_products,
         get_last_viewed_product,
-        get_personalized_products,
+        get_product_feed,
+        shuffle_feed_ties,
+        search_products,
+        autocomplete_suggestions,
+        get_autocomplete_stats,
+        get_autocomplete_entries,
+        save_search_log,
+        save_product_counters,
+        save_product_views,
+        get_search_query_report,
+        decode_feed_cursor,
+        get_pool_stats,
+        get_query_stats,
+        init_request_db,
+        enable_green_io,
         init_db as init_postgres_db
     )
     print("✅ Using PostgreSQL database (PRODUCTION READY)")
+    # Under the eventlet worker, let queries yield to other requests instead of blocking the hub
+    enable_green_io()
+    # Every get_db() block in a request shares one pooled connection, released at teardown
+    init_request_db(app)
     # Initialize database tables immediately when using PostgreSQL
     init_postgres_db()
     print("✅ PostgreSQL database initialized")
+    # Load the /autocomplete prefix index in the background; the trigram query answers until it is ready
+    prefix_index.ensure_fresh(get_autocomplete_entries)
+    # /search and /autocomplete queries are buffered and written in batches
+    search_log.init_search_log(save_search_log)
+    # Product clicks/likes/sold are added up in memory and written in batches
+    product_counters.init_product_counters(save_product_counters)
+    # Product views for personalization are queued and inserted in batches
+    product_views.init_product_views(save_product_views)
 else:
     # Use SQLite for development ONLY
     if os.getenv('FLASK_ENV') == 'production':
@@ -682,6 +725,16 @@ def admin_required(level='admin'):
     return decorator
 
 
+def table_stamp(*tables):
+    """Version stamp for @http_cache.conditional: modification counters of the tables a view reads"""
+    def stamp(*args, **kwargs):
+        if DATABASE_TYPE != 'postgresql':
+            return None
+        with get_db() as conn:
+            return (request.query_string,) + http_cache.table_versions(conn.cursor(), tables)
+    return stamp
+
+
 def log_admin_activity(admin_email, action_type, target_type=None, target_id=None, description=None):
     """Log admin activities"""
     try:
@@ -1032,15 +1085,29 @@ def get_cart_items():
 
         items = []
         raw_total = 0.0
+        # Cart keys carry the chosen options: "Red Dress (Blue, M)" -> "Red Dress"
+        base_keys = {product_key: re.sub(r'\s*\([^)]+\)$', '', product_key).strip() for product_key in cart}
         with get_db() as conn:
             cursor = conn.cursor(cursor_factory=psycopg2.extras.RealDictCursor) if DATABASE_TYPE == 'postgresql' else conn.cursor()
-            for product_key, details in cart.items():
-                base_product_key = re.sub(r'\s*\([^)]+\)$', '', product_key).strip()
+            if DATABASE_TYPE == 'postgresql':
+                # Every product in the cart in one lookup
                 cursor.execute('''
-                    SELECT name, price, image_url, amount, shipping_method, seller_email
-                    FROM products WHERE product_key = %s
-                ''', (base_product_key,))
-                product = cursor.fetchone()
+                    SELECT product_key, name, price, image_url, amount, shipping_method, seller_email
+                    FROM products WHERE product_key = ANY(%s)
+                ''', (list(set(base_keys.values())),))
+                products = {row['product_key']: row for row in cursor.fetchall()}
+            else:
+                products = {}
+                for base_product_key in set(base_keys.values()):
+                    cursor.execute('''
+                        SELECT product_key, name, price, image_url, amount, shipping_method, seller_email
+                        FROM products WHERE product_key = %s
+                    ''', (base_product_key,))
+                    row = cursor.fetchone()
+                    if row:
+                        products[base_product_key] = row
+            for product_key, details in cart.items():
+                product = products.get(base_keys[product_key])
                 if product:
                     quantity = min(details['quantity'], product['amount'])
                     items.append({
@@ -1353,14 +1420,10 @@ def free():
         session.modified = True
 
         # Get available free gifts
-        cursor.execute('SELECT * FROM products WHERE price = 0')
-        gifts = [
-            dict(row,
-                 image_urls=row['image_urls'] if isinstance(row['image_urls'], list) else json.loads(row['image_urls']) if row['image_urls'] else [],
-                 sizes=row['sizes'] if isinstance(row['sizes'], dict) else json.loads(row['sizes']) if row['sizes'] else {}
-                 )
-            for row in cursor.fetchall()
-        ]
+        def load_gifts():
+            cursor.execute('SELECT * FROM products WHERE price = 0')
+            return fetch_products(cursor)
+        gifts = catalog_cache.get_listing(('free',), load_gifts)
 
         # Check eligibility based on actual order count
         if purchase_count < 5:
@@ -1413,7 +1476,18 @@ def free():
     )
 
 
+def cart_stamp():
+    """The cart as the session holds it, plus the catalog version (prices, stock)"""
+    user = session.get('user') or {}
+    return (
+        repr(sorted(session.get('cart', {}).items())),
+        user.get('discount_applied'),
+        catalog_cache.version()
+    )
+
+
 @app.route('/cart/data', methods=['GET'])
+@http_cache.conditional(cart_stamp)
 def cart_data():
     try:
         cart_data = get_cart_items()
@@ -1432,41 +1506,54 @@ def cart_data():
 # Autocomplete route for search suggestions
 @app.route('/autocomplete')
 def autocomplete():
+    """
+    Suggestions for the search box: products, sellers and categories, each
+    with the url to open. On PostgreSQL prefixes are answered from the
+    in-process prefix index; misspellings (and lookups before the index has
+    loaded) fall through to the pg_trgm query.
+    """
     query = request.args.get('query', '').strip()
     if len(query) < 2:
         return jsonify([])
 
     try:
-        with get_db() as conn:
-            cursor = conn.cursor(cursor_factory=psycopg2.extras.RealDictCursor) if DATABASE_TYPE == 'postgresql' else conn.cursor()
-            # Split query into keywords for partial matching
-            keywords = query.lower().split()
-            conditions = []
-            params = []
-
-            for keyword in keywords:
-                conditions.append("LOWER(name) LIKE %s")
-                params.append(f'%{keyword}%')
-
-            where_clause = " AND ".join(conditions) if conditions else "1=1"
-
-            cursor.execute(f'''
-                SELECT product_key, name, image_url
-                FROM products
-                WHERE {where_clause}
-                ORDER BY clicks DESC, likes DESC
-                LIMIT 5
-            ''', params)
-
+        if DATABASE_TYPE == 'postgresql':
+            prefix_index.ensure_fresh(get_autocomplete_entries)
+            flagged = frozenset(get_flagged_users())
             suggestions = []
-            for row in cursor.fetchall():
-                suggestions.append({
-                    'product_key': row['product_key'],
-                    'name': row['name'],
-                    'image_url': row['image_url']
-                })
-
-            return jsonify(suggestions)
+            if prefix_index.is_ready():
+                suggestions = prefix_index.search(query, flagged)
+            if not suggestions:
+                suggestions = autocomplete_suggestions(query, flagged=flagged)
+            search_log.record(search_log.AUTOCOMPLETE, query, results=len(suggestions))
+        else:
+            with get_db() as conn:
+                cursor = conn.cursor()
+                # Split query into keywords for partial matching
+                keywords = query.lower().split()
+                where_clause = " AND ".join("LOWER(name) LIKE %s" for _ in keywords) if keywords else "1=1"
+                cursor.execute(f'''
+                    SELECT product_key, name, image_url
+                    FROM products
+                    WHERE {where_clause}
+                    ORDER BY clicks DESC, likes DESC
+                    LIMIT 5
+                ''', [f'%{keyword}%' for keyword in keywords])
+                suggestions = [
+                    {'type': 'product', 'product_key': row[0], 'name': row[1], 'image_url': row[2]}
+                    for row in cursor.fetchall()
+                ]
+
+        # sq carries the typed text along, so opening a suggestion is logged as its click
+        sq = query if search_log.is_active() else None
+        for suggestion in suggestions:
+            if suggestion['type'] == 'seller':
+                suggestion['url'] = url_for('seller_store', seller_email=suggestion['seller_email'], sq=sq)
+            elif suggestion['type'] == 'category':
+                suggestion['url'] = url_for('search', category=suggestion['category'], sq=sq)
+            else:
+                suggestion['url'] = url_for('product', product_key=suggestion['product_key'], sq=sq)
+        return jsonify(suggestions)
     except Exception as e:
         logger.error(f"Error in autocomplete: {e}")
         return jsonify([])
@@ -1511,113 +1598,269 @@ def select_gift():
     return redirect(url_for('checkout'))
 
 
+def load_flagged_users():
+    """
+    Read every active, unexpired flag from user_flags for catalog_cache.
+    Returns ({email: {flag_type, reason, expires_at}}, seconds until the
+    soonest expires_at, or None if no flag expires).
+    """
+    with get_db() as conn:
+        cursor = conn.cursor(cursor_factory=psycopg2.extras.RealDictCursor) if DATABASE_TYPE == 'postgresql' else conn.cursor()
+        if DATABASE_TYPE == 'postgresql':
+            cursor.execute('''
+                SELECT user_email, flag_type, reason, expires_at,
+                       EXTRACT(EPOCH FROM (expires_at - NOW())) as expires_in
+                FROM user_flags
+                WHERE is_active = true
+                AND (expires_at IS NULL OR expires_at > NOW())
+                ORDER BY user_email, flag_date DESC
+            ''')
+        else:
+            cursor.execute('''
+                SELECT user_email, flag_type, reason, expires_at,
+                       (julianday(expires_at) - julianday('now')) * 86400 as expires_in
+                FROM user_flags
+                WHERE is_active = 1
+                AND (expires_at IS NULL OR expires_at > datetime('now'))
+                ORDER BY user_email, flag_date DESC
+            ''')
+        flags = {}
+        expires_in = None
+        for row in cursor.fetchall():
+            row = dict(row)
+            seconds = row.pop('expires_in')
+            if seconds is not None:
+                expires_in = float(seconds) if expires_in is None else min(expires_in, float(seconds))
+            # Latest flag per user wins, matching what is_user_flagged() used to return
+            flags.setdefault(row.pop('user_email'), row)
+        return flags, expires_in
+
+
+def get_flagged_users():
+    """{email: flag} for every currently flagged user, from the catalog cache"""
+    try:
+        return catalog_cache.get_flagged_users(load_flagged_users)
+    except Exception as e:
+        logger.error(f"Error loading flagged users: {e}")
+        return {}
+
+
+def get_flagged_seller_emails():
+    """Emails of users with an active flag - their products are hidden from listings"""
+    return sorted(get_flagged_users())
+
+
+def load_seller_summaries(emails):
+    """
+    {email: summary} for the given users in one query: business details,
+    logo, verification status, seller rating, product count and units sold.
+    The loader behind catalog_cache.get_sellers().
+    """
+    with get_db() as conn:
+        cursor = conn.cursor(cursor_factory=psycopg2.extras.RealDictCursor) if DATABASE_TYPE == 'postgresql' else conn.cursor()
+        placeholders = ','.join(['%s'] * len(emails))
+        cursor.execute(f'''
+            SELECT u.email, u.is_seller, u.first_name, u.last_name, u.business_name, u.business_address,
+                   u.business_description, u.profile_picture, u.store_logo, u.phone_number, u.parish,
+                   sv.verification_status,
+                   (SELECT AVG(rating) FROM seller_ratings WHERE seller_email = u.email) as avg_rating,
+                   (SELECT COUNT(*) FROM seller_ratings WHERE seller_email = u.email) as rating_count,
+                   (SELECT COUNT(*) FROM products WHERE seller_email = u.email) as product_count,
+                   (SELECT COALESCE(SUM(sold), 0) FROM products WHERE seller_email = u.email) as total_sold
+            FROM users u
+            LEFT JOIN seller_verification sv ON sv.seller_email = u.email
+            WHERE u.email IN ({placeholders})
+        ''', list(emails))
+        summaries = {}
+        for row in cursor.fetchall():
+            summary = dict(row)
+            summary['avg_rating'] = float(summary['avg_rating']) if summary['avg_rating'] is not None else None
+            summary['rating_count'] = summary['rating_count'] or 0
+            summary['product_count'] = summary['product_count'] or 0
+            summary['total_sold'] = summary['total_sold'] or 0
+            summaries[summary['email']] = summary
+        return summaries
+
+
+def get_seller_summaries(emails):
+    """{email: seller summary} from the catalog cache, loading the missing ones in one query"""
+    return catalog_cache.get_sellers(list(emails), load_seller_summaries)
+
+
+def get_seller_summary(email):
+    """One seller summary (see load_seller_summaries), or None for an unknown email"""
+    return catalog_cache.get_seller(email, load_seller_summaries)
+
+
+def attach_review_stats(products):
+    """Set avg_rating / review_count on the products about to be rendered"""
+    if not products:
+        return
+    keys = list(products)
+    with get_db() as conn:
+        cursor = conn.cursor(cursor_factory=psycopg2.extras.RealDictCursor) if DATABASE_TYPE == 'postgresql' else conn.cursor()
+        placeholders = ','.join(['%s'] * len(keys))
+        cursor.execute(f'''
+            SELECT product_key, avg_rating, rating_count as review_count
+            FROM product_rating_summary
+            WHERE product_key IN ({placeholders})
+        ''', keys)
+        review_stats = {row['product_key']: row for row in cursor.fetchall()}
+
+    for product_key, product in products.items():
+        stats = review_stats.get(product_key)
+        if stats and stats['review_count']:
+            product['avg_rating'] = round(stats['avg_rating'], 1)
+            product['review_count'] = stats['review_count']
+        else:
+            product['avg_rating'] = product.get('rating', 5.0)
+            product['review_count'] = 0
+
+
+# Distinct tie orders handed out to sessions; also the number of cached
+# variants of each anonymous homepage
+FEED_SEED_VARIANTS = int(os.getenv('FEED_SEED_VARIANTS', '16'))
+
+# Stand-ins for the per-visitor parts of a cached anonymous page
+PAGE_CSRF_SLOT = '__zozi_csrf_token__'
+PAGE_CART_COUNT_SLOT = '__zozi_cart_count__'
+
+
+def get_feed_seed():
+    """Per-session seed that orders equally popular products in the feed"""
+    if 'feed_seed' not in session:
+        session['feed_seed'] = random.randrange(FEED_SEED_VARIANTS)
+    return session['feed_seed'] % FEED_SEED_VARIANTS
+
+
+def render_anonymous_page(key, render):
+    """
+    Page for a logged-out visitor from the catalog page cache. render(**slots)
+    returns (html, cacheable) with the CSRF token and cart badge rendered as
+    placeholders; they are filled in here for this visitor, from the session
+    alone, so a cache hit does no database work or template rendering.
+    """
+    html = catalog_cache.get_page(key, lambda: render(
+        csrf_token=lambda: PAGE_CSRF_SLOT,
+        cart_item_count=PAGE_CART_COUNT_SLOT
+    ))
+    cart_count = sum(details.get('quantity', 0) for details in session.get('cart', {}).values())
+    return html.replace(PAGE_CSRF_SLOT, generate_csrf()).replace(PAGE_CART_COUNT_SLOT, str(cart_count))
+
+
+def load_feed_page(user, after=None):
+    """
+    (products, next_cursor) for one feed page, review averages attached and
+    equally popular products in this session's order (get_feed_seed()).
+    Anonymous pages are the same for everyone, so they come from the catalog cache.
+    """
+    flagged_sellers = get_flagged_seller_emails()
+
+    def load():
+        products, next_cursor = get_product_feed(
+            user_email=user.get('email') if user else None,
+            excluded_seller_emails=flagged_sellers,
+            after=after
+        )
+        attach_review_stats(products)
+        # Empty pages (or a failed query) are not worth caching
+        return (products, next_cursor) if products else None
+
+    if user and user.get('email'):
+        products, next_cursor = load() or ({}, None)
+    else:
+        # Cached pages are dropped whenever the flagged set changes
+        products, next_cursor = catalog_cache.get_listing(('feed', after), load) or ({}, None)
+    return shuffle_feed_ties(products, get_feed_seed()), next_cursor
+
+
 @app.route('/')
 def index():
     user = session.get('user')
+    if not user:
+        # Every logged-out visitor gets the same page apart from the cart badge and CSRF token
+        return render_anonymous_page(('index', '', '', None, get_feed_seed()), render_index)
+
     cart_data = get_cart_items()
-    context = {
-        'cart_items': cart_data['items'],
-        'cart_total': cart_data['total'],
-        'discount': cart_data['discount'],
+    html, _ = render_index(
+        user,
+        cart_items=cart_data['items'],
+        cart_total=cart_data['total'],
+        discount=cart_data['discount'],
+        cart_item_count=cart_data['cart_item_count']
+    )
+    return html
+
+
+def render_index(user=None, **context):
+    """Render the homepage; returns (html, False if it is an error page)"""
+    context.update({
         'user': user,
-        'cart_item_count': cart_data['cart_item_count'],
         'categories': [
             'Accessories', 'Baby & Maternity', 'Beachwear', 'Beauty & Health', 'Home & Kitchen',
             'Jewelry', 'Kids', 'Men Clothing', 'Shoes', 'Sports & Outdoors',
             'Underwear & Sleepwear', 'Women Clothing'
         ]
-    }
+    })
     try:
-        # Get list of flagged sellers to exclude
-        flagged_sellers = []
-        with get_db() as conn:
-            cursor = conn.cursor(cursor_factory=psycopg2.extras.RealDictCursor) if DATABASE_TYPE == 'postgresql' else conn.cursor()
-            # Get all flagged sellers
-            if DATABASE_TYPE == 'postgresql':
-                cursor.execute('''
-                    SELECT DISTINCT user_email FROM user_flags
-                    WHERE is_active = true
-                    AND (expires_at IS NULL OR expires_at > CURRENT_TIMESTAMP)
-                ''')
-            else:
-                cursor.execute('''
-                    SELECT DISTINCT user_email FROM user_flags
-                    WHERE is_active = 1
-                    AND (expires_at IS NULL OR expires_at > datetime('now'))
-                ''')
-            flagged_sellers = [row['user_email'] if isinstance(row, dict) else row[0] for row in cursor.fetchall()]
-
-        # Use personalized products if user is logged in and PostgreSQL is enabled
-        if DATABASE_TYPE == 'postgresql' and user and user.get('email'):
-            try:
-                # Get personalized products based on viewing history
-                products = get_personalized_products(user['email'], excluded_seller_emails=flagged_sellers)
-                context['products'] = products
-            except Exception as e:
-                logger.error(f"Error getting personalized products, falling back to default: {e}")
-                # Fallback to default product loading
-                with get_db() as conn:
-                    cursor = conn.cursor(cursor_factory=psycopg2.extras.RealDictCursor)
-                    cursor.execute('SELECT * FROM products ORDER BY RANDOM()')
-                    products = {}
-                    for row in cursor.fetchall():
-                        # Handle JSON fields - PostgreSQL returns Python objects directly
-                        image_urls = row['image_urls'] if isinstance(row['image_urls'], list) else json.loads(row['image_urls']) if row['image_urls'] else []
-                        sizes = row['sizes'] if isinstance(row['sizes'], dict) else json.loads(row['sizes']) if row['sizes'] else {}
-                        product = dict(row, image_urls=image_urls, sizes=sizes)
-                        # Use pre-fetched flagged_sellers list instead of querying for each product
-                        if product['seller_email'] not in flagged_sellers:
-                            products[product['product_key']] = product
-                    context['products'] = products
+        # First page of the feed; /feed serves the rest as the shopper scrolls
+        if DATABASE_TYPE == 'postgresql':
+            context['products'], context['next_cursor'] = load_feed_page(user)
         else:
-            # User not logged in or SQLite - show products ordered by popularity
+            flagged_sellers = get_flagged_seller_emails()
             with get_db() as conn:
-                cursor = conn.cursor(cursor_factory=psycopg2.extras.RealDictCursor) if DATABASE_TYPE == 'postgresql' else conn.cursor()
-                if DATABASE_TYPE == 'postgresql':
-                    cursor.execute('SELECT * FROM products ORDER BY (clicks + likes * 2) DESC, RANDOM()')
-                else:
-                    cursor.execute('SELECT * FROM products ORDER BY (clicks + likes * 2) DESC')
-                products = {}
-                for row in cursor.fetchall():
-                    # Handle JSON fields - PostgreSQL returns Python objects directly
-                    image_urls = row['image_urls'] if isinstance(row['image_urls'], list) else json.loads(row['image_urls']) if row['image_urls'] else []
-                    sizes = row['sizes'] if isinstance(row['sizes'], dict) else json.loads(row['sizes']) if row['sizes'] else {}
-                    product = dict(row, image_urls=image_urls, sizes=sizes)
-                    # Use pre-fetched flagged_sellers list instead of querying for each product
-                    if product['seller_email'] not in flagged_sellers:
-                        products[product['product_key']] = product
-                context['products'] = products
-
-        # Get review averages for all products
-        with get_db() as conn:
-            cursor = conn.cursor(cursor_factory=psycopg2.extras.RealDictCursor) if DATABASE_TYPE == 'postgresql' else conn.cursor()
-            cursor.execute('''
-                SELECT product_key, AVG(rating) as avg_rating, COUNT(*) as review_count
-                FROM product_reviews
-                GROUP BY product_key
-            ''')
-            review_stats = {row['product_key']: {'avg_rating': row['avg_rating'], 'review_count': row['review_count']} for row in cursor.fetchall()}
-
-        # Attach review averages to products
-        for product_key, product in context['products'].items():
-            if product_key in review_stats:
-                product['avg_rating'] = round(review_stats[product_key]['avg_rating'], 1)
-                product['review_count'] = review_stats[product_key]['review_count']
-            else:
-                product['avg_rating'] = product.get('rating', 5.0)
-                product['review_count'] = 0
+                cursor = conn.cursor()
+                cursor.execute('SELECT * FROM products ORDER BY (clicks + likes * 2) DESC LIMIT 48')
+                context['products'] = {
+                    product['product_key']: product
+                    for product in fetch_products(cursor)
+                    if product['seller_email'] not in flagged_sellers
+                }
+            attach_review_stats(context['products'])
 
         # Check if user is support agent and redirect to enhanced dashboard
         is_support = user and user.get('is_support', False)
         if is_support:
-            return render_template('index_agent.html', **context)  # Your new enhanced template
+            return render_template('index_agent.html', **context), True  # Your new enhanced template
         else:
-            return render_template('index.html', **context)
+            return render_template('index.html', **context), True
 
     except Exception as e:
         context['error'] = f"An error occurred: {str(e)}"
         context['products'] = {}  # Ensure products is always defined
-        return render_template('index.html', **context)
+        return render_template('index.html', **context), False
+
+
+@app.route('/feed')
+def feed():
+    """
+    Next page of the homepage feed for infinite scroll.
+    ?cursor=<next_cursor from the previous page>&format=html|json
+    """
+    after = request.args.get('cursor', '').strip()
+    if after and not decode_feed_cursor(after):
+        return jsonify({'success': False, 'message': 'Invalid cursor'}), 400
+    try:
+        products, next_cursor = load_feed_page(session.get('user'), after=after or None)
+
+        if request.args.get('format') == 'html':
+            return jsonify({
+                'success': True,
+                'html': render_template('product_cards.html', products=products),
+                'count': len(products),
+                'next_cursor': next_cursor,
+                'next_url': url_for('feed', cursor=next_cursor, format='html') if next_cursor else None
+            })
+
+        fields = ('product_key', 'name', 'price', 'image_url', 'category', 'cod_available', 'sold', 'avg_rating', 'review_count')
+        return jsonify({
+            'success': True,
+            'products': [{field: product.get(field) for field in fields} for product in products.values()],
+            'next_cursor': next_cursor
+        })
+    except Exception as e:
+        logger.error(f"Error loading feed page: {e}")
+        return jsonify({'success': False, 'message': 'Could not load more products'}), 500
 
 
 #
@@ -2343,51 +2586,32 @@ def find_sellers():
             if 'user' in session and session['user'].get('parish'):
                 user_parish = session['user']['parish']
 
-            # Get sellers in user's parish with enhanced info
-            cursor.execute('''
-                SELECT u.email, u.first_name, u.last_name, u.business_name, u.business_address, 
-                       u.profile_picture, COUNT(p.product_key) as product_count,
-                       AVG(sr.rating) as avg_rating, COUNT(sr.rating) as rating_count,
-                       SUM(p.sold) as total_sales
-                FROM users u
-                LEFT JOIN products p ON u.email = p.seller_email
-                LEFT JOIN seller_ratings sr ON u.email = sr.seller_email
-                WHERE u.is_seller = true AND u.business_address = %s
-                GROUP BY u.email
-                ORDER BY total_sales DESC, product_count DESC
-            ''', (user_parish,))
-
-            local_sellers = []
-            for row in cursor.fetchall():
-                seller_data = dict(row)
-                seller_data['avg_rating'] = round(seller_data['avg_rating'], 1) if seller_data['avg_rating'] else 0
-                seller_data['total_sales'] = seller_data['total_sales'] or 0
-                seller_data['product_count'] = seller_data['product_count'] or 0
-                seller_data['rating_count'] = seller_data['rating_count'] or 0
+            cursor.execute('SELECT email FROM users WHERE is_seller = true AND business_address IS NOT NULL')
+            emails = [row['email'] for row in cursor.fetchall()]
+
+        # Product counts, sales and ratings come from the cached seller summaries
+        local_sellers = []
+        other_sellers = []
+        summaries = get_seller_summaries(emails) if emails else {}
+        for summary in summaries.values():
+            seller_data = {
+                'email': summary['email'],
+                'first_name': summary['first_name'],
+                'last_name': summary['last_name'],
+                'business_name': summary['business_name'],
+                'business_address': summary['business_address'],
+                'profile_picture': summary['profile_picture'],
+                'product_count': summary['product_count'],
+                'avg_rating': round(summary['avg_rating'], 1) if summary['avg_rating'] else 0,
+                'rating_count': summary['rating_count'],
+                'total_sales': summary['total_sold'],
+            }
+            if summary['business_address'] == user_parish:
                 local_sellers.append(seller_data)
-
-            # Get sellers from other parishes
-            cursor.execute('''
-                SELECT u.email, u.first_name, u.last_name, u.business_name, u.business_address, 
-                       u.profile_picture, COUNT(p.product_key) as product_count,
-                       AVG(sr.rating) as avg_rating, COUNT(sr.rating) as rating_count,
-                       SUM(p.sold) as total_sales
-                FROM users u
-                LEFT JOIN products p ON u.email = p.seller_email
-                LEFT JOIN seller_ratings sr ON u.email = sr.seller_email
-                WHERE u.is_seller = true AND u.business_address != ?
-                GROUP BY u.email
-                ORDER BY total_sales DESC, product_count DESC
-            ''', (user_parish,))
-
-            other_sellers = []
-            for row in cursor.fetchall():
-                seller_data = dict(row)
-                seller_data['avg_rating'] = round(seller_data['avg_rating'], 1) if seller_data['avg_rating'] else 0
-                seller_data['total_sales'] = seller_data['total_sales'] or 0
-                seller_data['product_count'] = seller_data['product_count'] or 0
-                seller_data['rating_count'] = seller_data['rating_count'] or 0
+            elif summary['business_address'] is not None:
                 other_sellers.append(seller_data)
+        for group in (local_sellers, other_sellers):
+            group.sort(key=lambda seller: (seller['total_sales'], seller['product_count']), reverse=True)
 
         cart_data = get_cart_items()
         return render_template(
@@ -3052,22 +3276,9 @@ def debug_login():
             """
 
 def is_user_flagged(email):
-    """Check if a user is currently flagged/banned"""
-    try:
-        with get_db() as conn:
-            cursor = conn.cursor(cursor_factory=psycopg2.extras.RealDictCursor) if DATABASE_TYPE == 'postgresql' else conn.cursor()
-            cursor.execute('''
-                SELECT flag_type, reason, expires_at FROM user_flags
-                WHERE user_email = %s AND is_active = true
-                AND (expires_at IS NULL OR expires_at > NOW())
-                ORDER BY flag_date DESC
-                LIMIT 1
-            ''', (email,))
-            flag = cursor.fetchone()
-            return dict(flag) if flag else None
-    except Exception as e:
-        logger.error(f"Error checking if user flagged: {e}")
-        return None
+    """Check if a user is currently flagged/banned (dict with flag_type, reason, expires_at, or None)"""
+    flag = get_flagged_users().get(email)
+    return dict(flag) if flag else None
 
 
 def log_admin_activity(admin_email, action_type, target_type=None, target_id=None, description=None):
@@ -3135,6 +3346,7 @@ def profile():
                         db_path = f"uploads/{unique_filename}"
                         cursor.execute('UPDATE users SET profile_picture = %s WHERE email = %s', (db_path, user['email']))
                         conn.commit()
+                        catalog_cache.invalidate_seller(user['email'])
                         cursor.execute('SELECT * FROM users WHERE email = %s', (user['email'],))
                         session['user'] = dict(cursor.fetchone())
                         session.modified = True
@@ -3216,6 +3428,9 @@ def personal_info():
                             WHERE phone_number = %s
                         ''', (first_name, last_name, new_email, new_phone, gender, address, whatsapp_number, user['phone_number']))
                         conn.commit()
+                        # Names and phone number are part of the seller summary; the email may have changed too
+                        catalog_cache.invalidate_seller(user['email'])
+                        catalog_cache.invalidate_seller(new_email)
                         cursor.execute('SELECT * FROM users WHERE phone_number = %s', (new_phone,))
                         updated_user = cursor.fetchone()
                         if not updated_user:
@@ -3345,6 +3560,7 @@ def update_seller_description():
             ''', (description, seller_email))
 
             conn.commit()
+            catalog_cache.invalidate_seller(seller_email)
 
             # Log for debugging
             logger.info(f"Updated description for {seller_email}: {description}")
@@ -3401,6 +3617,7 @@ def upload_store_logo():
             ''', (logo_path, seller_email))
 
             conn.commit()
+            catalog_cache.invalidate_seller(seller_email)
 
             # Update session
             session['user']['store_logo'] = logo_path
@@ -3422,25 +3639,18 @@ def upload_store_logo():
 @app.route('/get_seller_info/<email>')
 def get_seller_info(email):
     try:
-                with get_db() as conn:
-                    cursor = conn.cursor(cursor_factory=psycopg2.extras.RealDictCursor) if DATABASE_TYPE == 'postgresql' else conn.cursor()
-                    cursor.execute('''
-                        SELECT email, first_name, business_name, profile_picture
-                        FROM users
-                        WHERE email = %s AND is_seller = true
-                    ''', (email,))
-                    seller = cursor.fetchone()
-                    if not seller:
-                        return jsonify({'success': False, 'message': 'Seller not found'}), 404
-                    return jsonify({
-                        'success': True,
-                        'seller': {
-                            'email': seller['email'],
-                            'first_name': seller['first_name'],
-                            'business_name': seller['business_name'],
-                            'profile_picture': seller['profile_picture']
-                        }
-                    })
+        seller = get_seller_summary(email)
+        if not seller or not seller['is_seller']:
+            return jsonify({'success': False, 'message': 'Seller not found'}), 404
+        return jsonify({
+            'success': True,
+            'seller': {
+                'email': seller['email'],
+                'first_name': seller['first_name'],
+                'business_name': seller['business_name'],
+                'profile_picture': seller['profile_picture']
+            }
+        })
     except Exception as e:
         logger.error(f"Error getting seller info: {e}")
         return jsonify({'success': False, 'message': str(e)}), 500
@@ -3671,7 +3881,28 @@ def get_messages_fixed(other_email):
         return jsonify({'success': False, 'message': str(e)}), 500
 
 
+def conversations_stamp():
+    """Conversation count, latest message time and unread count for the current user"""
+    if 'user' not in session or DATABASE_TYPE != 'postgresql':
+        return None
+    email = session['user']['email']
+    with get_db() as conn:
+        cursor = conn.cursor(cursor_factory=psycopg2.extras.RealDictCursor)
+        cursor.execute('''
+            SELECT
+                (SELECT is_seller FROM users WHERE email = %s) as is_seller,
+                (SELECT COUNT(*) FROM conversations
+                 WHERE seller_email = %s OR buyer_email = %s) as conversation_count,
+                (SELECT MAX(last_message_at) FROM conversations
+                 WHERE seller_email = %s OR buyer_email = %s) as last_message_at,
+                (SELECT COUNT(*) FROM messages
+                 WHERE receiver_email = %s AND read_status = false) as unread_count
+        ''', (email,) * 6)
+        return tuple(cursor.fetchone().values())
+
+
 @app.route('/get_conversations')
+@http_cache.conditional(conversations_stamp)
 def get_conversations_fixed():
     """Get all conversations for current user - FIXED VERSION"""
     if 'user' not in session:
@@ -4066,6 +4297,7 @@ def admin_dashboard_page():
 
 @app.route('/admin/api/dashboard_stats')
 @admin_required()
+@http_cache.conditional(table_stamp('orders', 'products', 'users'))
 def dashboard_stats():
     """Real-time dashboard statistics"""
     try:
@@ -4188,8 +4420,91 @@ def dashboard_stats():
         })
 
 
+@app.route('/admin/api/db_pool_stats')
+@admin_required()
+def db_pool_stats():
+    """Database connection pool usage (open, in use, waiting, wait times)"""
+    try:
+        return jsonify({'success': True, 'pool': get_pool_stats()})
+    except Exception as e:
+        logger.error(f"Error getting pool stats: {e}")
+        return jsonify({'success': False, 'message': 'Error loading pool stats'}), 500
+
+
+@app.route('/admin/api/query_stats')
+@admin_required()
+def query_stats():
+    """Per-route database query counts, DB time and suspected N+1 statements"""
+    try:
+        return jsonify({'success': True, 'routes': get_query_stats()})
+    except Exception as e:
+        logger.error(f"Error getting query stats: {e}")
+        return jsonify({'success': False, 'message': 'Error loading query stats'}), 500
+
+
+@app.route('/admin/api/catalog_cache_stats')
+@admin_required()
+def catalog_cache_stats():
+    """Catalog cache sizes and hit/miss rates"""
+    try:
+        return jsonify({'success': True, 'cache': catalog_cache.get_stats()})
+    except Exception as e:
+        logger.error(f"Error getting catalog cache stats: {e}")
+        return jsonify({'success': False, 'message': 'Error loading cache stats'}), 500
+
+
+@app.route('/admin/api/write_behind_stats')
+@admin_required()
+def write_behind_stats():
+    """Buffered product counters and queued product views, with their flush latency and batch sizes"""
+    try:
+        return jsonify({'success': True, 'counters': product_counters.get_stats(),
+                        'views': product_views.get_stats()})
+    except Exception as e:
+        logger.error(f"Error getting write-behind stats: {e}")
+        return jsonify({'success': False, 'message': 'Error loading write-behind stats'}), 500
+
+
+@app.route('/admin/api/http_cache_stats')
+@admin_required()
+def http_cache_stats():
+    """Conditional request checks and 304 rate"""
+    try:
+        return jsonify({'success': True, 'http_cache': http_cache.get_stats()})
+    except Exception as e:
+        logger.error(f"Error getting HTTP cache stats: {e}")
+        return jsonify({'success': False, 'message': 'Error loading HTTP cache stats'}), 500
+
+
+@app.route('/admin/api/autocomplete_stats')
+@admin_required()
+def autocomplete_stats():
+    """Recent /autocomplete latency (p50/p99) against its budget, and the prefix index size and footprint"""
+    try:
+        stats = get_autocomplete_stats() if DATABASE_TYPE == 'postgresql' else {}
+        return jsonify({'success': True, 'autocomplete': stats, 'prefix_index': prefix_index.get_stats()})
+    except Exception as e:
+        logger.error(f"Error getting autocomplete stats: {e}")
+        return jsonify({'success': False, 'message': 'Error loading autocomplete stats'}), 500
+
+
+@app.route('/admin/api/search_queries')
+@admin_required()
+def search_queries_report():
+    """What shoppers search for: top queries with click-through, zero-result searches, autocomplete misses"""
+    try:
+        days = min(max(request.args.get('days', 7, type=int), 1), 90)
+        limit = min(max(request.args.get('limit', 50, type=int), 1), 500)
+        report = get_search_query_report(days, limit) if DATABASE_TYPE == 'postgresql' else {}
+        return jsonify({'success': True, 'report': report, 'log': search_log.get_stats()})
+    except Exception as e:
+        logger.error(f"Error getting search query report: {e}")
+        return jsonify({'success': False, 'message': 'Error loading search query report'}), 500
+
+
 @app.route('/admin/api/analytics')
 @admin_required()
+@http_cache.conditional(table_stamp('orders', 'products', 'users'))
 def admin_api_analytics():
     """General analytics data for charts"""
     try:
@@ -4253,6 +4568,7 @@ def admin_api_analytics():
 
 @app.route('/admin/api/parish_analytics')
 @admin_required()
+@http_cache.conditional(table_stamp('orders', 'users'))
 def admin_api_parish_analytics():
     """Parish-based analytics for Jamaica"""
     try:
@@ -4362,6 +4678,7 @@ def admin_api_parish_analytics():
 
 @app.route('/admin/api/revenue_data')
 @admin_required()
+@http_cache.conditional(table_stamp('orders'))
 def admin_api_revenue_data():
     """Revenue chart data with different timeframes"""
     try:
@@ -4478,6 +4795,7 @@ def admin_api_revenue_data():
 
 @app.route('/admin/api/recent_activity')
 @admin_required()
+@http_cache.conditional(table_stamp('admin_activity_log', 'orders', 'products', 'users'))
 def recent_activity():
     """Recent platform activity for dashboard"""
     try:
@@ -4614,6 +4932,7 @@ def recent_activity():
 
 @app.route('/admin/api/users')
 @admin_required()
+@http_cache.conditional(table_stamp('orders', 'products', 'user_flags', 'users'))
 def admin_api_users():
     """FIXED: Users API - handles missing created_at column"""
     try:
@@ -4698,6 +5017,7 @@ def flag_user():
             ''', (user_email, flag_type, reason, session['admin_user']['email'], expires_at))
 
             conn.commit()
+            catalog_cache.invalidate_flagged_users()
 
             # Log admin activity
             log_admin_activity(
@@ -4717,6 +5037,7 @@ def flag_user():
 
 @app.route('/admin/api/user_details/<email>')
 @admin_required()
+@http_cache.conditional(table_stamp('order_items', 'orders', 'products', 'user_flags', 'users'))
 def get_user_details(email):
     """Get detailed information about a specific user"""
     try:
@@ -4811,6 +5132,7 @@ def unflag_user():
             ''', (user_email,))
 
             conn.commit()
+            catalog_cache.invalidate_flagged_users()
 
             # Log admin activity
             log_admin_activity(
@@ -4834,6 +5156,7 @@ def unflag_user():
 
 @app.route('/admin/api/sellers')
 @admin_required()
+@http_cache.conditional(table_stamp('products', 'seller_ratings', 'user_flags', 'users'))
 def admin_api_sellers():
     """Get all sellers for seller analytics section"""
     try:
@@ -4888,6 +5211,7 @@ def admin_api_sellers():
 
 @app.route('/admin/api/seller/<seller_email>')
 @admin_required()
+@http_cache.conditional(table_stamp('products', 'seller_ratings', 'seller_verification', 'user_flags', 'users'))
 def admin_api_seller_details(seller_email):
     """Get detailed seller information for admin view"""
     try:
@@ -4983,6 +5307,7 @@ def admin_toggle_cod():
 
 @app.route('/admin/api/products')
 @admin_required()
+@http_cache.conditional(table_stamp('products', 'users'))
 def admin_api_products():
     """Get all products for product management"""
     try:
@@ -5057,6 +5382,8 @@ def remove_product():
             # Remove the product
             cursor.execute('DELETE FROM products WHERE product_key = %s', (product_key,))
             conn.commit()
+            catalog_cache.invalidate_product(product_key)
+            prefix_index.remove_product(product_key)
 
             # Log admin activity
             log_admin_activity(
@@ -5080,6 +5407,7 @@ def remove_product():
 
 @app.route('/admin/api/orders')
 @admin_required()
+@http_cache.conditional(table_stamp('order_items', 'orders', 'users'))
 def admin_api_orders():
     """Get all orders for order management"""
     try:
@@ -5174,6 +5502,7 @@ def update_order_status():
 
 @app.route('/admin/api/financials')
 @admin_required()
+@http_cache.conditional(table_stamp('orders'))
 def admin_api_financials():
     """Get financial data for financial dashboard"""
     try:
@@ -5242,6 +5571,7 @@ def admin_api_financials():
 
 @app.route('/admin/api/pending_payouts')
 @admin_required()
+@http_cache.conditional(table_stamp('seller_payment_methods', 'users', 'withdrawal_requests'))
 def admin_pending_payouts():
     """Get all pending seller payout requests"""
     try:
@@ -5379,6 +5709,7 @@ def admin_approve_payout():
 
 @app.route('/admin/api/payout_history')
 @admin_required()
+@http_cache.conditional(table_stamp('users', 'withdrawal_requests'))
 def admin_payout_history():
     """Get completed payout history"""
     try:
@@ -5423,6 +5754,7 @@ def admin_payout_history():
 
 @app.route('/admin/api/admin_users')
 @admin_required()
+@http_cache.conditional(table_stamp('admin_users'))
 def admin_api_admin_users():
     """Get all admin users for settings"""
     try:
@@ -5733,6 +6065,7 @@ def seller_verification():
                           trn_number, f"uploads/verifications/{trn_filename}", notes))
 
                 conn.commit()
+                catalog_cache.invalidate_seller(user_email)
 
             # Update session
             session['user']['verification_status'] = 'pending_review'
@@ -6752,7 +7085,23 @@ def seller_statistics():
         logger.error(f"Error in seller_statistics for {seller_email}: {e}\n{traceback.format_exc()}")
         return jsonify({'success': False, 'message': str(e)}), 500
 
+def seller_notifications_stamp():
+    """Notification count, newest notification and unread count for the current seller"""
+    if 'user' not in session or not session['user'].get('is_seller', False) or DATABASE_TYPE != 'postgresql':
+        return None
+    with get_db() as conn:
+        cursor = conn.cursor(cursor_factory=psycopg2.extras.RealDictCursor)
+        cursor.execute('''
+            SELECT COUNT(*) as total, MAX(created_at) as newest,
+                   COUNT(*) FILTER (WHERE is_read = FALSE) as unread_count
+            FROM seller_notifications
+            WHERE seller_email = %s
+        ''', (session['user']['email'],))
+        return tuple(cursor.fetchone().values())
+
+
 @app.route('/seller/notifications')
+@http_cache.conditional(seller_notifications_stamp)
 def get_seller_notifications():
     """Get notifications for the current seller"""
     if 'user' not in session or not session['user'].get('is_seller', False):
@@ -6868,6 +7217,7 @@ def update_product_stock():
                           (new_stock, product_key, seller_email))
 
             conn.commit()
+            catalog_cache.invalidate_product(product_key)
 
             logger.info(f"Seller {seller_email} updated stock for {product_key} to {new_stock}")
 
@@ -6940,71 +7290,20 @@ def check_all_low_stock():
 @app.route('/seller/<seller_email>')
 def seller_store(seller_email):
     """Individual seller's store page"""
+    record_search_click(f'seller:{seller_email}')
     try:
         with get_db() as conn:
             cursor = conn.cursor(cursor_factory=psycopg2.extras.RealDictCursor) if DATABASE_TYPE == 'postgresql' else conn.cursor()
 
-            # Get seller info - with safe column handling
-            cursor.execute('''
-                SELECT u.email, u.first_name, u.last_name, u.business_name, u.business_address,
-                       u.profile_picture, u.store_logo, u.phone_number, u.parish,
-                       sv.verification_status
-                FROM users u
-                LEFT JOIN seller_verification sv ON u.email = sv.seller_email
-                WHERE u.email = %s AND u.is_seller = true
-            ''', (seller_email,))
-
-            seller = cursor.fetchone()
-            if not seller:
+            # Business details, verification and stats from the cached seller summary
+            seller = get_seller_summary(seller_email)
+            if not seller or not seller['is_seller']:
                 return render_template('404.html', error="Seller not found"), 404
 
-            # Convert row to dict and handle None/NULL values properly
-            seller_data = {}
-            for key in seller.keys():
-                value = seller[key]
-                # Convert any Undefined or None to proper Python None
-                seller_data[key] = value if value is not None else None
-
-            # Try to get business_description separately (column might not exist)
-            try:
-                cursor.execute('''
-                    SELECT business_description FROM users WHERE email = %s
-                ''', (seller_email,))
-                desc_result = cursor.fetchone()
-                seller_data['business_description'] = desc_result['business_description'] if desc_result and \
-                                                                                             desc_result[
-                                                                                                 'business_description'] else 'Discover amazing products carefully curated just for you. We\'re committed to providing the highest quality items with exceptional customer service. Browse our collection and find exactly what you\'re looking for!'
-            except Exception as e:
-                # Column doesn't exist or error - use default
-                logger.warning(f"Could not get business_description: {e}")
-                seller_data[
-                    'business_description'] = 'Discover amazing products carefully curated just for you. We\'re committed to providing the highest quality items with exceptional customer service. Browse our collection and find exactly what you\'re looking for!'
-
-            # Get seller stats
-            cursor.execute('''
-                SELECT 
-                    AVG(sr.rating) as avg_rating, 
-                    COUNT(sr.rating) as rating_count,
-                    COUNT(DISTINCT p.product_key) as product_count,
-                    SUM(p.sold) as total_sales
-                FROM users u
-                LEFT JOIN seller_ratings sr ON u.email = sr.seller_email
-                LEFT JOIN products p ON u.email = p.seller_email
-                WHERE u.email = %s
-                GROUP BY u.email
-            ''', (seller_email,))
-
-            stats = cursor.fetchone()
-            if stats:
-                seller_data['avg_rating'] = round(float(stats['avg_rating'] or 0), 1)
-                seller_data['rating_count'] = stats['rating_count'] or 0
-                seller_data['product_count'] = stats['product_count'] or 0
-                seller_data['total_sales'] = stats['total_sales'] or 0
-            else:
-                seller_data['avg_rating'] = 0
-                seller_data['rating_count'] = 0
-                seller_data['product_count'] = 0
-                seller_data['total_sales'] = 0
+            seller_data = dict(seller)
+            seller_data['business_description'] = seller_data.get('business_description') or 'Discover amazing products carefully curated just for you. We\'re committed to providing the highest quality items with exceptional customer service. Browse our collection and find exactly what you\'re looking for!'
+            seller_data['avg_rating'] = round(seller['avg_rating'] or 0, 1)
+            seller_data['total_sales'] = seller['total_sold']
 
             seller_data['join_date'] = '2024'
 
@@ -7097,12 +7396,7 @@ def product_listing():
         if not cursor.fetchone():
             return redirect(url_for('login'))
         cursor.execute('SELECT * FROM products WHERE seller_email = %s', (seller_email,))
-        seller_products = {
-            row['product_key']: dict(row,
-                 image_urls=row['image_urls'] if isinstance(row['image_urls'], list) else json.loads(row['image_urls']) if row['image_urls'] else [],
-                 sizes=row['sizes'] if isinstance(row['sizes'], dict) else json.loads(row['sizes']) if row['sizes'] else {}
-                 )
-            for row in cursor.fetchall()}
+        seller_products = {product['product_key']: product for product in fetch_products(cursor)}
     cart_data = get_cart_items()
     return render_template(
         'product_listing.html',
@@ -7292,6 +7586,8 @@ def new_product():
                     shipping_method, selling_price, shipping_cost, video_url, cod_available
                 ))
                 conn.commit()
+                catalog_cache.invalidate_product(product_key)
+                prefix_index.add_product(product_key, name, main_image, session['user']['email'], score=0)
                 return redirect(url_for('seller_dashboard'))
 
             except Exception as e:
@@ -7476,6 +7772,7 @@ def approve_seller_verification():
                ''', (reviewer_email, seller_email))
 
             conn.commit()
+            catalog_cache.invalidate_seller(seller_email)
 
             logger.info(f"Seller verification approved: {seller_email} by {reviewer_email}")
 
@@ -7527,6 +7824,7 @@ def reject_seller_verification():
                ''', (reviewer_email, reason, seller_email))
 
             conn.commit()
+            catalog_cache.invalidate_seller(seller_email)
 
             logger.info(f"Seller verification rejected: {seller_email} by {reviewer_email}")
 
@@ -7685,6 +7983,8 @@ def edit_product(product_key):
                 product_key, session['user']['email']
             ))
             conn.commit()
+            catalog_cache.invalidate_product(product_key)
+            prefix_index.add_product(product_key, name, main_image, session['user']['email'])
             return redirect(url_for('seller_dashboard'))
     cart_data = get_cart_items()
     return render_template(
@@ -7709,25 +8009,94 @@ def delete_product(product_key):
             return redirect(url_for('login'))
         cursor.execute('DELETE FROM products WHERE product_key = %s AND seller_email = %s',
                        (product_key, session['user']['email']))
+        if cursor.rowcount == 0:
+            # Not this seller's product (or already gone) - leave the index and cache alone
+            return render_template('404.html', error="Product not found"), 404
         conn.commit()
+        catalog_cache.invalidate_product(product_key)
+        prefix_index.remove_product(product_key)
     return redirect(url_for('seller_dashboard'))
 
+
+def count_product_like(product, delta):
+    """
+    Count a like (1) or unlike (-1) through the write-behind counters and
+    return the like count to show: the stored count plus what is still
+    buffered for the product
+    """
+    product_counters.add(product['product_key'], likes=delta)
+    return max((product['likes'] or 0) + product_counters.pending(product['product_key'])['likes'], 0)
+
+
+def load_product_page_details(cursor, product, user_email):
+    """
+    The SQLite counterpart of database_postgres.get_product_page(): rating
+    summary, reviews (all of them, no further pages) and the visitor's like,
+    one statement each
+    """
+    page = {}
+    cursor.execute('''
+        SELECT pr.*, u.first_name, u.last_name
+        FROM product_reviews pr
+        JOIN users u ON pr.buyer_email = u.email
+        WHERE pr.product_key = %s
+        ORDER BY pr.created_at DESC
+    ''', (product['product_key'],))
+    page['reviews'] = cursor.fetchall()
+    page['reviews_next'] = None
+
+    cursor.execute('''
+        SELECT avg_rating as avg_product_rating, rating_count as product_review_count
+        FROM product_rating_summary
+        WHERE product_key = %s
+    ''', (product['product_key'],))
+    page.update(cursor.fetchone() or {'avg_product_rating': None, 'product_review_count': 0})
+
+    page['user_liked'] = False
+    if user_email:
+        try:
+            cursor.execute('SELECT 1 FROM user_likes WHERE user_email = %s AND product_key = %s',
+                           (user_email, product['product_key']))
+            page['user_liked'] = cursor.fetchone() is not None
+        except Exception as e:
+            logger.warning(f"user_likes table issue: {e}")
+    return page
+
+
+def product_page_stamp(product, user_email):
+    """
+    Version stamp for /product/<key>, all cheap to look up: the cached product
+    record and catalog version (related products), the seller summary's
+    generation, the rating summary's updated_at and the visitor's like
+    (get_product_page_stamp), the visitor's CSRF token and cart
+    """
+    return ((repr(product.values()), catalog_cache.version(), catalog_cache.seller_version(product['seller_email']),
+             session.get('csrf_token'))
+            + get_product_page_stamp(product['product_key'], user_email) + cart_stamp())
+
+
 @app.route('/product/<product_key>')
 def product(product_key):
+    """
+    Product detail page: the product row and seller summary (catalog cache)
+    and one query for everything else on it (get_product_page), skipped -
+    like the rest - when a cheap version stamp answers 304. The click and
+    the personalization view are buffered and written in batches.
+    """
     product_key = unquote(product_key.replace('+', ' ')).strip()
+    user_email = (session.get('user') or {}).get('email')
     with get_db() as conn:
         cursor = conn.cursor(cursor_factory=psycopg2.extras.RealDictCursor) if DATABASE_TYPE == 'postgresql' else conn.cursor()
-        cursor.execute('SELECT * FROM products WHERE product_key = %s', (product_key,))
-        product = cursor.fetchone()
-        if not product:
-            cursor.execute('SELECT * FROM products WHERE LOWER(product_key) = LOWER(%s)', (product_key,))
-            product = cursor.fetchone()
+        def load_product():
+            cursor.execute('SELECT * FROM products WHERE product_key = %s', (product_key,))
+            found = fetch_product(cursor)
+            if not found:
+                cursor.execute('SELECT * FROM products WHERE LOWER(product_key) = LOWER(%s)', (product_key,))
+                found = fetch_product(cursor)
+            return found
+        product = catalog_cache.get_product(product_key, load_product)
         if not product:
             return redirect(url_for('index'))
-        # Handle JSON fields - PostgreSQL returns Python objects directly
-        image_urls = product['image_urls'] if isinstance(product['image_urls'], list) else json.loads(product['image_urls']) if product['image_urls'] else []
-        sizes = product['sizes'] if isinstance(product['sizes'], dict) else json.loads(product['sizes']) if product['sizes'] else {}
-        product = dict(product, image_urls=image_urls, sizes=sizes)
 
         # Check if seller is flagged - if so, completely hide product
         # is_user_flagged returns None if not flagged, dict if flagged
@@ -7736,119 +8105,89 @@ def product(product_key):
             # Product is hidden - redirect to homepage
             return redirect(url_for('index'))
 
-        cursor.execute('UPDATE products SET clicks = clicks + 1 WHERE product_key = %s', (product['product_key'],))
+        record_search_click(f"product:{product['product_key']}")
+
+        # Buffered and written in batches - no row lock on the product per view
+        product_counters.add(product['product_key'], clicks=1)
+        # Track product view for personalization (PostgreSQL only, logged-in users) - queued, inserted in batches
+        product_views.record(user_email, product['product_key'], product.get('category'))
 
-        # Track product view for personalization (PostgreSQL only, logged-in users)
-        if DATABASE_TYPE == 'postgresql' and 'user' in session and session.get('user', {}).get('email'):
+        # A revalidating browser that already has this version gets a 304
+        # before the page query, seller summary, related products and the template
+        etag = None
+        if DATABASE_TYPE == 'postgresql' and http_cache.HTTP_CONDITIONAL_ENABLED:
             try:
-                track_product_view(
-                    user_email=session['user']['email'],
-                    product_key=product['product_key'],
-                    category=product.get('category')
-                )
+                etag = http_cache.make_etag(request.path, *product_page_stamp(product, user_email))
             except Exception as e:
-                logger.error(f"Error tracking product view: {e}")
-                # Don't block the page if tracking fails
-                pass
-
-        # Get seller info - handle case where seller_verification might not exist yet
-        try:
-            cursor.execute('''
-                SELECT u.business_name, u.business_address, sv.verification_status
-                FROM users u
-                LEFT JOIN seller_verification sv ON u.email = sv.seller_email
-                WHERE u.email = %s
-            ''', (product['seller_email'],))
-            seller = cursor.fetchone()
-        except Exception as e:
-            # If seller_verification table doesn't exist yet, just get user info
-            logger.warning(f"seller_verification table issue: {e}, fetching basic user info")
-            cursor.execute('''
-                SELECT business_name, business_address, NULL as verification_status
-                FROM users
-                WHERE email = %s
-            ''', (product['seller_email'],))
-            seller = cursor.fetchone()
+                logger.error(f"Error computing product page version: {e}")
+            if etag:
+                response = http_cache.not_modified(etag)
+                if response:
+                    return response
+
+        seller = get_seller_summary(product['seller_email']) or {}
+        if DATABASE_TYPE == 'postgresql':
+            page = get_product_page(product['product_key'], user_email)
+        else:
+            page = load_product_page_details(cursor, product, user_email)
 
-        # Get seller ratings - handle case where seller_ratings might not exist yet
-        try:
+        def load_related():
+            if DATABASE_TYPE == 'postgresql':
+                # Precomputed co-view / co-purchase neighbours (related_products.py)
+                return get_related_products(product['product_key'], product['category'])
             cursor.execute('''
-                SELECT AVG(rating) as avg_rating, COUNT(rating) as rating_count
-                FROM seller_ratings
-                WHERE seller_email = %s
-            ''', (product['seller_email'],))
-            rating_info = cursor.fetchone()
-            avg_rating = round(rating_info['avg_rating'], 1) if rating_info['avg_rating'] else 0
-            rating_count = rating_info['rating_count'] if rating_info['rating_count'] else 0
-        except Exception as e:
-            # If seller_ratings table doesn't exist yet, default to no ratings
-            logger.warning(f"seller_ratings table issue: {e}")
-            avg_rating = 0
-            rating_count = 0
-
-        # Get product reviews
-        cursor.execute('''
-            SELECT pr.*, u.first_name, u.last_name
-            FROM product_reviews pr
-            JOIN users u ON pr.buyer_email = u.email
-            WHERE pr.product_key = %s
-            ORDER BY pr.created_at DESC
-        ''', (product['product_key'],))
-        product_reviews = cursor.fetchall()
-
-        # Get average product rating
-        cursor.execute('''
-            SELECT AVG(rating) as avg_product_rating, COUNT(*) as product_review_count
-            FROM product_reviews
-            WHERE product_key = %s
-        ''', (product['product_key'],))
-        product_rating_info = cursor.fetchone()
-        avg_product_rating = round(product_rating_info['avg_product_rating'], 1) if product_rating_info['avg_product_rating'] else 0
-        product_review_count = product_rating_info['product_review_count'] or 0
-        cursor.execute('''
-            SELECT * FROM products
-            WHERE category = %s AND product_key != %s
-            ORDER BY clicks DESC
-            LIMIT 4
-        ''', (product['category'], product['product_key']))
-        related_products = [
-            dict(row,
-                 image_urls=row['image_urls'] if isinstance(row['image_urls'], list) else json.loads(row['image_urls']) if row['image_urls'] else [],
-                 sizes=row['sizes'] if isinstance(row['sizes'], dict) else json.loads(row['sizes']) if row['sizes'] else {}
-                 )
-            for row in cursor.fetchall()
-        ]
-        user_liked = False
-        if 'user' in session:
-            try:
-                cursor.execute('''
-                    SELECT * FROM user_likes
-                    WHERE user_email = %s AND product_key = %s
-                ''', (session['user']['email'], product['product_key']))
-                user_liked = cursor.fetchone() is not None
-            except Exception as e:
-                # If user_likes table doesn't exist yet, default to not liked
-                logger.warning(f"user_likes table issue: {e}")
-                user_liked = False
-        conn.commit()
+                SELECT * FROM products
+                WHERE category = %s AND product_key != %s
+                ORDER BY clicks DESC
+                LIMIT 4
+            ''', (product['category'], product['product_key']))
+            return fetch_products(cursor)
+        related_products = catalog_cache.get_listing(('related', product['product_key']), load_related)
     cart_data = get_cart_items()
-    return render_template(
+    html = render_template(
         'product.html',
         product=product,
         seller=seller,
-        avg_rating=avg_rating,
-        rating_count=rating_count,
-        product_reviews=product_reviews,
-        avg_product_rating=avg_product_rating,
-        product_review_count=product_review_count,
+        avg_rating=round(seller['avg_rating'], 1) if seller.get('avg_rating') else 0,
+        rating_count=seller.get('rating_count') or 0,
+        product_reviews=page['reviews'],
+        reviews_next=page['reviews_next'],
+        reviews_paginated=DATABASE_TYPE == 'postgresql',
+        avg_product_rating=round(page['avg_product_rating'], 1) if page.get('avg_product_rating') else 0,
+        product_review_count=page.get('product_review_count') or 0,
         related_products=related_products,
-        user_liked=user_liked,
+        user_liked=page['user_liked'],
         cart_items=cart_data['items'],
         cart_total=cart_data['total'],
         discount=cart_data['discount'],
         user=session.get('user'),
         cart_item_count=cart_data['cart_item_count']
     )
+    return http_cache.with_etag(html, etag) if etag else html
+
+
+@app.route('/product/<product_key>/reviews')
+def product_reviews_page(product_key):
+    """
+    One page of a product's reviews as JSON for the product page's "more
+    reviews" and sort controls: ?sort=newest|rating, ?after=<next_cursor of
+    the previous page>
+    """
+    if DATABASE_TYPE != 'postgresql':
+        return jsonify({'success': False, 'message': 'Reviews are not paginated on SQLite'}), 404
+    product_key = unquote(product_key.replace('+', ' ')).strip()
+    sort = request.args.get('sort', 'newest')
+    if sort not in REVIEW_SORTS:
+        sort = 'newest'
+    after = request.args.get('after', '').strip()
+    if after and not decode_review_cursor(after, sort):
+        return jsonify({'success': False, 'message': 'Invalid cursor'}), 400
+    try:
+        reviews, next_cursor = get_product_reviews(product_key, sort, after or None)
+        return jsonify({'success': True, 'sort': sort, 'reviews': reviews, 'next_cursor': next_cursor})
+    except Exception as e:
+        logger.error(f"Error loading reviews for {product_key}: {e}")
+        return jsonify({'success': False, 'message': 'Error loading reviews'}), 500
 
 
 @app.route('/cart', methods=['GET', 'POST'])
@@ -7974,15 +8313,8 @@ def toggle_like(product_key):
                     DELETE FROM user_likes
                     WHERE user_email = %s AND product_key = %s
                 ''', (session['user']['email'], product_key))
-                cursor.execute(
-                    'UPDATE products SET likes = CASE WHEN likes > 0 THEN likes - 1 ELSE 0 END WHERE product_key = %s',
-                    (product_key,))
                 conn.commit()
-
-                # Get updated like count
-                cursor.execute('SELECT likes FROM products WHERE product_key = %s', (product_key,))
-                updated_product = cursor.fetchone()
-                likes_count = updated_product['likes'] if updated_product else 0
+                likes_count = count_product_like(product, -1)
                 logger.info(f"Unlike successful. New count: {likes_count}")
 
                 return jsonify({'success': True, 'liked': False, 'likes': likes_count})
@@ -7993,13 +8325,8 @@ def toggle_like(product_key):
                     INSERT INTO user_likes (user_email, product_key, created_at)
                     VALUES (%s, %s, %s)
                 ''', (session['user']['email'], product_key, datetime.now().strftime('%Y-%m-%d %H:%M:%S')))
-                cursor.execute('UPDATE products SET likes = likes + 1 WHERE product_key = %s', (product_key,))
                 conn.commit()
-
-                # Get updated like count
-                cursor.execute('SELECT likes FROM products WHERE product_key = %s', (product_key,))
-                updated_product = cursor.fetchone()
-                likes_count = updated_product['likes'] if updated_product else 0
+                likes_count = count_product_like(product, 1)
                 logger.info(f"Like successful. New count: {likes_count}")
 
                 return jsonify({'success': True, 'liked': True, 'likes': likes_count})
@@ -8217,7 +8544,8 @@ def checkout():
                     ))
 
 
-                    # Add order items and update inventory
+                    # Add order items and update inventory; sold counts go to the write-behind counters once committed
+                    sold_items = []
                     for item in cart_data['items']:
                         # Strip variations from product_key before inserting
                         base_product_key = re.sub(r'\s*\([^)]+\)$', '', item['product_key']).strip()
@@ -8228,8 +8556,10 @@ def checkout():
                         ''', (order_id, base_product_key, item['quantity'], item['price']))
 
                         # Update product inventory
-                        cursor.execute('UPDATE products SET amount = amount - %s, sold = sold + %s WHERE product_key = %s',
-                                       (item['quantity'], item['quantity'], base_product_key))
+                        cursor.execute('UPDATE products SET amount = amount - %s WHERE product_key = %s',
+                                       (item['quantity'], base_product_key))
+                        sold_items.append((base_product_key, item['quantity']))
+                        catalog_cache.invalidate_product(base_product_key)
 
                         # Check for low stock and create notification (guest checkout)
                         cursor.execute('SELECT amount, name, seller_email FROM products WHERE product_key = %s', (base_product_key,))
@@ -8326,6 +8656,8 @@ def checkout():
                     ))
 
                     conn.commit()
+                    for sold_key, quantity in sold_items:
+                        product_counters.add(sold_key, sold=quantity)
 
                     # Store order info for confirmation page
                     session['confirmation_data'] = {
@@ -8452,7 +8784,8 @@ def checkout():
                         False  # Will be verified manually or via API later
                     ))
 
-                    # Add order items and update inventory
+                    # Add order items and update inventory; sold counts go to the write-behind counters once committed
+                    sold_items = []
                     for item in cart_data['items']:
                         # Strip variations from product_key before inserting
                         base_product_key = re.sub(r'\s*\([^)]+\)$', '', item['product_key']).strip()
@@ -8463,8 +8796,10 @@ def checkout():
                         ''', (order_id, base_product_key, item['quantity'], item['price']))
 
                         # Update product inventory
-                        cursor.execute('UPDATE products SET amount = amount - %s, sold = sold + %s WHERE product_key = %s',
-                                       (item['quantity'], item['quantity'], base_product_key))
+                        cursor.execute('UPDATE products SET amount = amount - %s WHERE product_key = %s',
+                                       (item['quantity'], base_product_key))
+                        sold_items.append((base_product_key, item['quantity']))
+                        catalog_cache.invalidate_product(base_product_key)
 
                         # Check for low stock and create notification
                         cursor.execute('SELECT amount, name, seller_email FROM products WHERE product_key = %s', (base_product_key,))
@@ -8594,6 +8929,8 @@ def checkout():
                     ))
 
                     conn.commit()
+                    for sold_key, quantity in sold_items:
+                        product_counters.add(sold_key, sold=quantity)
 
                     # 🔥 UPDATE PURCHASE COUNT
                     cursor.execute('''
@@ -8836,17 +9173,15 @@ def like_product(product_key):
                     DELETE FROM user_likes
                     WHERE user_email = %s AND product_key = %s
                 ''', (session['user']['email'], product_key))
-                cursor.execute('UPDATE products SET likes = likes - 1 WHERE product_key = %s', (product_key,))
                 conn.commit()
-                return jsonify({'success': True, 'liked': False, 'likes': product['likes'] - 1})
+                return jsonify({'success': True, 'liked': False, 'likes': count_product_like(product, -1)})
             else:
                 cursor.execute('''
                     INSERT INTO user_likes (user_email, product_key, created_at)
                     VALUES (%s, %s, %s)
                 ''', (session['user']['email'], product_key, datetime.now().strftime('%Y-%m-%d %H:%M:%S')))
-                cursor.execute('UPDATE products SET likes = likes + 1 WHERE product_key = %s', (product_key,))
                 conn.commit()
-                return jsonify({'success': True, 'liked': True, 'likes': product['likes'] + 1})
+                return jsonify({'success': True, 'liked': True, 'likes': count_product_like(product, 1)})
     except Exception as e:
         logger.error(f"Error in like_product: {e}\n{traceback.format_exc()}")
         return jsonify({'success': False, 'message': 'Error processing like'}), 500
@@ -8919,6 +9254,7 @@ def rate_seller():
                 VALUES (%s, %s, %s)
             ''', (session['user']['email'], seller_email, rating))
             conn.commit()
+            catalog_cache.invalidate_seller(seller_email)
 
             cursor.execute('''
                 SELECT AVG(rating) as avg_rating, COUNT(rating) as rating_count
@@ -8996,11 +9332,13 @@ def submit_product_review():
             ''', (product_key, buyer_email, seller_email, rating, review_text, is_verified_purchase, rating, review_text))
 
             conn.commit()
+            # Cached feed pages carry review averages
+            catalog_cache.invalidate_listings()
 
             # Get updated review stats
             cursor.execute('''
-                SELECT AVG(rating) as avg_rating, COUNT(*) as review_count
-                FROM product_reviews
+                SELECT avg_rating, rating_count as review_count
+                FROM product_rating_summary
                 WHERE product_key = %s
             ''', (product_key,))
             stats = cursor.fetchone()
@@ -9008,8 +9346,8 @@ def submit_product_review():
             return jsonify({
                 'success': True,
                 'message': 'Review submitted successfully',
-                'avg_rating': round(stats['avg_rating'], 1) if stats['avg_rating'] else 0,
-                'review_count': stats['review_count'] or 0,
+                'avg_rating': round(stats['avg_rating'], 1) if stats and stats['avg_rating'] else 0,
+                'review_count': stats['review_count'] if stats else 0,
                 'is_verified_purchase': is_verified_purchase
             })
 
@@ -9018,81 +9356,258 @@ def submit_product_review():
         return jsonify({'success': False, 'message': 'Error submitting review'}), 500
 
 
+# Shipping methods a seller can pick; buyers see each as free shipping
+SHIPPING_METHOD_LABELS = {
+    'knutsford': 'Knutsford Express',
+    'jamaica_post': 'Jamaica Post',
+    'local_delivery': 'Local Delivery',
+}
+
+
+def get_search_filters(args):
+    """Facet filters (price, parish, cod, shipping_method) from the query string; unknown values are dropped"""
+    filters = {}
+    price = args.get('price', type=int)
+    if price is not None and 0 <= price < len(SEARCH_PRICE_BUCKETS):
+        filters['price'] = price
+    parish = args.get('parish', '').strip()
+    if parish in PARISHES:
+        filters['parish'] = parish
+    if args.get('cod') == '1':
+        filters['cod'] = True
+    shipping_method = args.get('shipping_method', '').strip()
+    if shipping_method in SHIPPING_METHOD_LABELS:
+        filters['shipping_method'] = shipping_method
+    return filters
+
+
+def search_params(query, category, filters):
+    """Query string values for a search: query, category and facet filters"""
+    return {'query': query or None, 'category': category or None, 'price': filters.get('price'),
+            'parish': filters.get('parish'), 'cod': '1' if filters.get('cod') else None,
+            'shipping_method': filters.get('shipping_method')}
+
+
+def search_url(params, **changes):
+    """/search URL for search_params() with changes applied (None removes a value)"""
+    params = dict(params, **changes)
+    return url_for('search', **{name: value for name, value in params.items() if value is not None})
+
+
+def price_bucket_label(bucket):
+    low = SEARCH_PRICE_BUCKETS[bucket]
+    if bucket + 1 == len(SEARCH_PRICE_BUCKETS):
+        return f"J${low:,}+"
+    high = SEARCH_PRICE_BUCKETS[bucket + 1]
+    return f"Under J${high:,}" if low == 0 else f"J${low:,} - J${high:,}"
+
+
+def search_facet_groups(query, category, filters, facets):
+    """
+    Facet counts as the search page renders them: groups of options with a
+    label, count, the URL that applies it (or removes it when selected)
+    """
+    if not facets:
+        return []
+    params = search_params(query, category, filters)
+
+    def option(label, count, selected, name, value):
+        return {'label': label, 'count': count, 'selected': selected,
+                'url': search_url(params, **{name: None if selected else value})}
+
+    groups = [
+        ('Category', [option(value, count, value == category, 'category', value)
+                      for value, count in facets['category']]),
+        ('Price', [option(price_bucket_label(value), count, value == filters.get('price'), 'price', value)
+                   for value, count in facets['price'] if 0 <= value < len(SEARCH_PRICE_BUCKETS)]),
+        ('Seller parish', [option(value, count, value == filters.get('parish'), 'parish', value)
+                           for value, count in facets['parish']]),
+        ('Cash on delivery', [option('COD available', count, bool(filters.get('cod')), 'cod', '1')
+                              for _, count in facets['cod']]),
+        ('Free shipping', [option(SHIPPING_METHOD_LABELS.get(value, value), count,
+                                  value == filters.get('shipping_method'), 'shipping_method', value)
+                           for value, count in facets['shipping_method']]),
+    ]
+    return [{'name': name, 'options': options} for name, options in groups if options]
+
+
+def record_search_click(target):
+    """
+    Log the page being opened (target, e.g. 'product:<key>') as a click on
+    search results: from an /autocomplete suggestion (?sq=) or from a
+    /search results page (Referer)
+    """
+    if not search_log.is_active():
+        return
+    query = request.args.get('sq')
+    if query:
+        search_log.record(search_log.AUTOCOMPLETE_CLICK, query, target=target)
+        return
+    referrer = urlparse(request.referrer or '')
+    if referrer.netloc == request.host and referrer.path == url_for('search'):
+        query = parse_qs(referrer.query).get('query', [''])[0]
+        if query:
+            search_log.record(search_log.SEARCH_CLICK, query, target=target)
+
+
+def record_search(query, category, filters):
+    """Log a /search with its number of results (the page is usually already in the listing cache)"""
+    if not query or not search_log.is_active():
+        return
+    try:
+        products, _, facets = load_search_page(query, category, 1, filters, with_facets=True)
+        search_log.record(search_log.SEARCH, query, results=facets['total'] if facets else len(products))
+    except Exception as e:
+        logger.error(f"Error logging search query: {e}")
+
+
+def search_catalog(query, category, page=1, filters=None, with_facets=False):
+    """
+    One page of search results, flagged sellers excluded: (products keyed by
+    product_key, True if there is a next page, facet counts or None).
+    Facets are only counted on PostgreSQL.
+    """
+    filters = filters or {}
+    flagged_sellers = get_flagged_seller_emails()
+    if DATABASE_TYPE == 'postgresql':
+        # Full-text search ranked by relevance, facets from the same query (database_postgres.search_products)
+        products, has_more, facets = search_products(query, category or None, excluded_seller_emails=flagged_sellers,
+                                                     page=page, filters=filters, with_facets=with_facets)
+        return {product['product_key']: product for product in products}, has_more, facets
+
+    with get_db() as conn:
+        cursor = conn.cursor()
+
+        # Split query into keywords for partial matching
+        keywords = query.lower().split() if query else []
+        keyword_conditions = []
+        params = []
+
+        for keyword in keywords:
+            keyword_conditions.append("LOWER(p.name) LIKE %s")
+            params.append(f'%{keyword}%')
+
+        keyword_clause = " AND ".join(keyword_conditions) if keyword_conditions else "1=1"
+        sql = f'SELECT p.* FROM products p WHERE ({keyword_clause})'
+
+        if category:
+            sql += ' AND p.category = %s'
+            params.append(category)
+        if 'price' in filters:
+            sql += ' AND p.price >= %s'
+            params.append(SEARCH_PRICE_BUCKETS[filters['price']])
+            if filters['price'] + 1 < len(SEARCH_PRICE_BUCKETS):
+                sql += ' AND p.price < %s'
+                params.append(SEARCH_PRICE_BUCKETS[filters['price'] + 1])
+        if 'parish' in filters:
+            sql += ' AND p.shipping = %s'
+            params.append(filters['parish'])
+        if filters.get('cod'):
+            sql += ' AND p.cod_available = 1'
+        if 'shipping_method' in filters:
+            sql += ' AND p.shipping_method = %s'
+            params.append(filters['shipping_method'])
+
+        sql += ' LIMIT %s OFFSET %s'
+        params.extend([SEARCH_PAGE_SIZE + 1, (page - 1) * SEARCH_PAGE_SIZE])
+
+        cursor.execute(sql, params)
+        products = [product for product in fetch_products(cursor) if product['seller_email'] not in flagged_sellers]
+        return ({product['product_key']: product for product in products[:SEARCH_PAGE_SIZE]},
+                len(products) > SEARCH_PAGE_SIZE, None)
+
+
+def load_search_page(query, category, page=1, filters=None, with_facets=False):
+    """(products, next_url, facets) for one page of results; results don't depend on who is searching"""
+    filters = filters or {}
+    products, has_more, facets = catalog_cache.get_listing(
+        ('search', ' '.join(query.lower().split()), category, tuple(sorted(filters.items())), page, with_facets),
+        lambda: search_catalog(query, category, page, filters, with_facets)
+    )
+    next_url = search_url(search_params(query, category, filters), page=page + 1, format='html') if has_more else None
+    return products, next_url, facets
+
+
 @app.route('/search', methods=['GET'])
 def search():
+    """
+    Search results page, narrowed by the facet filters in the query string
+    (price, parish, cod, shipping_method). Further pages come from the same
+    URL with &page=N&format=html, as JSON for the infinite scroll.
+    """
     query = request.args.get('query', '').strip()
     category = request.args.get('category', '').strip()
-    cart_data = get_cart_items()
-    try:
-        with get_db() as conn:
-            cursor = conn.cursor(cursor_factory=psycopg2.extras.RealDictCursor) if DATABASE_TYPE == 'postgresql' else conn.cursor()
+    filters = get_search_filters(request.args)
+    page = max(request.args.get('page', 1, type=int), 1)
 
-            # Split query into keywords for partial matching
-            keywords = query.lower().split() if query else []
-            keyword_conditions = []
-            params = []
+    if request.args.get('format') == 'html':
+        try:
+            products, next_url, _ = load_search_page(query, category, page, filters)
+            return jsonify({
+                'success': True,
+                'html': render_template('product_cards.html', products=products),
+                'count': len(products),
+                'next_url': next_url
+            })
+        except Exception as e:
+            logger.error(f"Error loading search page: {e}")
+            return jsonify({'success': False, 'message': 'Could not load more results'}), 500
 
-            for keyword in keywords:
-                keyword_conditions.append("LOWER(p.name) LIKE %s")
-                params.append(f'%{keyword}%')
+    if page == 1:
+        record_search(query, category, filters)
+    if category and request.args.get('sq'):
+        record_search_click(f'category:{category}')
 
-            keyword_clause = " AND ".join(keyword_conditions) if keyword_conditions else "1=1"
+    user = session.get('user')
+    if not user:
+        key = ('search', category, ' '.join(query.lower().split()), tuple(sorted(filters.items())), page)
+        return render_anonymous_page(key, lambda **slots: render_search(query, category, page, filters, **slots))
 
-            # Exclude products from flagged sellers
-            sql = f'''
-                SELECT p.* FROM products p
-                LEFT JOIN user_flags uf ON p.seller_email = uf.user_email AND uf.is_active = true
-                WHERE uf.id IS NULL AND ({keyword_clause})
-            '''
+    cart_data = get_cart_items()
+    html, _ = render_search(
+        query, category, page, filters,
+        user=user,
+        cart_items=cart_data['items'],
+        cart_total=cart_data['total'],
+        discount=cart_data['discount'],
+        cart_item_count=cart_data['cart_item_count']
+    )
+    return html
 
-            if category:
-                sql += ' AND p.category = %s'
-                params.append(category)
-
-            cursor.execute(sql, params)
-            products_list = [
-                dict(row,
-                 image_urls=row['image_urls'] if isinstance(row['image_urls'], list) else json.loads(row['image_urls']) if row['image_urls'] else [],
-                 sizes=row['sizes'] if isinstance(row['sizes'], dict) else json.loads(row['sizes']) if row['sizes'] else {}
-                 )
-                for row in cursor.fetchall()
-            ]
-            # Convert list to dictionary with product_key as key (matching index route format)
-            products = {product['product_key']: product for product in products_list}
 
-            return render_template(
-                'index.html',
-                products=products,
-                cart_items=cart_data['items'],
-                cart_total=cart_data['total'],
-                discount=cart_data['discount'],
-                user=session.get('user'),
-                cart_item_count=cart_data['cart_item_count'],
-                categories=[
-                    'Accessories', 'Baby & Maternity', 'Beachwear', 'Beauty & Health', 'Home & Kitchen',
-                    'Jewelry', 'Kids', 'Men Clothing', 'Shoes', 'Sports & Outdoors',
-                    'Underwear & Sleepwear', 'Women Clothing'
-                ],
-                search_query=query,
-                selected_category=category
-            )
+def render_search(query, category, page=1, filters=None, user=None, **context):
+    """Render search results with their facet counts; returns (html, False if it is an error page)"""
+    filters = filters or {}
+    context.update({
+        'user': user,
+        'categories': [
+            'Accessories', 'Baby & Maternity', 'Beachwear', 'Beauty & Health', 'Home & Kitchen',
+            'Jewelry', 'Kids', 'Men Clothing', 'Shoes', 'Sports & Outdoors',
+            'Underwear & Sleepwear', 'Women Clothing'
+        ]
+    })
+    try:
+        products, next_url, facets = load_search_page(query, category, page, filters, with_facets=True)
+
+        return render_template(
+            'index.html',
+            products=products,
+            next_url=next_url,
+            search_query=query,
+            selected_category=category,
+            search_total=facets['total'] if facets else None,
+            facet_groups=search_facet_groups(query, category, filters, facets),
+            clear_filters_url=search_url(search_params(query, None, {})) if category or filters else None,
+            **context
+        ), True
     except Exception as e:
         logger.error(f"Error in search: {e}\n{traceback.format_exc()}")
         return render_template(
             'index.html',
             error="Error performing search",
             products={},
-            cart_items=cart_data['items'],
-            cart_total=cart_data['total'],
-            discount=cart_data['discount'],
-            user=session.get('user'),
-            cart_item_count=cart_data['cart_item_count'],
-            categories=[
-                'Accessories', 'Baby & Maternity', 'Beachwear', 'Beauty & Health', 'Home & Kitchen',
-                'Jewelry', 'Kids', 'Men Clothing', 'Shoes', 'Sports & Outdoors',
-                'Underwear & Sleepwear', 'Women Clothing'
-            ]
-        )
+            **context
+        ), False
 
 
 # ==================================================
@@ -9161,6 +9676,7 @@ def lynk_info():
 
 @app.route('/admin/api/lynk_orders')
 @admin_required()
+@http_cache.conditional(table_stamp('order_items', 'orders'))
 def admin_api_lynk_orders():
     """Get all Lynk orders for admin dashboard"""
     try:
@@ -9200,6 +9716,7 @@ def admin_api_lynk_orders():
 
 @app.route('/admin/api/conversations')
 @admin_required()
+@http_cache.conditional(table_stamp('contact_messages'))
 def admin_api_conversations():
     """Get all customer conversations for admin dashboard"""
     try:
@@ -9241,6 +9758,7 @@ def admin_api_conversations():
 
 @app.route('/admin/api/conversation/<session_id>/messages')
 @admin_required()
+@http_cache.conditional(table_stamp('contact_messages'))
 def admin_api_conversation_messages(session_id):
     """Get all messages for a specific conversation"""
     try:
@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+Benchmark: /autocomplete trigram suggestions against the LIKE scan they replaced.
+
+Replays what a shopper types - growing prefixes plus common misspellings -
+through the old query (LOWER(name) LIKE '%kw%' per keyword, ORDER BY clicks),
+through autocomplete_suggestions() (pg_trgm word similarity on GIN indexes)
+and through the in-process prefix index (prefix_index.py). Reports p50/p99
+latency and how many keystrokes found anything, the prefix index's build
+time and memory footprint, and fails if the pg_trgm p99 is over
+AUTOCOMPLETE_P99_BUDGET_MS. Seed a scratch database first (seed_catalog.py),
+or pass --seed to do it here.
+
+Usage:
+    DATABASE_URL=postgresql://... python benchmark_autocomplete.py [--seed 100000] [--runs 5]
+"""
+
+import argparse
+import sys
+import time
+
+from database_postgres import (get_db, autocomplete_suggestions, get_autocomplete_entries,
+                               AUTOCOMPLETE_P99_BUDGET_MS)
+import prefix_index
+import seed_catalog
+
+# Prefixes as they are typed, then misspellings the LIKE query never matched
+TYPED = ['sa', 'san', 'sand', 'sanda', 'sandal', 'ear', 'earr', 'earri', 'jer', 'jerk', 'yog', 'yoga m',
+         'red dr', 'gold neck', 'seed shop 1']
+MISSPELT = ['sandels', 'earings', 'neckless', 'sneekers', 'jerk seasonin', 'bikinni', 'perfum', 'bucket hatt']
+
+
+def like_suggestions(cursor, query):
+    """The /autocomplete query before pg_trgm"""
+    keywords = query.lower().split()
+    where_clause = ' AND '.join('LOWER(name) LIKE %s' for _ in keywords) or '1=1'
+    cursor.execute(f'''
+        SELECT product_key, name, image_url
+        FROM products
+        WHERE {where_clause}
+        ORDER BY clicks DESC, likes DESC
+        LIMIT 5
+    ''', [f'%{keyword}%' for keyword in keywords])
+    return cursor.fetchall()
+
+
+def measure(run, queries, runs):
+    latencies = []
+    found = 0
+    for query in queries:
+        for attempt in range(runs):
+            start = time.perf_counter()
+            results = run(query)
+            latencies.append((time.perf_counter() - start) * 1000)
+            if attempt == 0 and results:
+                found += 1
+    latencies.sort()
+    return {
+        'found': found,
+        'p50_ms': latencies[len(latencies) // 2],
+        'p99_ms': latencies[min(int(len(latencies) * 0.99), len(latencies) - 1)],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--seed', type=int, metavar='PRODUCTS', help='seed this many products first')
+    parser.add_argument('--runs', type=int, default=5, help='runs per keystroke')
+    args = parser.parse_args()
+
+    with get_db() as conn:
+        cursor = conn.cursor()
+        if args.seed:
+            print(f"🌱 Seeding {args.seed:,} products...")
+            seed_catalog.seed(cursor, args.seed)
+            conn.commit()
+        cursor.execute('SELECT COUNT(*) FROM products')
+        total = cursor.fetchone()[0]
+
+        print("=" * 70)
+        print(f"⌨️  {len(TYPED)} typed + {len(MISSPELT)} misspelt keystrokes x {args.runs} runs "
+              f"over {total:,} products")
+        print("=" * 70)
+
+        start = time.perf_counter()
+        index = prefix_index.build(get_autocomplete_entries())
+        print(f"🔤 Prefix index: {len(index):,} entries, {index.token_count():,} tokens, "
+              f"{index.memory_bytes() / (1024 * 1024):.1f}MB, built in {time.perf_counter() - start:.2f}s")
+
+        new_p99 = 0.0
+        for label, queries in (('typed', TYPED), ('misspelt', MISSPELT)):
+            old = measure(lambda q: like_suggestions(cursor, q), queries, args.runs)
+            new = measure(autocomplete_suggestions, queries, args.runs)
+            # First run per keystroke is uncached; the rest hit the index's result cache
+            mem = measure(prefix_index.search, queries, args.runs)
+            new_p99 = max(new_p99, new['p99_ms'])
+            print(f"{label:>9}  LIKE:    found {old['found']:2d}/{len(queries)}  "
+                  f"p50 {old['p50_ms']:7.2f}ms  p99 {old['p99_ms']:7.2f}ms")
+            print(f"{'':>9}  pg_trgm: found {new['found']:2d}/{len(queries)}  "
+                  f"p50 {new['p50_ms']:7.2f}ms  p99 {new['p99_ms']:7.2f}ms")
+            print(f"{'':>9}  prefix:  found {mem['found']:2d}/{len(queries)}  "
+                  f"p50 {mem['p50_ms']:7.3f}ms  p99 {mem['p99_ms']:7.3f}ms")
+
+    print("=" * 70)
+    if new_p99 > AUTOCOMPLETE_P99_BUDGET_MS:
+        print(f"❌ Autocomplete p99 {new_p99:.1f}ms is over the {AUTOCOMPLETE_P99_BUDGET_MS:g}ms budget")
+        sys.exit(1)
+    print(f"✅ Autocomplete p99 {new_p99:.1f}ms is within the {AUTOCOMPLETE_P99_BUDGET_MS:g}ms budget")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+Benchmark: concurrent request throughput while one slow query is running.
+
+Reproduces the production setup (one eventlet worker) in a single process:
+one greenlet runs a slow query (pg_sleep, standing in for admin_api_users /
+admin_api_revenue_data) while N other greenlets run short shopper queries.
+It runs twice - with blocking psycopg2 and with the eventlet wait callback -
+and reports how many short queries completed while the slow one was in flight.
+
+Usage:
+    DATABASE_URL=postgresql://... python benchmark_green_db.py [--slow 2] [--workers 20]
+"""
+
+import eventlet
+eventlet.monkey_patch()
+
+import argparse
+import time
+
+from database_postgres import ConnectionPool, get_dsn, enable_green_io, disable_green_io
+
+
+def run_round(green, slow_seconds, workers):
+    if green:
+        enable_green_io(force=True)
+    else:
+        disable_green_io()
+
+    # Fresh pool per round so every connection is created in the mode under test
+    pool = ConnectionPool(get_dsn(), min_size=workers + 1, max_size=workers + 1)
+    pool.prefill()
+
+    stop_at = [None]
+    completed = []
+    latencies = []
+
+    def slow_query():
+        conn = pool.getconn()
+        try:
+            cursor = conn.cursor()
+            cursor.execute('SELECT pg_sleep(%s)', (slow_seconds,))
+        finally:
+            stop_at[0] = time.monotonic()
+            pool.putconn(conn)
+
+    def shopper():
+        conn = pool.getconn()
+        try:
+            cursor = conn.cursor()
+            while stop_at[0] is None:
+                start = time.monotonic()
+                cursor.execute('SELECT product_key FROM products ORDER BY clicks DESC LIMIT 20')
+                cursor.fetchall()
+                latencies.append(time.monotonic() - start)
+                completed.append(1)
+                eventlet.sleep(0)
+        finally:
+            pool.putconn(conn)
+
+    started = time.monotonic()
+    pile = eventlet.GreenPool(workers + 1)
+    pile.spawn(slow_query)
+    eventlet.sleep(0)  # let the slow query go out first
+    for _ in range(workers):
+        pile.spawn(shopper)
+    pile.waitall()
+    elapsed = time.monotonic() - started
+    pool.close()
+
+    latencies.sort()
+    p50 = latencies[len(latencies) // 2] * 1000 if latencies else 0
+    p99 = latencies[int(len(latencies) * 0.99)] * 1000 if latencies else 0
+    return {
+        'queries': len(completed),
+        'elapsed': elapsed,
+        'qps': len(completed) / elapsed if elapsed else 0,
+        'p50_ms': p50,
+        'p99_ms': p99,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--slow', type=float, default=2.0, help='seconds the slow query sleeps')
+    parser.add_argument('--workers', type=int, default=20, help='concurrent shopper greenlets')
+    args = parser.parse_args()
+
+    print("=" * 70)
+    print(f"🐢 One {args.slow:g}s query + {args.workers} concurrent shopper queries")
+    print("=" * 70)
+
+    results = {}
+    for label, green in (('blocking', False), ('green', True)):
+        results[label] = run_round(green, args.slow, args.workers)
+        r = results[label]
+        print(f"{label:>9}: {r['queries']:6d} queries in {r['elapsed']:.2f}s "
+              f"({r['qps']:8.1f}/s)  p50 {r['p50_ms']:.1f}ms  p99 {r['p99_ms']:.1f}ms")
+
+    disable_green_io()
+    if results['blocking']['queries']:
+        ratio = results['green']['queries'] / results['blocking']['queries']
+        print(f"\n✅ Green I/O completed {ratio:.1f}x as many shopper queries during the slow query")
+    else:
+        print("\n✅ Blocking mode completed no shopper queries at all while the slow query ran")
+
+
+if __name__ == "__main__":
+    main()
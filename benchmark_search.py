@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""
+Benchmark: /search full-text search against the LIKE scan it replaced.
+
+Runs each query through the old /search implementation (LOWER(name) LIKE
+'%kw%' per keyword, every match returned) and through search_products()
+(product_search.search_vector @@ tsquery on the GIN index, ts_rank order,
+one page), and reports latency and the scan each plan uses. Then times the
+first page with its facet counts (one GROUPING SETS query), unfiltered and
+narrowed by category and price, to check that narrowing costs less. Seed a
+scratch database first (seed_catalog.py), or pass --seed to do it here.
+
+Usage:
+    DATABASE_URL=postgresql://... python benchmark_search.py [--seed 100000] [--runs 20]
+"""
+
+import argparse
+import json
+import time
+
+from database_postgres import get_db, search_products, build_search_query, SEARCH_PAGE_SIZE
+import seed_catalog
+from verify_indexes import _scans
+
+QUERIES = ['dress', 'red dress', 'sandals', 'sand', 'gold earrings', 'yoga mat', 'jerk', 'vintage watch 12']
+
+
+def like_search(cursor, query):
+    """The /search query before full-text search"""
+    keywords = query.lower().split()
+    clause = ' AND '.join('LOWER(p.name) LIKE %s' for _ in keywords) or '1=1'
+    sql = f'SELECT p.* FROM products p WHERE p.seller_email <> ALL(%s) AND ({clause})'
+    return sql, [[]] + [f'%{keyword}%' for keyword in keywords]
+
+
+def fts_search(query):
+    """The search_products() query for page 1"""
+    tsquery = build_search_query(query)
+    sql = '''
+        SELECT p.*, ts_rank(search_vector, to_tsquery('english', %s)) as search_rank
+        FROM products p JOIN product_search ps USING (product_key)
+        WHERE search_vector @@ to_tsquery('english', %s)
+        AND seller_email <> ALL(%s)
+        ORDER BY search_rank DESC, popularity_score DESC, product_key DESC
+        LIMIT %s OFFSET 0
+    '''
+    return sql, [tsquery, tsquery, [], SEARCH_PAGE_SIZE + 1]
+
+
+def plan_nodes(cursor, sql, params):
+    cursor.execute('EXPLAIN (FORMAT JSON) ' + sql, params)
+    plan = cursor.fetchone()[0]
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return ', '.join(f"{table}: {'/'.join(sorted(nodes))}" for table, nodes in sorted(_scans(plan[0]['Plan'], {}).items()))
+
+
+def timed(run, runs):
+    latencies = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        rows = run()
+        latencies.append((time.perf_counter() - start) * 1000)
+    latencies.sort()
+    return rows, latencies[len(latencies) // 2], latencies[min(int(len(latencies) * 0.99), len(latencies) - 1)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--seed', type=int, metavar='PRODUCTS', help='seed this many products first')
+    parser.add_argument('--runs', type=int, default=20, help='runs per query and implementation')
+    args = parser.parse_args()
+
+    with get_db() as conn:
+        cursor = conn.cursor()
+        if args.seed:
+            print(f"🌱 Seeding {args.seed:,} products...")
+            seed_catalog.seed(cursor, args.seed)
+            conn.commit()
+        cursor.execute('SELECT COUNT(*) FROM products')
+        total = cursor.fetchone()[0]
+
+        print("=" * 70)
+        print(f"🔎 {len(QUERIES)} queries x {args.runs} runs over {total:,} products")
+        print("=" * 70)
+
+        like_total = fts_total = 0.0
+        for query in QUERIES:
+            like_sql, like_params = like_search(cursor, query)
+
+            def run_like():
+                cursor.execute(like_sql, like_params)
+                return len(cursor.fetchall())
+
+            like_rows, like_p50, like_p99 = timed(run_like, args.runs)
+            fts_rows, fts_p50, fts_p99 = timed(lambda: len(search_products(query)[0]), args.runs)
+            like_total += like_p50
+            fts_total += fts_p50
+
+            print(f"'{query}'")
+            print(f"   LIKE: {like_rows:6d} rows  p50 {like_p50:8.2f}ms  p99 {like_p99:8.2f}ms  "
+                  f"({plan_nodes(cursor, like_sql, like_params)})")
+            fts_sql, fts_params = fts_search(query)
+            print(f"   FTS:  {fts_rows:6d} rows  p50 {fts_p50:8.2f}ms  p99 {fts_p99:8.2f}ms  "
+                  f"({plan_nodes(cursor, fts_sql, fts_params)})")
+
+        print("=" * 70)
+        print("🧮 First page with facet counts (category, price, parish, COD, shipping)")
+        for query in QUERIES:
+            (_, _, facets), wide_p50, _ = timed(lambda: search_products(query, with_facets=True), args.runs)
+            category = facets['category'][0][0] if facets and facets['category'] else None
+            narrow_filters = {'price': 1}
+            (_, _, narrow), narrow_p50, _ = timed(
+                lambda: search_products(query, category, filters=narrow_filters, with_facets=True), args.runs)
+            print(f"'{query}'  all: {facets['total'] if facets else 0:6d} hits  p50 {wide_p50:7.2f}ms   "
+                  f"{category or '-'} / price bucket 1: {narrow['total'] if narrow else 0:6d} hits  "
+                  f"p50 {narrow_p50:7.2f}ms")
+
+    print("=" * 70)
+    if fts_total:
+        print(f"✅ Full-text search: {like_total / fts_total:.1f}x faster at the median "
+              f"(summed p50 {like_total:.1f}ms -> {fts_total:.1f}ms)")
+
+
+if __name__ == "__main__":
+    main()
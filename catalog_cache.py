@@ -0,0 +1,340 @@
+"""
+In-process catalog cache for Zo-Zi Marketplace
+
+Product rows change rarely (a seller edits a listing, a checkout decrements
+stock) but the homepage, /feed, /search, /free and /product/<key> read them
+on every hit. This keeps two bounded LRU caches with a TTL:
+
+    products  - decoded Product records by product_key
+    listings  - ranked pages for anonymous shoppers (feed pages, search
+                results, free gifts, related products)
+    pages     - fully rendered index/search HTML for logged-out visitors,
+                with placeholders for the per-visitor CSRF token and cart badge
+    sellers   - seller summaries (business details, logo, verification,
+                rating, product count, total sold) shared by the product
+                page, store page, seller directory and /get_seller_info
+
+It also holds the set of currently flagged users, which every listing query
+and product page filters on. That set is rebuilt from user_flags when an
+admin flags/unflags someone, when the soonest expires_at passes, or after
+FLAGGED_USERS_TTL at the latest.
+
+Every write path calls invalidate_product() (or invalidate_listings()),
+which drops the product and every cached listing. The eviction is repeated
+when the request finishes so a reader that raced the write transaction
+cannot leave a pre-commit copy behind. The TTL bounds staleness for changes
+that don't go through the app (other workers, clicks, manual SQL).
+Seller summaries are dropped the same way by invalidate_seller() when a
+seller edits their store or profile, is rated or has their verification
+reviewed; product counts and sales in them are only as fresh as
+SELLER_CACHE_TTL.
+"""
+
+import os
+import time
+import threading
+from collections import OrderedDict
+from flask import g, has_request_context
+
+CATALOG_CACHE_TTL = float(os.getenv('CATALOG_CACHE_TTL', '60'))
+CATALOG_CACHE_MAX_PRODUCTS = int(os.getenv('CATALOG_CACHE_MAX_PRODUCTS', '5000'))
+CATALOG_CACHE_MAX_LISTINGS = int(os.getenv('CATALOG_CACHE_MAX_LISTINGS', '500'))
+CATALOG_CACHE_MAX_PAGES = int(os.getenv('CATALOG_CACHE_MAX_PAGES', '200'))
+FLAGGED_USERS_TTL = float(os.getenv('FLAGGED_USERS_TTL', '300'))
+SELLER_CACHE_TTL = float(os.getenv('SELLER_CACHE_TTL', '300'))
+SELLER_CACHE_MAX_ENTRIES = int(os.getenv('SELLER_CACHE_MAX_ENTRIES', '2000'))
+CATALOG_CACHE_ENABLED = os.getenv('CATALOG_CACHE_ENABLED', 'true').lower() in ('1', 'true', 'yes')
+
+_MISSING = object()
+
+
+class LRUCache:
+    """Thread-safe LRU cache with a per-entry TTL and hit/miss counters"""
+
+    def __init__(self, name, max_entries, ttl):
+        self.name = name
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries = OrderedDict()  # key -> (expires_at, value)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def get(self, key, default=None):
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key, _MISSING)
+            if entry is _MISSING:
+                self.misses += 1
+                return default
+            if entry[0] <= now:
+                del self._entries[key]
+                self.misses += 1
+                return default
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def set(self, key, value, ttl=None):
+        expires_at = time.monotonic() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            self._entries[key] = (expires_at, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def get_or_load(self, key, loader, ttl=None):
+        """Cached value for key, calling loader() and caching its result on a miss"""
+        value = self.get(key, _MISSING)
+        if value is _MISSING:
+            value = loader()
+            self.set(key, value, ttl)
+        return value
+
+    def invalidate(self, key):
+        with self._lock:
+            if self._entries.pop(key, _MISSING) is not _MISSING:
+                self.invalidations += 1
+
+    def clear(self):
+        with self._lock:
+            self.invalidations += len(self._entries)
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'max_entries': self.max_entries,
+                'ttl_seconds': self.ttl,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hits / lookups, 3) if lookups else None,
+                'evictions': self.evictions,
+                'invalidations': self.invalidations,
+            }
+
+
+products = LRUCache('products', CATALOG_CACHE_MAX_PRODUCTS, CATALOG_CACHE_TTL)
+listings = LRUCache('listings', CATALOG_CACHE_MAX_LISTINGS, CATALOG_CACHE_TTL)
+pages = LRUCache('pages', CATALOG_CACHE_MAX_PAGES, CATALOG_CACHE_TTL)
+sellers = LRUCache('sellers', SELLER_CACHE_MAX_ENTRIES, SELLER_CACHE_TTL)
+
+# Flagged users: email -> {flag_type, reason, expires_at}, valid until _flagged_valid_until
+_flagged_users = {}
+_flagged_valid_until = 0.0
+_flagged_lock = threading.Lock()
+_flagged_stats = {'hits': 0, 'rebuilds': 0}
+
+# Bumped on every invalidation; part of the HTTP version stamps (http_cache)
+_generation = 0
+# email -> bumped on every invalidate_seller(), for the product page stamp
+_seller_generations = {}
+
+
+def get_product(product_key, loader):
+    """
+    Decoded product record, from cache or loader(). Records are cached under
+    their own product_key (what invalidate_product() is called with), so a
+    lookup through a differently-cased alias always goes to the loader.
+    """
+    if not CATALOG_CACHE_ENABLED:
+        return loader()
+    product = products.get(product_key)
+    if product is None:
+        product = loader()
+        if product is not None:
+            products.set(product['product_key'], product)
+    return product
+
+
+def get_listing(key, loader):
+    """Ranked listing (tuple key, e.g. ('feed', cursor)), from cache or loader()"""
+    if not CATALOG_CACHE_ENABLED:
+        return loader()
+    return listings.get_or_load(key, loader)
+
+
+def get_sellers(emails, loader):
+    """
+    {email: seller summary} for emails, from cache or one loader(missing
+    emails) call that returns {email: summary} for those it found. Emails
+    that aren't users are left out.
+    """
+    if not CATALOG_CACHE_ENABLED:
+        return loader(list(emails)) if emails else {}
+    found = {}
+    missing = []
+    for email in emails:
+        summary = sellers.get(email)
+        if summary is None:
+            missing.append(email)
+        else:
+            found[email] = summary
+    if missing:
+        loaded = loader(missing)
+        for email, summary in loaded.items():
+            sellers.set(email, summary)
+        found.update(loaded)
+    return found
+
+
+def get_seller(email, loader):
+    """One seller summary (see get_sellers), or None"""
+    return get_sellers([email], loader).get(email)
+
+
+def get_flagged_users(loader):
+    """
+    {email: flag} for every user with an active, unexpired flag. loader()
+    returns (flags, seconds until the soonest expires_at or None); the set is
+    kept until then, or FLAGGED_USERS_TTL, whichever comes first. Only one
+    caller rebuilds at a time. Cached listings are dropped when the set changes.
+    """
+    global _flagged_users, _flagged_valid_until
+    if not CATALOG_CACHE_ENABLED:
+        return loader()[0]
+    if time.monotonic() < _flagged_valid_until:
+        _flagged_stats['hits'] += 1
+        return _flagged_users
+    with _flagged_lock:
+        if time.monotonic() < _flagged_valid_until:
+            _flagged_stats['hits'] += 1
+            return _flagged_users
+        flags, expires_in = loader()
+        ttl = FLAGGED_USERS_TTL if expires_in is None else max(0.0, min(FLAGGED_USERS_TTL, expires_in))
+        if flags.keys() != _flagged_users.keys():
+            _clear_listings()
+        _flagged_users = flags
+        _flagged_valid_until = time.monotonic() + ttl
+        _flagged_stats['rebuilds'] += 1
+        return flags
+
+
+def get_page(key, render):
+    """
+    Rendered HTML for key (route, category, query, page, ...), from cache or
+    render(). render() returns (html, cacheable); error pages are not kept.
+    """
+    if not CATALOG_CACHE_ENABLED:
+        return render()[0]
+    html = pages.get(key)
+    if html is None:
+        html, cacheable = render()
+        if cacheable:
+            pages.set(key, html)
+    return html
+
+
+def _clear_listings():
+    # Rendered pages are built from listings, so they go together
+    global _generation
+    _generation += 1
+    listings.clear()
+    pages.clear()
+
+
+def version():
+    """Counter that moves whenever a product, listing or the flagged set is invalidated"""
+    return _generation
+
+
+def seller_version(email):
+    """Counter that moves whenever email's seller summary is invalidated"""
+    return _seller_generations.get(email, 0)
+
+
+def _evict_seller(email):
+    sellers.invalidate(email)
+    _seller_generations[email] = _seller_generations.get(email, 0) + 1
+
+
+def _mark_dirty(key, attribute='_catalog_dirty'):
+    # Evict again at the end of the request, after the write has committed
+    if has_request_context():
+        if not hasattr(g, attribute):
+            setattr(g, attribute, set())
+        getattr(g, attribute).add(key)
+
+
+def invalidate_product(product_key):
+    """Call after changing a product row: drops it and every cached listing"""
+    products.invalidate(product_key)
+    _clear_listings()
+    _mark_dirty(product_key)
+
+
+def invalidate_listings():
+    """Call after a change that affects which products are listed (e.g. a seller flag)"""
+    _clear_listings()
+    _mark_dirty(None)
+
+
+def invalidate_seller(email):
+    """Call after changing a seller's store details, ratings or verification"""
+    _evict_seller(email)
+    _mark_dirty(email, '_sellers_dirty')
+
+
+def invalidate_flagged_users():
+    """Call after flagging or unflagging a user: the set is rebuilt on next use"""
+    global _flagged_valid_until
+    _flagged_valid_until = 0.0
+    _clear_listings()
+    _mark_dirty(None)
+
+
+def finish_request(exception=None):
+    """Teardown hook: repeat this request's invalidations now that its writes are committed"""
+    global _flagged_valid_until
+    for email in g.pop('_sellers_dirty', ()):
+        _evict_seller(email)
+    dirty = g.pop('_catalog_dirty', None)
+    if dirty:
+        if None in dirty:
+            _flagged_valid_until = 0.0
+        for product_key in dirty:
+            if product_key is not None:
+                products.invalidate(product_key)
+        _clear_listings()
+
+
+def init_catalog_cache(app):
+    """
+    Register the end-of-request invalidation hook on the Flask app. Call it
+    before init_request_db(): app-context teardowns run in reverse order, so
+    this one then runs after the request's transaction has been committed.
+    """
+    app.teardown_appcontext(finish_request)
+
+
+def get_stats():
+    """Sizes and hit/miss counters for /admin/api/catalog_cache_stats"""
+    return {
+        'enabled': CATALOG_CACHE_ENABLED,
+        'products': products.stats(),
+        'listings': listings.stats(),
+        'pages': pages.stats(),
+        'sellers': sellers.stats(),
+        'flagged_users': {
+            'entries': len(_flagged_users),
+            'ttl_seconds': FLAGGED_USERS_TTL,
+            'valid_for_seconds': round(max(0.0, _flagged_valid_until - time.monotonic()), 1),
+            'hits': _flagged_stats['hits'],
+            'rebuilds': _flagged_stats['rebuilds'],
+        },
+    }
+
+
+def clear():
+    """Drop everything (tests, manual SQL changes)"""
+    global _flagged_valid_until
+    _flagged_valid_until = 0.0
+    products.clear()
+    sellers.clear()
+    _seller_generations.clear()
+    _clear_listings()
@@ -5,6 +5,8 @@ import json
 import logging
 from contextlib import contextmanager
 from datetime import datetime
+from product_model import fetch_products, fetch_product
+from search_settings import SEARCH_PAGE_SIZE, SEARCH_PRICE_BUCKETS
 
 # Check if we should use PostgreSQL or SQLite
 USE_POSTGRESQL = os.getenv('DATABASE_URL') or os.getenv('USE_POSTGRESQL', 'false').lower() == 'true'
@@ -186,14 +188,7 @@ if not USE_POSTGRESQL:
                 cursor = conn.cursor()
                 # Your schema doesn't have is_active, so we get all products
                 cursor.execute('SELECT * FROM products ORDER BY posted_date DESC')
-                products = []
-                for row in cursor.fetchall():
-                    product = dict(row)
-                    # Parse JSON fields
-                    product['image_urls'] = json.loads(product['image_urls']) if product['image_urls'] else []
-                    product['sizes'] = json.loads(product['sizes']) if product['sizes'] else {}
-                    products.append(product)
-                return products
+                return fetch_products(cursor)
         except Exception as e:
             logging.error(f"Error getting products: {e}")
             return []
@@ -204,13 +199,7 @@ if not USE_POSTGRESQL:
             with get_db() as conn:
                 cursor = conn.cursor()
                 cursor.execute('SELECT * FROM products WHERE product_key = ?', (product_key,))
-                row = cursor.fetchone()
-                if row:
-                    product = dict(row)
-                    product['image_urls'] = json.loads(product['image_urls']) if product['image_urls'] else []
-                    product['sizes'] = json.loads(product['sizes']) if product['sizes'] else {}
-                    return product
-                return None
+                return fetch_product(cursor)
         except Exception as e:
             logging.error(f"Error getting product: {e}")
             return None
@@ -221,47 +210,53 @@ if not USE_POSTGRESQL:
             with get_db() as conn:
                 cursor = conn.cursor()
                 cursor.execute('SELECT * FROM products WHERE seller_email = ? ORDER BY posted_date DESC', (seller_email,))
-                products = []
-                for row in cursor.fetchall():
-                    product = dict(row)
-                    product['image_urls'] = json.loads(product['image_urls']) if product['image_urls'] else []
-                    product['sizes'] = json.loads(product['sizes']) if product['sizes'] else {}
-                    products.append(product)
-                return products
+                return fetch_products(cursor)
         except Exception as e:
             logging.error(f"Error getting seller products: {e}")
             return []
 
-    def search_products(query, category=None):
-        """Search products by name, description, or category"""
+    def search_products(query, category=None, excluded_seller_emails=None, page=1, limit=SEARCH_PAGE_SIZE,
+                        filters=None, with_facets=False):
+        """
+        Search products by name or description, narrowed by facet filters;
+        returns (products for this page, has next page, None - no facet counts on SQLite)
+        """
+        filters = filters or {}
         try:
             with get_db() as conn:
                 cursor = conn.cursor()
-
+                excluded = list(excluded_seller_emails or [])
+                sql = 'SELECT * FROM products WHERE (name LIKE ? OR description LIKE ?)'
+                params = [f'%{query}%', f'%{query}%']
                 if category:
-                    cursor.execute('''
-                        SELECT * FROM products
-                        WHERE (name LIKE ? OR description LIKE ?)
-                        AND category = ?
-                        ORDER BY clicks DESC, likes DESC
-                    ''', (f'%{query}%', f'%{query}%', category))
-                else:
-                    cursor.execute('''
-                        SELECT * FROM products
-                        WHERE (name LIKE ? OR description LIKE ?)
-                        ORDER BY clicks DESC, likes DESC
-                    ''', (f'%{query}%', f'%{query}%'))
-
-                products = []
-                for row in cursor.fetchall():
-                    product = dict(row)
-                    product['image_urls'] = json.loads(product['image_urls']) if product['image_urls'] else []
-                    product['sizes'] = json.loads(product['sizes']) if product['sizes'] else {}
-                    products.append(product)
-                return products
+                    sql += ' AND category = ?'
+                    params.append(category)
+                if filters.get('price') is not None:
+                    sql += ' AND price >= ?'
+                    params.append(SEARCH_PRICE_BUCKETS[filters['price']])
+                    if filters['price'] + 1 < len(SEARCH_PRICE_BUCKETS):
+                        sql += ' AND price < ?'
+                        params.append(SEARCH_PRICE_BUCKETS[filters['price'] + 1])
+                if filters.get('parish'):
+                    sql += ' AND shipping = ?'
+                    params.append(filters['parish'])
+                if filters.get('cod'):
+                    sql += ' AND cod_available = 1'
+                if filters.get('shipping_method'):
+                    sql += ' AND shipping_method = ?'
+                    params.append(filters['shipping_method'])
+                if excluded:
+                    sql += f" AND seller_email NOT IN ({','.join('?' * len(excluded))})"
+                    params.extend(excluded)
+                sql += ' ORDER BY clicks DESC, likes DESC LIMIT ? OFFSET ?'
+                params.extend([limit + 1, (max(page, 1) - 1) * limit])
+                cursor.execute(sql, params)
+
+                products = fetch_products(cursor)
+                return products[:limit], len(products) > limit, None
         except Exception as e:
             logging.error(f"Error searching products: {e}")
-            return []
+            return [], False, None
 
     def update_product_stats(product_key, field, increment=1):
         """Update product statistics (clicks, likes, etc.)"""
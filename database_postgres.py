@@ -1,13 +1,24 @@
 # database_postgres.py - PostgreSQL database manager for ZoZi Marketplace
 import os
+import re
 import json
+import base64
+import hashlib
+import time
+import atexit
 import logging
+import threading
 import psycopg2
 import psycopg2.extras
+import psycopg2.extensions
+from collections import deque
 from contextlib import contextmanager
 from datetime import datetime
 from urllib.parse import urlparse
+from flask import g, request, has_request_context
 from werkzeug.security import generate_password_hash, check_password_hash
+from product_model import fetch_products, fetch_product
+from search_settings import SEARCH_PAGE_SIZE, SEARCH_PRICE_BUCKETS
 
 # Set up logging
 logging.basicConfig(level=logging.INFO)
@@ -31,47 +42,637 @@ def parse_database_url(database_url):
     }
 
 
-@contextmanager
-def get_db():
+# =============================================================================
+# CONNECTION POOL
+# =============================================================================
+# Opening a PostgreSQL connection costs a full TCP + TLS + auth handshake, so
+# connections are kept in a pool and reused across requests. The pool only uses
+# threading primitives, which the gunicorn eventlet worker monkey-patches into
+# green ones - a request waiting for a free connection yields to other requests.
+
+POOL_MIN_SIZE = int(os.getenv('DB_POOL_MIN_SIZE', '1'))
+POOL_MAX_SIZE = int(os.getenv('DB_POOL_MAX_SIZE', '10'))
+POOL_TIMEOUT = float(os.getenv('DB_POOL_TIMEOUT', '30'))            # seconds to wait for a free connection
+POOL_MAX_IDLE = float(os.getenv('DB_POOL_MAX_IDLE', '300'))         # close connections idle longer than this
+POOL_MAX_LIFETIME = float(os.getenv('DB_POOL_MAX_LIFETIME', '1800'))  # recycle connections older than this
+POOL_CHECK_AFTER = float(os.getenv('DB_POOL_CHECK_AFTER', '30'))     # ping connections idle longer than this
+
+
+class PoolTimeout(Exception):
+    """Raised when no pooled connection became free within POOL_TIMEOUT"""
+
+
+class PooledConnection(psycopg2.extensions.connection):
     """
-    PostgreSQL context manager for database connections
-    Usage:
-        with get_db() as conn:
+    psycopg2 connection that remembers its age and, when checked out through
+    get_db_connection(), goes back to the pool on close() instead of closing.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.created_at = time.monotonic()
+        self.last_used = self.created_at
+        self.pool = None
+        self.tx_generation = 0  # bumped on every commit/rollback, so savepoints know if they still exist
+
+    def commit(self):
+        self.tx_generation += 1
+        super().commit()
+
+    def rollback(self):
+        self.tx_generation += 1
+        super().rollback()
+
+    def cursor(self, *args, **kwargs):
+        # Time every statement for the per-request query stats
+        factory = kwargs.get('cursor_factory') or self.cursor_factory or psycopg2.extensions.cursor
+        kwargs['cursor_factory'] = _instrumented_cursor_class(factory)
+        return super().cursor(*args, **kwargs)
+
+    def close(self):
+        pool, self.pool = self.pool, None
+        if pool is not None:
+            pool.putconn(self)
+        else:
+            super().close()
+
+
+class ConnectionPool:
+    """Bounded pool of PostgreSQL connections with health checks and recycling"""
+
+    def __init__(self, dsn, min_size=POOL_MIN_SIZE, max_size=POOL_MAX_SIZE, timeout=POOL_TIMEOUT,
+                 max_idle=POOL_MAX_IDLE, max_lifetime=POOL_MAX_LIFETIME, check_after=POOL_CHECK_AFTER):
+        self.dsn = dsn
+        self.min_size = min_size
+        self.max_size = max(max_size, 1)
+        self.timeout = timeout
+        self.max_idle = max_idle
+        self.max_lifetime = max_lifetime
+        self.check_after = check_after
+
+        self._cond = threading.Condition()
+        self._idle = deque()  # most recently returned connection on the right
+        self._size = 0        # open connections, idle + in use (+ being opened)
+        self._closed = False
+
+        self._stats = {
+            'checkouts': 0,
+            'timeouts': 0,
+            'connections_opened': 0,
+            'connections_closed': 0,
+            'health_check_failures': 0,
+            'wait_time_total': 0.0,
+            'wait_time_max': 0.0,
+        }
+        self._in_use = 0
+        self._waiting = 0
+
+    def _connect(self):
+        conn = psycopg2.connect(self.dsn, sslmode='require', connection_factory=PooledConnection)
+        conn.autocommit = False
+        with self._cond:
+            self._stats['connections_opened'] += 1
+        return conn
+
+    def _discard(self, conn):
+        """Really close a connection and free its slot in the pool"""
+        try:
+            conn.pool = None
+            if not conn.closed:
+                conn.close()
+        except Exception as e:
+            logger.warning(f"Error closing pooled connection: {e}")
+        with self._cond:
+            self._size -= 1
+            self._stats['connections_closed'] += 1
+            self._cond.notify()
+
+    def _is_expired(self, conn, now):
+        return self.max_lifetime and now - conn.created_at > self.max_lifetime
+
+    def _is_healthy(self, conn, now):
+        """Cheap checks always, a round-trip ping only for connections idle a while"""
+        if conn.closed:
+            return False
+        if now - conn.last_used < self.check_after:
+            return True
+        try:
             cursor = conn.cursor()
-            # do database operations
+            cursor.execute('SELECT 1')
+            cursor.close()
+            conn.rollback()
+            return True
+        except Exception:
+            return False
+
+    def _reap_idle_locked(self, now):
+        """Pull connections idle past max_idle out of the pool (caller holds the lock)"""
+        reaped = []
+        # Oldest idle connections sit on the left
+        while self._idle and self._size - len(reaped) > self.min_size:
+            conn = self._idle[0]
+            if now - conn.last_used <= self.max_idle:
+                break
+            reaped.append(self._idle.popleft())
+        return reaped
+
+    def getconn(self):
+        """Check out a connection, waiting up to self.timeout for one to become free"""
+        start = time.monotonic()
+        deadline = start + self.timeout
+        while True:
+            conn = None
+            with self._cond:
+                if self._closed:
+                    raise PoolTimeout("Connection pool is closed")
+                self._waiting += 1
+                try:
+                    while True:
+                        now = time.monotonic()
+                        reaped = self._reap_idle_locked(now)
+                        if reaped:
+                            break
+                        if self._idle:
+                            conn = self._idle.pop()
+                            break
+                        if self._size < self.max_size:
+                            self._size += 1
+                            break
+                        remaining = deadline - now
+                        if remaining <= 0:
+                            self._stats['timeouts'] += 1
+                            raise PoolTimeout(
+                                f"No database connection free after {self.timeout:g}s "
+                                f"({self._size} open, {self._waiting} waiting)")
+                        self._cond.wait(remaining)
+                finally:
+                    self._waiting -= 1
+
+            if reaped:
+                # Close outside the lock, then go round again
+                for old_conn in reaped:
+                    self._discard(old_conn)
+                continue
+
+            now = time.monotonic()
+            if conn is None:
+                try:
+                    conn = self._connect()
+                except Exception:
+                    with self._cond:
+                        self._size -= 1
+                        self._cond.notify()
+                    raise
+            elif self._is_expired(conn, now):
+                self._discard(conn)
+                continue
+            elif not self._is_healthy(conn, now):
+                with self._cond:
+                    self._stats['health_check_failures'] += 1
+                self._discard(conn)
+                continue
+
+            waited = time.monotonic() - start
+            with self._cond:
+                self._in_use += 1
+                self._stats['checkouts'] += 1
+                self._stats['wait_time_total'] += waited
+                self._stats['wait_time_max'] = max(self._stats['wait_time_max'], waited)
+            return conn
+
+    def putconn(self, conn, discard=False):
+        """Return a connection to the pool, rolling back anything left open"""
+        with self._cond:
+            self._in_use -= 1
+
+        if not discard and not conn.closed:
+            try:
+                if conn.get_transaction_status() != psycopg2.extensions.TRANSACTION_STATUS_IDLE:
+                    conn.rollback()
+                conn.autocommit = False
+            except Exception:
+                discard = True
+
+        now = time.monotonic()
+        if discard or conn.closed or self._closed or self._is_expired(conn, now):
+            self._discard(conn)
+            return
+
+        conn.pool = None
+        conn.last_used = now
+        with self._cond:
+            self._idle.append(conn)
+            self._cond.notify()
+
+    def prefill(self):
+        """Open connections up to min_size so the first requests don't pay the handshake"""
+        while True:
+            with self._cond:
+                if self._size >= self.min_size:
+                    return
+                self._size += 1
+            try:
+                conn = self._connect()
+            except Exception:
+                with self._cond:
+                    self._size -= 1
+                raise
+            with self._cond:
+                self._idle.append(conn)
+                self._cond.notify()
+
+    def close(self):
+        """Close every idle connection; in-use ones are closed as they come back"""
+        with self._cond:
+            self._closed = True
+            idle, self._idle = list(self._idle), deque()
+        for conn in idle:
+            self._discard(conn)
+
+    def stats(self):
+        """Snapshot of pool usage for monitoring"""
+        with self._cond:
+            stats = dict(self._stats)
+            stats.update({
+                'min_size': self.min_size,
+                'max_size': self.max_size,
+                'size': self._size,
+                'idle': len(self._idle),
+                'in_use': self._in_use,
+                'waiting': self._waiting,
+            })
+        checkouts = stats['checkouts']
+        stats['wait_time_avg'] = stats['wait_time_total'] / checkouts if checkouts else 0.0
+        return stats
+
+
+# =============================================================================
+# QUERY INSTRUMENTATION
+# =============================================================================
+# Every cursor handed out by a pooled connection times its statements. Within a
+# Flask request the numbers are collected on flask.g; at teardown they are
+# folded into per-route aggregates and repeated statements are reported as
+# likely N+1 loops.
+
+N_PLUS_ONE_THRESHOLD = int(os.getenv('DB_N_PLUS_ONE_THRESHOLD', '10'))
+
+_SQL_LITERALS = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+_statement_templates = {}   # raw SQL -> normalised template
+_instrumented_cursors = {}  # cursor class -> instrumented subclass
+_route_stats = {}
+_route_stats_lock = threading.Lock()
+
+
+def _statement_template(query):
+    """Collapse whitespace and inline literals so repeats of one statement group together"""
+    template = _statement_templates.get(query)
+    if template is None:
+        text = query if isinstance(query, str) else str(query)
+        template = _SQL_LITERALS.sub('?', ' '.join(text.split()))
+        if len(_statement_templates) > 5000:
+            _statement_templates.clear()
+        _statement_templates[query] = template
+    return template
+
+
+def _record_query(query, duration):
+    if not has_request_context():
+        return
+    stats = g.get('_query_stats')
+    if stats is None:
+        stats = g._query_stats = {'count': 0, 'time': 0.0, 'slowest_time': 0.0,
+                                  'slowest': None, 'templates': {}}
+    template = _statement_template(query)
+    stats['count'] += 1
+    stats['time'] += duration
+    stats['templates'][template] = stats['templates'].get(template, 0) + 1
+    if duration > stats['slowest_time']:
+        stats['slowest_time'] = duration
+        stats['slowest'] = template
+
+
+class _InstrumentedCursorMixin:
+    def execute(self, query, vars=None):
+        start = time.perf_counter()
+        try:
+            return super().execute(query, vars)
+        finally:
+            _record_query(query, time.perf_counter() - start)
+
+    def executemany(self, query, vars_list):
+        start = time.perf_counter()
+        try:
+            return super().executemany(query, vars_list)
+        finally:
+            _record_query(query, time.perf_counter() - start)
+
+
+def _instrumented_cursor_class(factory):
+    cls = _instrumented_cursors.get(factory)
+    if cls is None:
+        cls = type(f'Instrumented{factory.__name__}', (_InstrumentedCursorMixin, factory), {})
+        _instrumented_cursors[factory] = cls
+    return cls
+
+
+def finish_request_query_stats(exception=None):
+    """Warn about repeated statements and fold this request's numbers into the route aggregates"""
+    stats = g.pop('_query_stats', None)
+    if stats is None:
+        return
+    route = request.url_rule.rule if request.url_rule else '<unmatched>'
+
+    repeated = {t: n for t, n in stats['templates'].items() if n > N_PLUS_ONE_THRESHOLD}
+    for template, count in repeated.items():
+        logger.warning(f"⚠ Possible N+1 in {request.method} {route}: statement ran {count}x "
+                       f"in one request: {template[:200]}")
+
+    with _route_stats_lock:
+        agg = _route_stats.get(route)
+        if agg is None:
+            agg = _route_stats[route] = {
+                'route': route, 'requests': 0, 'queries': 0, 'max_queries': 0,
+                'db_time': 0.0, 'slowest_time': 0.0, 'slowest_statement': None,
+                'n_plus_one_requests': 0, 'repeated_statements': {},
+            }
+        agg['requests'] += 1
+        agg['queries'] += stats['count']
+        agg['max_queries'] = max(agg['max_queries'], stats['count'])
+        agg['db_time'] += stats['time']
+        if stats['slowest_time'] > agg['slowest_time']:
+            agg['slowest_time'] = stats['slowest_time']
+            agg['slowest_statement'] = stats['slowest']
+        if repeated:
+            agg['n_plus_one_requests'] += 1
+            for template, count in repeated.items():
+                agg['repeated_statements'][template] = max(agg['repeated_statements'].get(template, 0), count)
+
+
+def get_query_stats():
+    """Per-route query aggregates, busiest (by total DB time) first"""
+    with _route_stats_lock:
+        rows = [dict(agg, repeated_statements=dict(agg['repeated_statements'])) for agg in _route_stats.values()]
+    result = []
+    for agg in rows:
+        requests = agg['requests']
+        repeated = sorted(agg['repeated_statements'].items(), key=lambda item: item[1], reverse=True)[:5]
+        result.append({
+            'route': agg['route'],
+            'requests': requests,
+            'queries': agg['queries'],
+            'avg_queries': round(agg['queries'] / requests, 1) if requests else 0,
+            'max_queries': agg['max_queries'],
+            'db_time_ms': round(agg['db_time'] * 1000, 1),
+            'avg_db_time_ms': round(agg['db_time'] * 1000 / requests, 2) if requests else 0,
+            'slowest_ms': round(agg['slowest_time'] * 1000, 2),
+            'slowest_statement': agg['slowest_statement'],
+            'n_plus_one_requests': agg['n_plus_one_requests'],
+            'repeated_statements': [{'statement': t, 'max_per_request': n} for t, n in repeated],
+        })
+    result.sort(key=lambda r: r['db_time_ms'], reverse=True)
+    return result
+
+
+def reset_query_stats():
+    """Forget all per-route aggregates"""
+    with _route_stats_lock:
+        _route_stats.clear()
+
+
+# =============================================================================
+# GREEN (EVENTLET) I/O
+# =============================================================================
+# psycopg2 is a C driver: a plain query blocks the whole eventlet hub until the
+# server answers, freezing every other request and Socket.IO connection. With a
+# wait callback installed psycopg2 runs connections in non-blocking mode and
+# hands control back here whenever it would block, so we can yield to the hub.
+
+def eventlet_wait_callback(conn, timeout=-1):
+    """psycopg2 wait callback that parks the current greenlet until the socket is ready"""
+    from eventlet.hubs import trampoline
+    while True:
+        state = conn.poll()
+        if state == psycopg2.extensions.POLL_OK:
+            break
+        elif state == psycopg2.extensions.POLL_READ:
+            trampoline(conn.fileno(), read=True)
+        elif state == psycopg2.extensions.POLL_WRITE:
+            trampoline(conn.fileno(), write=True)
+        else:
+            raise psycopg2.OperationalError(f"Bad result from poll: {state!r}")
+
+
+def enable_green_io(force=False):
+    """
+    Make database I/O cooperative when running under eventlet.
+    Only switches on when eventlet has monkey-patched the socket module (as the
+    gunicorn eventlet worker does), unless force=True. Returns True if enabled.
     """
-    conn = None
     try:
-        database_url = get_database_url()
+        import eventlet.patcher
+    except ImportError:
+        return False
+    if not force and not eventlet.patcher.is_monkey_patched('socket'):
+        return False
+    psycopg2.extensions.set_wait_callback(eventlet_wait_callback)
+    logger.info("✅ Green database I/O enabled (eventlet wait callback)")
+    return True
+
+
+def disable_green_io():
+    """Go back to blocking database I/O"""
+    psycopg2.extensions.set_wait_callback(None)
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_dsn():
+    """Database URL normalised for psycopg2 (handles both postgres:// and postgresql://)"""
+    database_url = get_database_url()
+    if database_url.startswith('postgres://'):
+        database_url = database_url.replace('postgres://', 'postgresql://', 1)
+    return database_url
+
+
+def get_pool():
+    """Get the process-wide connection pool, creating it on first use"""
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                pool = ConnectionPool(get_dsn())
+                try:
+                    pool.prefill()
+                except Exception as e:
+                    logger.error(f"Could not pre-open database connections: {e}")
+                _pool = pool
+                logger.info(f"✅ Database pool ready (min={pool.min_size}, max={pool.max_size})")
+    return _pool
 
-        # Handle both postgres:// and postgresql:// URLs
-        if database_url.startswith('postgres://'):
-            database_url = database_url.replace('postgres://', 'postgresql://', 1)
 
-        conn = psycopg2.connect(database_url, sslmode='require')
+def close_pool():
+    """Close the connection pool (called at interpreter exit)"""
+    global _pool
+    with _pool_lock:
+        pool, _pool = _pool, None
+    if pool is not None:
+        pool.close()
+
+
+atexit.register(close_pool)
+
+
+def get_pool_stats():
+    """Connection pool statistics (in use, waiting, wait time...) for monitoring"""
+    if _pool is None:
+        return {'size': 0, 'idle': 0, 'in_use': 0, 'waiting': 0, 'checkouts': 0}
+    return _pool.stats()
+
+
+@contextmanager
+def _pooled_transaction():
+    """Own pooled connection for one transaction: commit on success, rollback on error"""
+    conn = None
+    discard = False
+    pool = get_pool()
+    try:
+        conn = pool.getconn()
         conn.autocommit = False
         yield conn
         conn.commit()
     except Exception as e:
-        if conn:
-            conn.rollback()
+        if conn and not conn.closed:
+            try:
+                conn.rollback()
+            except Exception:
+                discard = True
         logger.error(f"Database error: {e}")
         raise
     finally:
         if conn:
-            conn.close()
+            pool.putconn(conn, discard=discard)
+
+
+def _get_request_conn():
+    """The connection checked out for the current Flask request, checking one out on first use"""
+    conn = g.get('_db_conn')
+    if conn is not None and conn.closed:
+        get_pool().putconn(conn, discard=True)
+        conn = None
+    if conn is None:
+        conn = get_pool().getconn()
+        conn.autocommit = False
+        g._db_conn = conn
+        g._db_depth = 0
+    return conn
+
+
+@contextmanager
+def _request_transaction():
+    """
+    Share the request's connection. The outermost block commits on exit like a
+    standalone get_db() block; nested blocks (helpers called from inside a route's
+    block) run inside a SAVEPOINT so their failure doesn't abort the route's work.
+    """
+    conn = _get_request_conn()
+    status = conn.get_transaction_status()
+
+    if status == psycopg2.extensions.TRANSACTION_STATUS_INERROR:
+        # The caller swallowed an error and the shared transaction is dead -
+        # give this block its own connection rather than fail every statement
+        with _pooled_transaction() as own_conn:
+            yield own_conn
+        return
+
+    depth = g._db_depth
+    g._db_depth = depth + 1
+    # Nothing uncommitted to protect -> behave like a standalone block
+    use_savepoint = depth > 0 and status != psycopg2.extensions.TRANSACTION_STATUS_IDLE
+    savepoint = f'zozi_sp_{depth}'
+    generation = conn.tx_generation
+    try:
+        if use_savepoint:
+            conn.cursor().execute(f'SAVEPOINT {savepoint}')
+        yield conn
+        if not use_savepoint:
+            conn.commit()
+        elif conn.tx_generation == generation:
+            conn.cursor().execute(f'RELEASE SAVEPOINT {savepoint}')
+        # else the block committed itself, which already released the savepoint
+    except Exception as e:
+        if not conn.closed:
+            try:
+                if use_savepoint and conn.tx_generation == generation:
+                    conn.cursor().execute(f'ROLLBACK TO SAVEPOINT {savepoint}')
+                else:
+                    conn.rollback()
+            except Exception:
+                try:
+                    conn.rollback()
+                except Exception:
+                    pass  # teardown discards the broken connection
+        logger.error(f"Database error: {e}")
+        raise
+    finally:
+        g._db_depth = depth
+
+
+@contextmanager
+def get_db(independent=False):
+    """
+    PostgreSQL context manager for database connections
+    Connections come from the shared pool and go back to it on exit. Inside a
+    Flask request every get_db() block shares one connection, returned to the
+    pool at teardown; pass independent=True for a separate transaction that
+    commits on its own.
+    Usage:
+        with get_db() as conn:
+            cursor = conn.cursor()
+            # do database operations
+    """
+    if independent or not has_request_context():
+        with _pooled_transaction() as conn:
+            yield conn
+    else:
+        with _request_transaction() as conn:
+            yield conn
+
+
+def teardown_request_db(exception=None):
+    """Commit (or roll back on error) and hand the request's connection back to the pool"""
+    conn = g.pop('_db_conn', None)
+    g.pop('_db_depth', None)
+    if conn is None:
+        return
+    discard = False
+    try:
+        if not conn.closed:
+            if exception is None:
+                conn.commit()
+            else:
+                conn.rollback()
+    except Exception as e:
+        logger.error(f"Error finishing request transaction: {e}")
+        discard = True
+    get_pool().putconn(conn, discard=discard)
+
+
+def init_request_db(app):
+    """Register the per-request query stats and connection teardown on the Flask app"""
+    app.teardown_request(finish_request_query_stats)
+    app.teardown_appcontext(teardown_request_db)
 
 
 def get_db_connection():
     """
     Alternative method - simple connection getter
-    Remember to close the connection when done!
+    Remember to close the connection when done! Closing hands it back to the pool.
     """
-    database_url = get_database_url()
-    if database_url.startswith('postgres://'):
-        database_url = database_url.replace('postgres://', 'postgresql://', 1)
-
-    conn = psycopg2.connect(database_url, sslmode='require')
+    pool = get_pool()
+    conn = pool.getconn()
+    conn.pool = pool
     return conn
 
 
@@ -79,34 +680,11 @@ def get_db_connection():
 # DATABASE MIGRATION SYSTEM
 # =============================================================================
 
-def run_migrations(cursor=None, conn=None):
+def _run_migrations_impl(cursor, conn):
     """
-    Run all database migrations to ensure schema is up to date.
-    This handles adding missing tables and columns to existing databases.
+    Legacy boot-time schema checks, kept as the body of migration 1 (baseline).
     Safe to run multiple times - uses IF NOT EXISTS and checks.
-
-    Args:
-        cursor: Optional cursor to use (if None, creates new connection)
-        conn: Optional connection (used with cursor)
     """
-    # If no cursor provided, create new connection
-    if cursor is None:
-        try:
-            with get_db() as new_conn:
-                new_cursor = new_conn.cursor()
-                logger.info("🔄 Running database migrations...")
-                return _run_migrations_impl(new_cursor, new_conn)
-        except Exception as e:
-            logger.error(f"❌ Migration error: {e}")
-            return False
-    else:
-        # Use provided cursor
-        logger.info("🔄 Running database migrations...")
-        return _run_migrations_impl(cursor, conn)
-
-
-def _run_migrations_impl(cursor, conn):
-    """Implementation of migrations using provided cursor and connection"""
     try:
         logger.info("  Starting migration 1: user_flags")
         # Migration 1: Ensure user_flags table exists
@@ -608,128 +1186,614 @@ def _run_migrations_impl(cursor, conn):
         return False
 
 
-def init_db():
-    """Initialize PostgreSQL database with all required tables"""
+def _create_core_tables(cursor):
+    """Create the core tables (users, products, orders, order_items, admin_users)"""
+    logger.info("Creating PostgreSQL tables for Zo-Zi Marketplace...")
+
+    # Users table - matching your SQLite structure
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS users (
+            id SERIAL PRIMARY KEY,
+            email VARCHAR(255) UNIQUE NOT NULL,
+            password VARCHAR(255) NOT NULL,
+            first_name VARCHAR(100) NOT NULL,
+            last_name VARCHAR(100) NOT NULL,
+            is_seller BOOLEAN DEFAULT FALSE,
+            is_support BOOLEAN DEFAULT FALSE,
+            phone_number VARCHAR(20),
+            address TEXT,
+            parish VARCHAR(50),
+            post_office VARCHAR(100),
+            profile_picture VARCHAR(255),
+            discount_used BOOLEAN DEFAULT FALSE,
+            notification_preference VARCHAR(10),
+            business_name VARCHAR(255),
+            business_address TEXT,
+            security_question TEXT,
+            security_answer TEXT,
+            discount_applied BOOLEAN DEFAULT FALSE,
+            gender VARCHAR(20),
+            delivery_address TEXT,
+            billing_address TEXT,
+            whatsapp_number VARCHAR(20),
+            business_description TEXT,
+            verification_status VARCHAR(50) DEFAULT 'pending_documents',
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            purchase_count INTEGER DEFAULT 0
+        )
+    ''')
+
+    # Products table
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS products (
+            id SERIAL PRIMARY KEY,
+            product_key VARCHAR(255) UNIQUE NOT NULL,
+            seller_email VARCHAR(255) NOT NULL,
+            name VARCHAR(255) NOT NULL,
+            description TEXT,
+            price DECIMAL(10,2) NOT NULL,
+            category VARCHAR(100),
+            sizes JSONB DEFAULT '{}',
+            image_urls JSONB DEFAULT '[]',
+            image_url VARCHAR(255),
+            posted_date TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            clicks INTEGER DEFAULT 0,
+            likes INTEGER DEFAULT 0,
+            sold INTEGER DEFAULT 0,
+            stock_quantity INTEGER DEFAULT 0,
+            is_active BOOLEAN DEFAULT TRUE
+        )
+    ''')
+
+    # Orders table - matching your SQLite structure
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS orders (
+            id SERIAL PRIMARY KEY,
+            order_id VARCHAR(255) UNIQUE NOT NULL,
+            user_email VARCHAR(255) NOT NULL,
+            full_name VARCHAR(255),
+            phone_number VARCHAR(20),
+            address TEXT,
+            parish VARCHAR(50),
+            post_office VARCHAR(100),
+            total DECIMAL(10,2) NOT NULL,
+            discount DECIMAL(10,2) DEFAULT 0,
+            payment_method VARCHAR(50),
+            order_date TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            status VARCHAR(50) DEFAULT 'pending',
+            shipping_option VARCHAR(100),
+            shipping_fee DECIMAL(10,2) DEFAULT 0,
+            tax DECIMAL(10,2) DEFAULT 0,
+            lynk_reference VARCHAR(255),
+            payment_verified BOOLEAN DEFAULT FALSE
+        )
+    ''')
+
+    # Order items table
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS order_items (
+            id SERIAL PRIMARY KEY,
+            order_id VARCHAR(255) NOT NULL,
+            product_key VARCHAR(255) NOT NULL,
+            quantity INTEGER NOT NULL,
+            price DECIMAL(10,2) NOT NULL,
+            size VARCHAR(50)
+        )
+    ''')
+
+    # Admin users table - matching your SQLite structure
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS admin_users (
+            id SERIAL PRIMARY KEY,
+            email VARCHAR(255) UNIQUE NOT NULL,
+            password VARCHAR(255) NOT NULL,
+            admin_level VARCHAR(50) DEFAULT 'admin',
+            created_by VARCHAR(255),
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            last_login TIMESTAMP,
+            is_active BOOLEAN DEFAULT TRUE,
+            permissions TEXT DEFAULT '{"users":true,"products":true,"orders":true,"analytics":true,"financials":true}'
+        )
+    ''')
+
+    logger.info("✅ PostgreSQL core tables created!")
+
+
+def _migration_001_baseline(cursor, conn):
+    """Everything init_db() used to (re)create on every boot"""
+    _create_core_tables(cursor)
+    if not _run_migrations_impl(cursor, conn):
+        raise RuntimeError("baseline schema checks failed")
+
+
+def _create_indexes(cursor, indexes):
+    """
+    CREATE INDEX IF NOT EXISTS for each (name, table, definition). Tables that
+    only exist on some deployments (conversations, sales_log...) are skipped
+    with a warning instead of failing the migration.
+    """
+    for idx_name, table, definition in indexes:
+        cursor.execute('SAVEPOINT create_index')
+        try:
+            cursor.execute(f'CREATE INDEX IF NOT EXISTS {idx_name} ON {table} {definition}')
+            cursor.execute('RELEASE SAVEPOINT create_index')
+            logger.info(f"  ✓ {idx_name}")
+        except (psycopg2.errors.UndefinedTable, psycopg2.errors.UndefinedColumn) as e:
+            cursor.execute('ROLLBACK TO SAVEPOINT create_index')
+            logger.warning(f"  ⚠ Skipped {idx_name}: {str(e).strip()}")
+
+
+# Indexes for the predicates the routes in app.py actually filter/sort on
+HOT_PATH_INDEXES = [
+    # orders(), receipt, agent order views, review verified-purchase check
+    ('idx_order_items_order', 'order_items', '(order_id)'),
+    ('idx_order_items_product', 'order_items', '(product_key)'),
+    ('idx_orders_user_date', 'orders', '(user_email, order_date DESC)'),
+    # start_chat / send_message lookups and the buyer/seller conversation lists
+    ('idx_conversations_buyer_seller', 'conversations', '(buyer_email, seller_email)'),
+    ('idx_conversations_seller_last', 'conversations', '(seller_email, last_message_at DESC)'),
+    # unread count + last message subqueries per conversation
+    ('idx_messages_conversation_time', 'messages', '(conversation_id, timestamp DESC)'),
+    # contact / customer service threads
+    ('idx_contact_messages_user_session', 'contact_messages', '(user_email, session_id, timestamp)'),
+    ('idx_contact_messages_session_time', 'contact_messages', '(session_id, timestamp)'),
+    # seller dashboard earnings and statistics
+    ('idx_sales_log_seller_date', 'sales_log', '(seller_email, sale_date)'),
+    # product page reviews (newest first)
+    ('idx_product_reviews_product_created', 'product_reviews', '(product_key, created_at DESC)'),
+    # seller notification list + unread badge
+    ('idx_seller_notifications_seller_read', 'seller_notifications', '(seller_email, is_read, created_at DESC)'),
+    # get_last_viewed_product / personalization
+    ('idx_user_product_views_user_time', 'user_product_views', '(user_email, viewed_at DESC)'),
+    # case-insensitive fallback in /product/<key>
+    ('idx_products_lower_key', 'products', '(LOWER(product_key))'),
+    # restore_cart_from_db / save_cart_to_db
+    ('idx_cart_log_user', 'cart_log', '(user_email)'),
+]
+
+
+def _migration_002_hot_path_indexes(cursor, conn):
+    """Composite/expression indexes for the hot queries in app.py"""
+    _create_indexes(cursor, HOT_PATH_INDEXES)
+    # Superseded by the composite indexes above (same leading column)
+    cursor.execute('DROP INDEX IF EXISTS idx_user_product_views_user')
+    cursor.execute('DROP INDEX IF EXISTS idx_messages_conversation')
+    for table in ('products', 'order_items', 'orders', 'product_reviews', 'user_product_views'):
+        cursor.execute(f'ANALYZE {table}')
+
+
+def _migration_003_feed_index(cursor, conn):
+    """Keyset index for the popularity-ordered homepage feed (get_product_feed)"""
+    _create_indexes(cursor, [
+        ('idx_products_feed_popularity', 'products', '((clicks + likes * 2), product_key)'),
+    ])
+
+
+def rebuild_rating_summary(cursor):
+    """
+    Recompute product_rating_summary from product_reviews. Used to backfill it
+    and to repair drift; blocks review writes until the transaction ends.
+    """
+    cursor.execute('LOCK TABLE product_reviews IN SHARE MODE')
+    cursor.execute('DELETE FROM product_rating_summary')
+    cursor.execute('''
+        INSERT INTO product_rating_summary (product_key, rating_sum, rating_count, avg_rating)
+        SELECT product_key, SUM(rating), COUNT(*), AVG(rating)
+        FROM product_reviews
+        GROUP BY product_key
+    ''')
+    return cursor.rowcount
+
+
+def _migration_004_product_rating_summary(cursor, conn):
+    """Per-product rating totals kept current by a trigger on product_reviews"""
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS product_rating_summary (
+            product_key VARCHAR(255) PRIMARY KEY,
+            rating_sum INTEGER NOT NULL DEFAULT 0,
+            rating_count INTEGER NOT NULL DEFAULT 0,
+            avg_rating NUMERIC(4,2),
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+    # Fires for plain inserts, the ON CONFLICT ... DO UPDATE path of
+    # submit_product_review, and deletes: remove OLD's rating, add NEW's
+    cursor.execute('''
+        CREATE OR REPLACE FUNCTION product_rating_summary_apply() RETURNS trigger AS $$
+        BEGIN
+            IF TG_OP IN ('UPDATE', 'DELETE') THEN
+                UPDATE product_rating_summary
+                SET rating_sum = rating_sum - OLD.rating,
+                    rating_count = rating_count - 1,
+                    avg_rating = CASE WHEN rating_count > 1
+                                      THEN (rating_sum - OLD.rating)::numeric / (rating_count - 1) END,
+                    updated_at = CURRENT_TIMESTAMP
+                WHERE product_key = OLD.product_key;
+            END IF;
+            IF TG_OP IN ('INSERT', 'UPDATE') THEN
+                INSERT INTO product_rating_summary (product_key, rating_sum, rating_count, avg_rating)
+                VALUES (NEW.product_key, NEW.rating, 1, NEW.rating)
+                ON CONFLICT (product_key) DO UPDATE
+                SET rating_sum = product_rating_summary.rating_sum + EXCLUDED.rating_sum,
+                    rating_count = product_rating_summary.rating_count + 1,
+                    avg_rating = (product_rating_summary.rating_sum + EXCLUDED.rating_sum)::numeric
+                                 / (product_rating_summary.rating_count + 1),
+                    updated_at = CURRENT_TIMESTAMP;
+            END IF;
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql
+    ''')
+    cursor.execute('DROP TRIGGER IF EXISTS trg_product_rating_summary ON product_reviews')
+    cursor.execute('''
+        CREATE TRIGGER trg_product_rating_summary
+        AFTER INSERT OR DELETE OR UPDATE OF rating, product_key ON product_reviews
+        FOR EACH ROW EXECUTE PROCEDURE product_rating_summary_apply()
+    ''')
+    count = rebuild_rating_summary(cursor)
+    logger.info(f"  ✓ Backfilled rating summary for {count} products")
+
+
+def _migration_005_popularity_score(cursor, conn):
+    """
+    Stored products.popularity_score (clicks + likes * 2 + sold * 3), kept
+    current by a trigger, so the feed reads its top-N straight off an index
+    """
+    cursor.execute('ALTER TABLE products ADD COLUMN IF NOT EXISTS popularity_score INTEGER NOT NULL DEFAULT 0')
+    cursor.execute('''
+        CREATE OR REPLACE FUNCTION products_popularity_apply() RETURNS trigger AS $$
+        BEGIN
+            NEW.popularity_score := COALESCE(NEW.clicks, 0) + COALESCE(NEW.likes, 0) * 2
+                                    + COALESCE(NEW.sold, 0) * 3;
+            RETURN NEW;
+        END;
+        $$ LANGUAGE plpgsql
+    ''')
+    cursor.execute('DROP TRIGGER IF EXISTS trg_products_popularity ON products')
+    cursor.execute('''
+        CREATE TRIGGER trg_products_popularity
+        BEFORE INSERT OR UPDATE OF clicks, likes, sold ON products
+        FOR EACH ROW EXECUTE PROCEDURE products_popularity_apply()
+    ''')
+    cursor.execute('''
+        UPDATE products
+        SET popularity_score = COALESCE(clicks, 0) + COALESCE(likes, 0) * 2 + COALESCE(sold, 0) * 3
+    ''')
+    logger.info(f"  ✓ Backfilled popularity_score for {cursor.rowcount} products")
+    _create_indexes(cursor, [
+        ('idx_products_popularity', 'products', '(popularity_score DESC, product_key DESC)'),
+    ])
+    # Replaced by the stored column's index
+    cursor.execute('DROP INDEX IF EXISTS idx_products_feed_popularity')
+    cursor.execute('ANALYZE products')
+
+
+def _migration_006_conditional_request_indexes(cursor, conn):
+    """Index behind the unread-message count in the /get_conversations version stamp"""
+    _create_indexes(cursor, [
+        ('idx_messages_receiver_unread', 'messages', '(receiver_email) WHERE read_status = false'),
+    ])
+
+
+def _migration_007_product_search(cursor, conn):
+    """
+    Full-text search over products: a brand column, a weighted search_vector
+    (name A, brand B, category C, description D) kept current by a trigger on
+    insert/edit, and a GIN index for search_products()
+    """
+    cursor.execute('ALTER TABLE products ADD COLUMN IF NOT EXISTS brand VARCHAR(255)')
+    cursor.execute('ALTER TABLE products ADD COLUMN IF NOT EXISTS search_vector tsvector')
+    cursor.execute('''
+        CREATE OR REPLACE FUNCTION products_search_document(name TEXT, brand TEXT, category TEXT, description TEXT)
+        RETURNS tsvector AS $$
+            SELECT setweight(to_tsvector('english', COALESCE(name, '')), 'A')
+                || setweight(to_tsvector('english', COALESCE(brand, '')), 'B')
+                || setweight(to_tsvector('english', COALESCE(category, '')), 'C')
+                || setweight(to_tsvector('english', COALESCE(description, '')), 'D')
+        $$ LANGUAGE sql IMMUTABLE
+    ''')
+    cursor.execute('''
+        CREATE OR REPLACE FUNCTION products_search_vector_apply() RETURNS trigger AS $$
+        BEGIN
+            NEW.search_vector := products_search_document(NEW.name, NEW.brand, NEW.category, NEW.description);
+            RETURN NEW;
+        END;
+        $$ LANGUAGE plpgsql
+    ''')
+    cursor.execute('DROP TRIGGER IF EXISTS trg_products_search_vector ON products')
+    cursor.execute('''
+        CREATE TRIGGER trg_products_search_vector
+        BEFORE INSERT OR UPDATE OF name, brand, category, description ON products
+        FOR EACH ROW EXECUTE PROCEDURE products_search_vector_apply()
+    ''')
+    cursor.execute('UPDATE products SET search_vector = products_search_document(name, brand, category, description)')
+    logger.info(f"  ✓ Indexed {cursor.rowcount} products for search")
+    _create_indexes(cursor, [
+        ('idx_products_search', 'products', 'USING GIN (search_vector)'),
+    ])
+    cursor.execute('ANALYZE products')
+
+
+def _migration_008_autocomplete_trigrams(cursor, conn):
+    """pg_trgm indexes behind the typo-tolerant /autocomplete (product names, seller business names)"""
+    cursor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    _create_indexes(cursor, [
+        ('idx_products_name_trgm', 'products', 'USING GIN (name gin_trgm_ops)'),
+        ('idx_users_seller_business_trgm', 'users', 'USING GIN (business_name gin_trgm_ops) WHERE is_seller = true'),
+    ])
+    cursor.execute('ANALYZE products')
+    cursor.execute('ANALYZE users')
+
+
+def _migration_009_search_facet_indexes(cursor, conn):
+    """Indexes for the /search facet filters, so narrowing a search reads fewer rows"""
+    _create_indexes(cursor, [
+        # Browsing a category without search terms, in result order
+        ('idx_products_category_popularity', 'products', '(category, popularity_score DESC, product_key DESC)'),
+        # Price buckets are filtered as ranges
+        ('idx_products_price', 'products', '(price)'),
+        # Seller parish (products.shipping is the parish a listing ships from)
+        ('idx_products_shipping_parish', 'products', '(shipping)'),
+        ('idx_products_shipping_method', 'products', '(shipping_method)'),
+        ('idx_products_cod_popularity', 'products',
+         '(popularity_score DESC, product_key DESC) WHERE cod_available = true'),
+    ])
+    cursor.execute('ANALYZE products')
+
+
+def _migration_010_search_query_log(cursor, conn):
+    """search_queries (raw /search and /autocomplete log) and its per-day, per-query rollup"""
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS search_queries (
+            id BIGSERIAL PRIMARY KEY,
+            query VARCHAR(200) NOT NULL,
+            kind VARCHAR(20) NOT NULL,
+            result_count INTEGER,
+            target VARCHAR(300),
+            created_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS search_query_daily (
+            day DATE NOT NULL,
+            query VARCHAR(200) NOT NULL,
+            searches INTEGER NOT NULL DEFAULT 0,
+            search_zero_results INTEGER NOT NULL DEFAULT 0,
+            search_clicks INTEGER NOT NULL DEFAULT 0,
+            autocompletes INTEGER NOT NULL DEFAULT 0,
+            autocomplete_zero_results INTEGER NOT NULL DEFAULT 0,
+            autocomplete_clicks INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (day, query)
+        )
+    ''')
+    _create_indexes(cursor, [
+        ('idx_search_queries_created', 'search_queries', '(created_at)'),
+        ('idx_search_queries_query', 'search_queries', '(query, created_at)'),
+    ])
+
+
+def _migration_011_related_products(cursor, conn):
+    """
+    product_related: each product's top related products by co-view and
+    co-purchase similarity, written by related_products.py, read by rank
+    through the primary key; product_related_state holds the event ids its
+    incremental mode resumes from
+    """
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS product_related (
+            product_key VARCHAR(255) NOT NULL,
+            rank SMALLINT NOT NULL,
+            related_key VARCHAR(255) NOT NULL,
+            score REAL NOT NULL,
+            PRIMARY KEY (product_key, rank)
+        )
+    ''')
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS product_related_state (
+            id BOOLEAN PRIMARY KEY DEFAULT true CHECK (id),
+            last_view_id BIGINT NOT NULL DEFAULT 0,
+            last_order_item_id BIGINT NOT NULL DEFAULT 0,
+            refreshed_at TIMESTAMP
+        )
+    ''')
+    # Who viewed a product, for the incremental refresh
+    _create_indexes(cursor, [
+        ('idx_user_product_views_product', 'user_product_views', '(product_key, user_email)'),
+    ])
+
+
+def _migration_012_review_pagination_indexes(cursor, conn):
+    """
+    Keyset pagination of a product's reviews: highest rated first (the
+    newest-first order is served by idx_product_reviews_product_created),
+    with id as the tie-breaker
+    """
+    _create_indexes(cursor, [
+        ('idx_product_reviews_product_rating', 'product_reviews', '(product_key, rating DESC, created_at DESC, id DESC)'),
+    ])
+
+
+def _migration_013_product_search_table(cursor, conn):
+    """
+    Move search_vector off products into product_search (one row per
+    product, kept current by a trigger on insert/edit), so SELECT * FROM
+    products - every listing, the product page, the catalog cache - no
+    longer carries a tsvector that only search_products() reads
+    """
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS product_search (
+            product_key VARCHAR(255) PRIMARY KEY
+                REFERENCES products(product_key) ON DELETE CASCADE ON UPDATE CASCADE,
+            search_vector tsvector NOT NULL
+        )
+    ''')
+    cursor.execute('''
+        CREATE OR REPLACE FUNCTION product_search_apply() RETURNS trigger AS $$
+        BEGIN
+            INSERT INTO product_search (product_key, search_vector)
+            VALUES (NEW.product_key, products_search_document(NEW.name, NEW.brand, NEW.category, NEW.description))
+            ON CONFLICT (product_key) DO UPDATE SET search_vector = EXCLUDED.search_vector;
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql
+    ''')
+    cursor.execute('DROP TRIGGER IF EXISTS trg_products_search_vector ON products')
+    cursor.execute('DROP FUNCTION IF EXISTS products_search_vector_apply()')
+    cursor.execute('DROP TRIGGER IF EXISTS trg_product_search ON products')
+    cursor.execute('''
+        CREATE TRIGGER trg_product_search
+        AFTER INSERT OR UPDATE OF name, brand, category, description ON products
+        FOR EACH ROW EXECUTE PROCEDURE product_search_apply()
+    ''')
+    cursor.execute('''
+        INSERT INTO product_search (product_key, search_vector)
+        SELECT product_key, products_search_document(name, brand, category, description) FROM products
+        ON CONFLICT (product_key) DO UPDATE SET search_vector = EXCLUDED.search_vector
+    ''')
+    logger.info(f"  ✓ Indexed {cursor.rowcount} products for search")
+    cursor.execute('DROP INDEX IF EXISTS idx_products_search')
+    cursor.execute('ALTER TABLE products DROP COLUMN IF EXISTS search_vector')
+    _create_indexes(cursor, [
+        ('idx_product_search_vector', 'product_search', 'USING GIN (search_vector)'),
+    ])
+    cursor.execute('ANALYZE product_search')
+
+
+
+def _migration_014_review_posted_at_indexes(cursor, conn):
+    """
+    Review pages sort by COALESCE(created_at, '-infinity') (REVIEW_POSTED_AT)
+    so undated reviews come last and can be paged past; index that
+    expression for both sorts and drop the rating index it replaces
+    """
+    _create_indexes(cursor, [
+        ('idx_product_reviews_product_posted', 'product_reviews',
+         "(product_key, COALESCE(created_at, '-infinity'::timestamp) DESC, id DESC)"),
+        ('idx_product_reviews_product_rating_posted', 'product_reviews',
+         "(product_key, rating DESC, COALESCE(created_at, '-infinity'::timestamp) DESC, id DESC)"),
+    ])
+    cursor.execute('DROP INDEX IF EXISTS idx_product_reviews_product_rating')
+
+# Numbered migrations, applied once each and recorded in schema_migrations.
+# Append new ones at the end with the next number - never renumber or edit
+# a migration that has already shipped.
+MIGRATIONS = [
+    (1, 'baseline schema', _migration_001_baseline),
+    (2, 'hot path indexes', _migration_002_hot_path_indexes),
+    (3, 'homepage feed index', _migration_003_feed_index),
+    (4, 'product rating summary', _migration_004_product_rating_summary),
+    (5, 'stored popularity score', _migration_005_popularity_score),
+    (6, 'conditional request indexes', _migration_006_conditional_request_indexes),
+    (7, 'product full-text search', _migration_007_product_search),
+    (8, 'autocomplete trigram indexes', _migration_008_autocomplete_trigrams),
+    (9, 'search facet indexes', _migration_009_search_facet_indexes),
+    (10, 'search query log', _migration_010_search_query_log),
+    (11, 'related products', _migration_011_related_products),
+    (12, 'review pagination indexes', _migration_012_review_pagination_indexes),
+    (13, 'product search table', _migration_013_product_search_table),
+    (14, 'review posted_at indexes', _migration_014_review_posted_at_indexes),
+]
+
+LATEST_SCHEMA_VERSION = MIGRATIONS[-1][0]
+
+# Arbitrary key for pg_advisory_lock so two booting processes don't migrate at once
+MIGRATION_LOCK_KEY = 7307001
+
+# Set DB_AUTO_MIGRATE=false to only check the schema at startup and leave
+# applying migrations to `python database_postgres.py migrate`
+AUTO_MIGRATE = os.getenv('DB_AUTO_MIGRATE', 'true').lower() in ('1', 'true', 'yes')
+
+
+def get_schema_version(cursor):
+    """Highest applied migration number (0 for a database that predates schema_migrations)"""
     try:
-        with get_db() as conn:
-            cursor = conn.cursor()
+        cursor.execute('SELECT MAX(version) FROM schema_migrations')
+        return cursor.fetchone()[0] or 0
+    except psycopg2.errors.UndefinedTable:
+        cursor.connection.rollback()
+        return 0
 
-            logger.info("Creating PostgreSQL tables for Zo-Zi Marketplace...")
 
-            # Users table - matching your SQLite structure
-            cursor.execute('''
-                CREATE TABLE IF NOT EXISTS users (
-                    id SERIAL PRIMARY KEY,
-                    email VARCHAR(255) UNIQUE NOT NULL,
-                    password VARCHAR(255) NOT NULL,
-                    first_name VARCHAR(100) NOT NULL,
-                    last_name VARCHAR(100) NOT NULL,
-                    is_seller BOOLEAN DEFAULT FALSE,
-                    is_support BOOLEAN DEFAULT FALSE,
-                    phone_number VARCHAR(20),
-                    address TEXT,
-                    parish VARCHAR(50),
-                    post_office VARCHAR(100),
-                    profile_picture VARCHAR(255),
-                    discount_used BOOLEAN DEFAULT FALSE,
-                    notification_preference VARCHAR(10),
-                    business_name VARCHAR(255),
-                    business_address TEXT,
-                    security_question TEXT,
-                    security_answer TEXT,
-                    discount_applied BOOLEAN DEFAULT FALSE,
-                    gender VARCHAR(20),
-                    delivery_address TEXT,
-                    billing_address TEXT,
-                    whatsapp_number VARCHAR(20),
-                    business_description TEXT,
-                    verification_status VARCHAR(50) DEFAULT 'pending_documents',
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    purchase_count INTEGER DEFAULT 0
-                )
-            ''')
+def get_pending_migrations(cursor):
+    """Migrations not yet recorded in schema_migrations, in order"""
+    cursor.execute('SELECT version FROM schema_migrations')
+    applied = {row[0] for row in cursor.fetchall()}
+    return [m for m in MIGRATIONS if m[0] not in applied]
 
-            # Products table
-            cursor.execute('''
-                CREATE TABLE IF NOT EXISTS products (
-                    id SERIAL PRIMARY KEY,
-                    product_key VARCHAR(255) UNIQUE NOT NULL,
-                    seller_email VARCHAR(255) NOT NULL,
-                    name VARCHAR(255) NOT NULL,
-                    description TEXT,
-                    price DECIMAL(10,2) NOT NULL,
-                    category VARCHAR(100),
-                    sizes JSONB DEFAULT '{}',
-                    image_urls JSONB DEFAULT '[]',
-                    image_url VARCHAR(255),
-                    posted_date TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    clicks INTEGER DEFAULT 0,
-                    likes INTEGER DEFAULT 0,
-                    sold INTEGER DEFAULT 0,
-                    stock_quantity INTEGER DEFAULT 0,
-                    is_active BOOLEAN DEFAULT TRUE
-                )
-            ''')
 
-            # Orders table - matching your SQLite structure
+def run_migrations():
+    """
+    Apply every pending migration, each in its own transaction together with
+    its schema_migrations row. Returns True when the schema is up to date.
+    """
+    try:
+        with get_db(independent=True) as conn:
+            cursor = conn.cursor()
             cursor.execute('''
-                CREATE TABLE IF NOT EXISTS orders (
-                    id SERIAL PRIMARY KEY,
-                    order_id VARCHAR(255) UNIQUE NOT NULL,
-                    user_email VARCHAR(255) NOT NULL,
-                    full_name VARCHAR(255),
-                    phone_number VARCHAR(20),
-                    address TEXT,
-                    parish VARCHAR(50),
-                    post_office VARCHAR(100),
-                    total DECIMAL(10,2) NOT NULL,
-                    discount DECIMAL(10,2) DEFAULT 0,
-                    payment_method VARCHAR(50),
-                    order_date TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    status VARCHAR(50) DEFAULT 'pending',
-                    shipping_option VARCHAR(100),
-                    shipping_fee DECIMAL(10,2) DEFAULT 0,
-                    tax DECIMAL(10,2) DEFAULT 0,
-                    lynk_reference VARCHAR(255),
-                    payment_verified BOOLEAN DEFAULT FALSE
+                CREATE TABLE IF NOT EXISTS schema_migrations (
+                    version INTEGER PRIMARY KEY,
+                    name VARCHAR(255) NOT NULL,
+                    applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
                 )
             ''')
+            conn.commit()
 
-            # Order items table
-            cursor.execute('''
-                CREATE TABLE IF NOT EXISTS order_items (
-                    id SERIAL PRIMARY KEY,
-                    order_id VARCHAR(255) NOT NULL,
-                    product_key VARCHAR(255) NOT NULL,
-                    quantity INTEGER NOT NULL,
-                    price DECIMAL(10,2) NOT NULL,
-                    size VARCHAR(50)
-                )
-            ''')
+            # Session-level lock: migrations commit along the way
+            cursor.execute('SELECT pg_advisory_lock(%s)', (MIGRATION_LOCK_KEY,))
+            try:
+                pending = get_pending_migrations(cursor)
+                if not pending:
+                    logger.info(f"✅ Database schema already up to date (version {LATEST_SCHEMA_VERSION})")
+                    return True
+
+                logger.info(f"🔄 Applying {len(pending)} database migration(s)...")
+                for version, name, migration in pending:
+                    logger.info(f"  Migration {version:03d}: {name}")
+                    migration(cursor, conn)
+                    cursor.execute('INSERT INTO schema_migrations (version, name) VALUES (%s, %s)',
+                                   (version, name))
+                    conn.commit()
+                    logger.info(f"  ✓ Migration {version:03d} applied")
+            finally:
+                conn.rollback()
+                cursor.execute('SELECT pg_advisory_unlock(%s)', (MIGRATION_LOCK_KEY,))
+                conn.commit()
+
+            logger.info(f"✅ All migrations completed successfully! (version {LATEST_SCHEMA_VERSION})")
+            return True
+    except Exception as e:
+        logger.error(f"❌ Migration error: {e}")
+        return False
 
-            # Admin users table - matching your SQLite structure
-            cursor.execute('''
-                CREATE TABLE IF NOT EXISTS admin_users (
-                    id SERIAL PRIMARY KEY,
-                    email VARCHAR(255) UNIQUE NOT NULL,
-                    password VARCHAR(255) NOT NULL,
-                    admin_level VARCHAR(50) DEFAULT 'admin',
-                    created_by VARCHAR(255),
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    last_login TIMESTAMP,
-                    is_active BOOLEAN DEFAULT TRUE,
-                    permissions TEXT DEFAULT '{"users":true,"products":true,"orders":true,"analytics":true,"financials":true}'
-                )
-            ''')
 
-            logger.info("✅ PostgreSQL core tables created!")
+def migration_status():
+    """(current version, list of pending migration numbers)"""
+    with get_db(independent=True) as conn:
+        cursor = conn.cursor()
+        version = get_schema_version(cursor)
+        if version == 0:
+            return 0, [m[0] for m in MIGRATIONS]
+        return version, [m[0] for m in get_pending_migrations(cursor)]
 
-            # Now run migrations to add any missing tables/columns
-            # Pass cursor so migrations run in same transaction
-            run_migrations(cursor=cursor, conn=conn)
 
+def init_db():
+    """
+    Make sure the database schema is current. Called when app.py is imported.
+    The common case costs one query; migrations only run when some are pending.
+    """
+    try:
+        with get_db(independent=True) as conn:
+            version = get_schema_version(conn.cursor())
+        if version >= LATEST_SCHEMA_VERSION:
+            logger.info(f"✅ Database schema up to date (version {version})")
             return True
 
+        if not AUTO_MIGRATE:
+            logger.warning(f"⚠ Database schema is at version {version}, code expects {LATEST_SCHEMA_VERSION}. "
+                           f"Run: python database_postgres.py migrate")
+            return False
+        return run_migrations()
+
     except Exception as e:
         logger.error(f"❌ Error initializing database: {e}")
         return False
@@ -859,35 +1923,9 @@ def get_all_products(active_only=True):
     """Get all products from the database"""
     try:
         with get_db() as conn:
-            cursor = conn.cursor(cursor_factory=psycopg2.extras.RealDictCursor)
+            cursor = conn.cursor()
             cursor.execute('SELECT * FROM products ORDER BY posted_date DESC')
-            products = []
-            for row in cursor.fetchall():
-                product = dict(row)
-                # Handle JSON fields - PostgreSQL JSONB returns Python objects directly
-                image_urls = product.get('image_urls', [])
-                if isinstance(image_urls, str):
-                    try:
-                        product['image_urls'] = json.loads(image_urls)
-                    except:
-                        product['image_urls'] = []
-                elif isinstance(image_urls, list):
-                    product['image_urls'] = image_urls
-                else:
-                    product['image_urls'] = []
-
-                sizes = product.get('sizes', {})
-                if isinstance(sizes, str):
-                    try:
-                        product['sizes'] = json.loads(sizes)
-                    except:
-                        product['sizes'] = {}
-                elif isinstance(sizes, dict):
-                    product['sizes'] = sizes
-                else:
-                    product['sizes'] = {}
-                products.append(product)
-            return products
+            return fetch_products(cursor)
     except Exception as e:
         logger.error(f"Error getting products: {e}")
         return []
@@ -897,35 +1935,9 @@ def get_product_by_key(product_key):
     """Get a specific product by its key"""
     try:
         with get_db() as conn:
-            cursor = conn.cursor(cursor_factory=psycopg2.extras.RealDictCursor)
+            cursor = conn.cursor()
             cursor.execute('SELECT * FROM products WHERE product_key = %s', (product_key,))
-            row = cursor.fetchone()
-            if row:
-                product = dict(row)
-                # Handle JSON fields
-                image_urls = product.get('image_urls', [])
-                if isinstance(image_urls, str):
-                    try:
-                        product['image_urls'] = json.loads(image_urls)
-                    except:
-                        product['image_urls'] = []
-                elif isinstance(image_urls, list):
-                    product['image_urls'] = image_urls
-                else:
-                    product['image_urls'] = []
-
-                sizes = product.get('sizes', {})
-                if isinstance(sizes, str):
-                    try:
-                        product['sizes'] = json.loads(sizes)
-                    except:
-                        product['sizes'] = {}
-                elif isinstance(sizes, dict):
-                    product['sizes'] = sizes
-                else:
-                    product['sizes'] = {}
-                return product
-            return None
+            return fetch_product(cursor)
     except Exception as e:
         logger.error(f"Error getting product: {e}")
         return None
@@ -935,90 +1947,411 @@ def get_products_by_seller(seller_email):
     """Get all products for a specific seller"""
     try:
         with get_db() as conn:
-            cursor = conn.cursor(cursor_factory=psycopg2.extras.RealDictCursor)
+            cursor = conn.cursor()
             cursor.execute('SELECT * FROM products WHERE seller_email = %s ORDER BY posted_date DESC', (seller_email,))
-            products = []
-            for row in cursor.fetchall():
-                product = dict(row)
-                # Handle JSON fields
-                image_urls = product.get('image_urls', [])
-                if isinstance(image_urls, str):
-                    try:
-                        product['image_urls'] = json.loads(image_urls)
-                    except:
-                        product['image_urls'] = []
-                elif isinstance(image_urls, list):
-                    product['image_urls'] = image_urls
-                else:
-                    product['image_urls'] = []
-
-                sizes = product.get('sizes', {})
-                if isinstance(sizes, str):
-                    try:
-                        product['sizes'] = json.loads(sizes)
-                    except:
-                        product['sizes'] = {}
-                elif isinstance(sizes, dict):
-                    product['sizes'] = sizes
-                else:
-                    product['sizes'] = {}
-                products.append(product)
-            return products
+            return fetch_products(cursor)
     except Exception as e:
         logger.error(f"Error getting seller products: {e}")
         return []
 
 
-def search_products(query, category=None):
-    """Search products by name, description, or category"""
+def build_search_query(text):
+    """
+    to_tsquery() input for what a shopper typed: every word must match, each
+    as a prefix ("sand" finds "sandals"). Returns None when there is nothing
+    to search for.
+    """
+    # Drop apostrophes first so "men's" is one word, not "men" and a bare "s" prefix
+    terms = re.findall(r'[^\W_]+', re.sub(r"['\u2019]", '', (text or '').lower()))
+    if not terms:
+        return None
+    return ' & '.join(f'{term}:*' for term in terms)
+
+
+# Facet filters search_products() accepts, besides category
+SEARCH_FILTERS = ('price', 'parish', 'cod', 'shipping_method')
+
+
+def price_bucket_range(bucket):
+    """(low, high) JMD bounds of a price facet bucket; high is None for the last one"""
+    low = SEARCH_PRICE_BUCKETS[bucket]
+    high = SEARCH_PRICE_BUCKETS[bucket + 1] if bucket + 1 < len(SEARCH_PRICE_BUCKETS) else None
+    return low, high
+
+
+# FROM clause of search_products(): the search vectors are joined only when there are terms
+SEARCH_FROM = 'products p JOIN product_search ps USING (product_key)'
+
+
+def _search_conditions(tsquery, category, filters, excluded):
+    """WHERE clause and params shared by the result page and the facet counts"""
+    conditions = ['seller_email <> ALL(%s)']
+    params = [excluded]
+    if tsquery:
+        conditions.append("search_vector @@ to_tsquery('english', %s)")
+        params.append(tsquery)
+    if category:
+        conditions.append('category = %s')
+        params.append(category)
+    if filters.get('price') is not None:
+        low, high = price_bucket_range(filters['price'])
+        conditions.append('price >= %s')
+        params.append(low)
+        if high is not None:
+            conditions.append('price < %s')
+            params.append(high)
+    if filters.get('parish'):
+        conditions.append('shipping = %s')
+        params.append(filters['parish'])
+    if filters.get('cod'):
+        conditions.append('cod_available = true')
+    if filters.get('shipping_method'):
+        conditions.append('shipping_method = %s')
+        params.append(filters['shipping_method'])
+    return ' AND '.join(conditions), params
+
+
+def _decode_facets(rows):
+    """
+    {'total': n, 'category': [(value, count), ...], 'price': [(bucket, count)],
+    'parish': [...], 'cod': [(True, count)], 'shipping_method': [...]} from
+    the GROUPING SETS rows, each list by count
+    """
+    facets = {'total': 0, 'category': [], 'price': [], 'parish': [], 'cod': [], 'shipping_method': []}
+    for facet, value, count in rows or []:
+        if facet == 'total':
+            facets['total'] = count
+        elif value is not None:
+            if facet == 'price':
+                value = int(value)
+            elif facet == 'cod':
+                if value != 'true':
+                    continue
+                value = True
+            facets[facet].append((value, count))
+    for facet, values in facets.items():
+        if facet != 'total':
+            values.sort(key=lambda item: (item[0] if facet == 'price' else -item[1], str(item[0])))
+    return facets
+
+
+def search_products(query, category=None, excluded_seller_emails=None, page=1, limit=SEARCH_PAGE_SIZE,
+                    filters=None, with_facets=False):
+    """
+    Search products by name, brand, category and description
+
+    Matches go through the product_search GIN index and are ranked by ts_rank
+    (a name match outranks a brand, category or description match), then by
+    popularity. Without search terms the category (or whole catalog) is
+    listed by popularity. filters narrows the results by facet: price
+    (bucket index into SEARCH_PRICE_BUCKETS), parish, cod (True) and
+    shipping_method; each one is an indexed column.
+
+    With with_facets=True the same query also counts the narrowed results
+    per category, price bucket, parish, COD and shipping method (GROUPING
+    SETS over the matches) - one round-trip for the page and its facets.
+
+    Returns (products for this page, True if there is a next page, facets or None).
+    """
+    tsquery = build_search_query(query)
+    where, params = _search_conditions(tsquery, category, filters or {}, list(excluded_seller_emails or []))
+    rank = "ts_rank(search_vector, to_tsquery('english', %s))" if tsquery else '0'
+    rank_params = [tsquery] if tsquery else []
+    source = SEARCH_FROM if tsquery else 'products p'
+    # Without search terms, popularity order alone lets an index supply the order
+    order = ('search_rank DESC, ' if tsquery else '') + 'popularity_score DESC, product_key DESC'
+    offset = (max(page, 1) - 1) * limit
     try:
         with get_db() as conn:
-            cursor = conn.cursor(cursor_factory=psycopg2.extras.RealDictCursor)
-
-            if category:
-                cursor.execute('''
-                    SELECT * FROM products
-                    WHERE (name ILIKE %s OR description ILIKE %s)
-                    AND category = %s
-                    ORDER BY clicks DESC, likes DESC
-                ''', (f'%{query}%', f'%{query}%', category))
-            else:
-                cursor.execute('''
-                    SELECT * FROM products
-                    WHERE (name ILIKE %s OR description ILIKE %s)
-                    ORDER BY clicks DESC, likes DESC
-                ''', (f'%{query}%', f'%{query}%'))
-
-            products = []
-            for row in cursor.fetchall():
-                product = dict(row)
-                # Handle JSON fields
-                image_urls = product.get('image_urls', [])
-                if isinstance(image_urls, str):
-                    try:
-                        product['image_urls'] = json.loads(image_urls)
-                    except:
-                        product['image_urls'] = []
-                elif isinstance(image_urls, list):
-                    product['image_urls'] = image_urls
-                else:
-                    product['image_urls'] = []
-
-                sizes = product.get('sizes', {})
-                if isinstance(sizes, str):
-                    try:
-                        product['sizes'] = json.loads(sizes)
-                    except:
-                        product['sizes'] = {}
-                elif isinstance(sizes, dict):
-                    product['sizes'] = sizes
-                else:
-                    product['sizes'] = {}
-                products.append(product)
-            return products
+            cursor = conn.cursor()
+            if not with_facets:
+                cursor.execute(f'''
+                    SELECT p.*, {rank} as search_rank
+                    FROM {source}
+                    WHERE {where}
+                    ORDER BY {order}
+                    LIMIT %s OFFSET %s
+                ''', rank_params + params + [limit + 1, offset])
+                products = fetch_products(cursor)
+                return products[:limit], len(products) > limit, None
+
+            # matches holds the narrow columns of every hit; the page joins back for
+            # full rows, and the facet counts ride along on the first row (or on a
+            # lone row of NULLs when the page is empty)
+            cursor.execute(f'''
+                WITH matches AS (
+                    SELECT product_key, category, shipping, shipping_method, popularity_score,
+                           COALESCE(cod_available, false) as cod,
+                           width_bucket(price, %s::numeric[]) - 1 as price_bucket,
+                           {rank} as search_rank
+                    FROM {source}
+                    WHERE {where}
+                ),
+                facets AS (
+                    SELECT json_agg(json_build_array(facet, value, hits)) as facets
+                    FROM (
+                        SELECT CASE WHEN GROUPING(category) = 0 THEN 'category'
+                                    WHEN GROUPING(price_bucket) = 0 THEN 'price'
+                                    WHEN GROUPING(shipping) = 0 THEN 'parish'
+                                    WHEN GROUPING(cod) = 0 THEN 'cod'
+                                    WHEN GROUPING(shipping_method) = 0 THEN 'shipping_method'
+                                    ELSE 'total' END as facet,
+                               COALESCE(category, price_bucket::text, shipping, cod::text, shipping_method) as value,
+                               COUNT(*) as hits
+                        FROM matches
+                        GROUP BY GROUPING SETS ((category), (price_bucket), (shipping), (cod), (shipping_method), ())
+                    ) counts
+                ),
+                page AS (
+                    SELECT product_key, search_rank,
+                           ROW_NUMBER() OVER (ORDER BY {order}) as position
+                    FROM matches
+                    ORDER BY position
+                    LIMIT %s OFFSET %s
+                )
+                SELECT p.*, page.search_rank,
+                       CASE WHEN page.position IS NULL OR page.position = %s THEN facets.facets END as facets
+                FROM facets
+                LEFT JOIN page ON true
+                LEFT JOIN products p ON p.product_key = page.product_key
+                ORDER BY page.position
+            ''', [list(SEARCH_PRICE_BUCKETS)] + rank_params + params + [limit + 1, offset, offset + 1])
+            rows = fetch_products(cursor)
+            facets = _decode_facets(rows[0]['facets'] if rows else None)
+            products = [product for product in rows if product['product_key'] is not None]
+            return products[:limit], len(products) > limit, facets
     except Exception as e:
         logger.error(f"Error searching products: {e}")
+        return [], False, None
+
+
+# /autocomplete - pg_trgm word similarity, so "sandels" still finds "Sandals"
+AUTOCOMPLETE_SIMILARITY = float(os.getenv('AUTOCOMPLETE_SIMILARITY', '0.4'))
+AUTOCOMPLETE_P99_BUDGET_MS = float(os.getenv('AUTOCOMPLETE_P99_BUDGET_MS', '50'))
+AUTOCOMPLETE_CATEGORIES_TTL = 300
+
+_autocomplete_latencies = deque(maxlen=1000)
+_autocomplete_over_budget = [0]
+_autocomplete_categories = {'expires_at': 0.0, 'values': []}
+
+
+def _trigrams(text):
+    """pg_trgm-style trigrams: each word lowercased and padded with two leading spaces and one trailing"""
+    grams = set()
+    for word in re.findall(r'[^\W_]+', text.lower()):
+        padded = f'  {word} '
+        grams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return grams
+
+
+def _product_categories(cursor):
+    """Distinct product categories, re-read every few minutes (there are only a handful)"""
+    if time.monotonic() >= _autocomplete_categories['expires_at']:
+        cursor.execute('SELECT DISTINCT category FROM products WHERE category IS NOT NULL')
+        _autocomplete_categories['values'] = [row[0] for row in cursor.fetchall()]
+        _autocomplete_categories['expires_at'] = time.monotonic() + AUTOCOMPLETE_CATEGORIES_TTL
+    return _autocomplete_categories['values']
+
+
+def autocomplete_suggestions(query, limit=5, flagged=()):
+    """
+    Search-box suggestions for what has been typed so far: products, seller
+    businesses and categories whose names are similar to query, misspellings
+    included. Products and sellers come from one query on the trigram
+    indexes, ranked by word_similarity then popularity; categories are
+    matched in process. Products and stores of the flagged sellers are left
+    out. Returns a list of dicts with type, name, image_url and url-building
+    keys (product_key / seller_email / category).
+    """
+    flagged = list(flagged)
+    start = time.monotonic()
+    try:
+        with get_db() as conn:
+            cursor = conn.cursor()
+            # Applies to the <% operators below, for this transaction only
+            cursor.execute("SELECT set_config('pg_trgm.word_similarity_threshold', %s, true)",
+                           (str(AUTOCOMPLETE_SIMILARITY),))
+            cursor.execute('''
+                (SELECT 'product' as type, product_key as key, name, image_url,
+                        word_similarity(%s, name) as score, popularity_score
+                 FROM products
+                 WHERE %s <%% name AND seller_email <> ALL(%s)
+                 ORDER BY score DESC, popularity_score DESC
+                 LIMIT %s)
+                UNION ALL
+                (SELECT 'seller' as type, email as key, business_name as name, store_logo as image_url,
+                        word_similarity(%s, business_name) as score, 0 as popularity_score
+                 FROM users
+                 WHERE is_seller = true AND %s <%% business_name AND email <> ALL(%s)
+                 ORDER BY score DESC
+                 LIMIT 2)
+            ''', (query, query, flagged, limit, query, query, flagged))
+            rows = cursor.fetchall()
+
+            query_grams = _trigrams(query)
+            categories = []
+            if query_grams:
+                for category in _product_categories(cursor):
+                    score = len(query_grams & _trigrams(category)) / len(query_grams)
+                    if score >= AUTOCOMPLETE_SIMILARITY:
+                        categories.append((score, category))
+            categories.sort(reverse=True)
+
+        suggestions = []
+        for kind, key, name, image_url, score, _ in rows:
+            suggestion = {'type': kind, 'name': name, 'image_url': image_url or 'product-placeholder.svg'}
+            suggestion['product_key' if kind == 'product' else 'seller_email'] = key
+            suggestions.append((score, suggestion))
+        for score, category in categories[:2]:
+            suggestions.append((score, {'type': 'category', 'name': category, 'category': category,
+                                        'image_url': 'product-placeholder.svg'}))
+        # Best matches first; products win ties so the list still leads with things to buy
+        suggestions.sort(key=lambda item: (-item[0], item[1]['type'] != 'product'))
+        return [suggestion for _, suggestion in suggestions]
+    except Exception as e:
+        logger.error(f"Error getting autocomplete suggestions: {e}")
         return []
+    finally:
+        elapsed_ms = (time.monotonic() - start) * 1000
+        _autocomplete_latencies.append(elapsed_ms)
+        if elapsed_ms > AUTOCOMPLETE_P99_BUDGET_MS:
+            _autocomplete_over_budget[0] += 1
+            logger.warning(f"🐢 Autocomplete for {query!r} took {elapsed_ms:.1f}ms "
+                           f"(budget {AUTOCOMPLETE_P99_BUDGET_MS:g}ms)")
+
+
+# Rollup columns each search_log event kind increments: (count column, zero-result column)
+_SEARCH_LOG_ROLLUP = {
+    'search': ('searches', 'search_zero_results'),
+    'autocomplete': ('autocompletes', 'autocomplete_zero_results'),
+    'search_click': ('search_clicks', None),
+    'autocomplete_click': ('autocomplete_clicks', None),
+}
+_SEARCH_LOG_COUNTERS = ('searches', 'search_zero_results', 'search_clicks',
+                        'autocompletes', 'autocomplete_zero_results', 'autocomplete_clicks')
+
+
+def save_search_log(events):
+    """
+    Write a batch of search_log events, (created_at, query, kind, results,
+    target) tuples: one multi-row insert into search_queries and one upsert
+    of the matching search_query_daily counters, in a transaction of its own.
+    """
+    rollup = {}
+    for created_at, query, kind, results, target in events:
+        count_column, zero_column = _SEARCH_LOG_ROLLUP[kind]
+        counters = rollup.setdefault((created_at.date(), query), dict.fromkeys(_SEARCH_LOG_COUNTERS, 0))
+        counters[count_column] += 1
+        if zero_column and results == 0:
+            counters[zero_column] += 1
+
+    with get_db(independent=True) as conn:
+        cursor = conn.cursor()
+        psycopg2.extras.execute_values(cursor, '''
+            INSERT INTO search_queries (created_at, query, kind, result_count, target) VALUES %s
+        ''', events, page_size=1000)
+        psycopg2.extras.execute_values(cursor, f'''
+            INSERT INTO search_query_daily (day, query, {', '.join(_SEARCH_LOG_COUNTERS)}) VALUES %s
+            ON CONFLICT (day, query) DO UPDATE SET
+            {', '.join(f'{column} = search_query_daily.{column} + EXCLUDED.{column}' for column in _SEARCH_LOG_COUNTERS)}
+        ''', [key + tuple(counters[column] for column in _SEARCH_LOG_COUNTERS) for key, counters in rollup.items()],
+            page_size=1000)
+        conn.commit()
+
+
+def get_search_query_report(days=7, limit=50):
+    """
+    From search_query_daily over the last `days` days: the most searched
+    queries with their click-through, searches that found nothing, and
+    autocomplete prefixes that suggested nothing (the catalog gaps), plus
+    overall totals
+    """
+    with get_db() as conn:
+        cursor = conn.cursor(cursor_factory=psycopg2.extras.RealDictCursor)
+        window = 'day > CURRENT_DATE - %s'
+
+        def rows(order, condition='true'):
+            cursor.execute(f'''
+                SELECT query, SUM(searches) as searches, SUM(search_zero_results) as zero_results,
+                       SUM(search_clicks) as clicks, SUM(autocompletes) as autocompletes,
+                       SUM(autocomplete_zero_results) as autocomplete_zero_results,
+                       SUM(autocomplete_clicks) as autocomplete_clicks,
+                       ROUND(SUM(search_clicks)::numeric / NULLIF(SUM(searches), 0), 3) as click_through
+                FROM search_query_daily
+                WHERE {window}
+                GROUP BY query
+                HAVING {condition}
+                ORDER BY {order}
+                LIMIT %s
+            ''', (days, limit))
+            return [dict(row) for row in cursor.fetchall()]
+
+        report = {
+            'days': days,
+            'top_queries': rows('SUM(searches) DESC, query', 'SUM(searches) > 0'),
+            'zero_result_queries': rows('SUM(search_zero_results) DESC, query', 'SUM(search_zero_results) > 0'),
+            'autocomplete_misses': rows('SUM(autocomplete_zero_results) DESC, query',
+                                        'SUM(autocomplete_zero_results) > 0'),
+        }
+        cursor.execute(f'''
+            SELECT COALESCE(SUM(searches), 0) as searches, COALESCE(SUM(search_zero_results), 0) as zero_results,
+                   COALESCE(SUM(search_clicks), 0) as clicks, COALESCE(SUM(autocompletes), 0) as autocompletes,
+                   COALESCE(SUM(autocomplete_clicks), 0) as autocomplete_clicks,
+                   COUNT(DISTINCT query) as distinct_queries
+            FROM search_query_daily
+            WHERE {window}
+        ''', (days,))
+        totals = dict(cursor.fetchone())
+        totals['click_through'] = round(totals['clicks'] / totals['searches'], 3) if totals['searches'] else None
+        totals['zero_result_rate'] = round(totals['zero_results'] / totals['searches'], 3) if totals['searches'] else None
+        report['totals'] = totals
+        return report
+
+
+def get_autocomplete_entries():
+    """
+    Rows for the in-process prefix index (prefix_index.py): every named
+    product with its popularity, every seller business scored by the summed
+    popularity of its products, and every category by product count, as
+    (kind, key, name, image_url, score, owner) tuples.
+    """
+    with get_db() as conn:
+        cursor = conn.cursor()
+        cursor.execute('''
+            SELECT 'product', product_key, name, image_url, popularity_score, seller_email
+            FROM products
+            WHERE name IS NOT NULL
+            UNION ALL
+            SELECT 'seller', u.email, u.business_name, u.store_logo,
+                   COALESCE(SUM(p.popularity_score), 0), u.email
+            FROM users u
+            LEFT JOIN products p ON p.seller_email = u.email
+            WHERE u.is_seller = true AND u.business_name IS NOT NULL
+            GROUP BY u.email, u.business_name, u.store_logo
+            UNION ALL
+            SELECT 'category', category, category, NULL, COUNT(*), NULL
+            FROM products
+            WHERE category IS NOT NULL
+            GROUP BY category
+        ''')
+        return [tuple(row) for row in cursor.fetchall()]
+
+
+def get_autocomplete_stats():
+    """Latency of the recent /autocomplete lookups against the p99 budget"""
+    latencies = sorted(_autocomplete_latencies)
+    if not latencies:
+        return {'samples': 0, 'p99_budget_ms': AUTOCOMPLETE_P99_BUDGET_MS}
+    p99 = latencies[min(int(len(latencies) * 0.99), len(latencies) - 1)]
+    return {
+        'samples': len(latencies),
+        'p50_ms': round(latencies[len(latencies) // 2], 2),
+        'p99_ms': round(p99, 2),
+        'max_ms': round(latencies[-1], 2),
+        'p99_budget_ms': AUTOCOMPLETE_P99_BUDGET_MS,
+        'within_budget': p99 <= AUTOCOMPLETE_P99_BUDGET_MS,
+        'over_budget_total': _autocomplete_over_budget[0],
+    }
 
 
 def update_product_stats(product_key, field, increment=1):
@@ -1270,8 +2603,193 @@ def get_database_stats():
 
 # User Browsing History & Personalization Functions
 
+REVIEWS_PAGE_SIZE = int(os.getenv('REVIEWS_PAGE_SIZE', '10'))
+
+# Reviews are paged by posted_at: created_at, with undated reviews sorted
+# after every dated one (a plain DESC puts NULLs first, and no keyset
+# comparison can page past a NULL)
+REVIEW_POSTED_AT = "COALESCE(pr.created_at, '-infinity'::timestamp)"
+
+# sort: (ORDER BY, keyset condition after the last review shown, review fields in the cursor)
+REVIEW_SORTS = {
+    'newest': (f'{REVIEW_POSTED_AT} DESC, pr.id DESC',
+               f'({REVIEW_POSTED_AT}, pr.id) < (%(posted_at)s::timestamp, %(id)s)', ('posted_at', 'id')),
+    'rating': (f'pr.rating DESC, {REVIEW_POSTED_AT} DESC, pr.id DESC',
+               f'(pr.rating, {REVIEW_POSTED_AT}, pr.id) < (%(rating)s, %(posted_at)s::timestamp, %(id)s)',
+               ('rating', 'posted_at', 'id')),
+}
+
+# One page of a product's reviews, read in index order (idx_product_reviews_product_posted / _rating_posted)
+REVIEWS_SQL = '''
+    SELECT pr.id, pr.rating, pr.review_text, pr.is_verified_purchase, pr.created_at::text as created_at,
+           COALESCE(pr.created_at, '-infinity'::timestamp)::text as posted_at, u.first_name, u.last_name
+    FROM product_reviews pr
+    JOIN users u ON u.email = pr.buyer_email
+    WHERE pr.product_key = %(product)s {keyset}
+    ORDER BY {order}
+    LIMIT %(limit)s
+'''
+
+
+def _review_page(reviews, sort, limit):
+    """Trim a limit + 1 fetch to one page; returns (reviews, cursor for the next page or None)"""
+    reviews = list(reviews or [])
+    if len(reviews) <= limit:
+        return reviews, None
+    reviews = reviews[:limit]
+    return reviews, encode_feed_cursor([sort] + [reviews[-1][field] for field in REVIEW_SORTS[sort][2]])
+
+
+def decode_review_cursor(token, sort):
+    """The last review shown, as a dict of the fields sort pages by; None if token is missing or malformed"""
+    values = _decode_cursor_token(token)
+    fields = REVIEW_SORTS[sort][2]
+    if not values or values[0] != sort or len(values) != len(fields) + 1:
+        return None
+    position = dict(zip(fields, values[1:]))
+    if not all(isinstance(position[field], int) for field in fields if field != 'posted_at'):
+        return None
+    if position['posted_at'] == '-infinity':
+        return position
+    try:
+        datetime.fromisoformat(position['posted_at'])
+    except (TypeError, ValueError):
+        return None
+    return position
+
+
+def get_product_reviews(product_key, sort='newest', after=None, limit=REVIEWS_PAGE_SIZE):
+    """
+    One page of a product's reviews for /product/<key>/reviews, newest or
+    highest rated first, keyset-paginated: after is the previous page's
+    cursor. Returns (reviews, next cursor or None).
+    """
+    order, keyset, _ = REVIEW_SORTS[sort]
+    position = decode_review_cursor(after, sort)
+    with get_db() as conn:
+        cursor = conn.cursor(cursor_factory=psycopg2.extras.RealDictCursor)
+        cursor.execute(REVIEWS_SQL.format(keyset=f'AND {keyset}' if position else '', order=order),
+                       dict(position or {}, product=product_key, limit=limit + 1))
+        return _review_page(cursor.fetchall(), sort, limit)
+
+
+def get_product_page(product_key, user_email=None):
+    """
+    Everything /product/<key> shows besides the product row and the seller
+    summary (cached, see app.get_seller_summary), in one round-trip: the
+    product's rating summary, the first page of its reviews
+    (newest first, with reviewer names; 'reviews_next' is the cursor for
+    get_product_reviews) and whether user_email has liked it. Each part is
+    an indexed lookup joined LATERAL onto a single row.
+    """
+    with get_db() as conn:
+        cursor = conn.cursor(cursor_factory=psycopg2.extras.RealDictCursor)
+        cursor.execute(f'''
+            SELECT prs.avg_rating as avg_product_rating, prs.rating_count as product_review_count,
+                   prs.updated_at as reviews_at,
+                   EXISTS(SELECT 1 FROM user_likes ul
+                          WHERE ul.user_email = %(user)s AND ul.product_key = %(product)s) as user_liked,
+                   COALESCE(reviews.items, '[]'::json) as reviews
+            FROM (SELECT 1) page
+            LEFT JOIN product_rating_summary prs ON prs.product_key = %(product)s
+            LEFT JOIN LATERAL (
+                SELECT json_agg(row_to_json(first_page) ORDER BY first_page.posted_at::timestamp DESC, first_page.id DESC) as items
+                FROM ({REVIEWS_SQL.format(keyset='', order=REVIEW_SORTS['newest'][0])}) first_page
+            ) reviews ON true
+        ''', {'product': product_key, 'user': user_email,
+              'limit': REVIEWS_PAGE_SIZE + 1})
+        page = cursor.fetchone()
+        page['reviews'], page['reviews_next'] = _review_page(page['reviews'], 'newest', REVIEWS_PAGE_SIZE)
+        return page
+
+
+def get_product_page_stamp(product_key, user_email=None):
+    """
+    What can change on /product/<key> besides the product record and seller
+    summary, for its ETag: when the rating summary last moved (every review
+    write) and whether user_email likes it. Two primary key lookups, so a
+    revalidating browser gets its 304 without get_product_page().
+    """
+    with get_db() as conn:
+        cursor = conn.cursor()
+        cursor.execute('''
+            SELECT (SELECT updated_at FROM product_rating_summary WHERE product_key = %(product)s),
+                   EXISTS(SELECT 1 FROM user_likes ul
+                          WHERE ul.user_email = %(user)s AND ul.product_key = %(product)s)
+        ''', {'product': product_key, 'user': user_email})
+        return tuple(cursor.fetchone())
+
+
+# Related products shown on /product/<key>
+RELATED_PRODUCTS_LIMIT = 4
+
+
+def get_related_products(product_key, category, limit=RELATED_PRODUCTS_LIMIT):
+    """
+    The related products block on /product/<key>: the precomputed
+    neighbours in product_related (one primary key range read), topped up
+    from the category by popularity for products without enough co-view or
+    co-purchase history yet
+    """
+    with get_db() as conn:
+        cursor = conn.cursor()
+        cursor.execute('''
+            SELECT p.*
+            FROM product_related r
+            JOIN products p ON p.product_key = r.related_key
+            WHERE r.product_key = %s
+            ORDER BY r.rank
+            LIMIT %s
+        ''', (product_key, limit))
+        related = fetch_products(cursor)
+        if len(related) < limit:
+            # Served by idx_products_category_popularity
+            cursor.execute('''
+                SELECT * FROM products
+                WHERE category = %s AND product_key <> ALL(%s)
+                ORDER BY popularity_score DESC, product_key DESC
+                LIMIT %s
+            ''', (category, [product_key] + [p['product_key'] for p in related], limit - len(related)))
+            related += fetch_products(cursor)
+        return related
+
+
+def save_product_counters(rows):
+    """
+    Apply a batch of product_counters increments, (product_key, clicks,
+    likes, sold) tuples, as one UPDATE ... FROM (VALUES ...) in a transaction
+    of its own. Rows arrive sorted by product_key, so concurrent batches lock
+    them in the same order.
+    """
+    with get_db(independent=True) as conn:
+        cursor = conn.cursor()
+        psycopg2.extras.execute_values(cursor, '''
+            UPDATE products p
+            SET clicks = COALESCE(p.clicks, 0) + v.clicks,
+                likes = GREATEST(COALESCE(p.likes, 0) + v.likes, 0),
+                sold = COALESCE(p.sold, 0) + v.sold
+            FROM (VALUES %s) AS v(product_key, clicks, likes, sold)
+            WHERE p.product_key = v.product_key
+        ''', rows, template='(%s, %s::integer, %s::integer, %s::integer)', page_size=1000)
+        conn.commit()
+
+
+def save_product_views(views):
+    """
+    Write a batch of product_views events, (user_email, product_key,
+    category, viewed_at) tuples, as one multi-row insert into
+    user_product_views in a transaction of its own
+    """
+    with get_db(independent=True) as conn:
+        cursor = conn.cursor()
+        psycopg2.extras.execute_values(cursor, '''
+            INSERT INTO user_product_views (user_email, product_key, category, viewed_at) VALUES %s
+        ''', views, page_size=1000)
+        conn.commit()
+
+
 def track_product_view(user_email, product_key, category):
-    """Track when a user views a product for personalization"""
+    """Track when a user views a product for personalization (one insert; the app batches through product_views)"""
     try:
         with get_db() as conn:
             cursor = conn.cursor()
@@ -1327,12 +2845,12 @@ def get_personalized_products(user_email, excluded_seller_emails=None):
     Returns products ordered by:
     1. Same category as last viewed
     2. Similar categories based on viewing history
-    3. Popular products (high clicks/likes)
-    4. Random remaining products
+    3. Popular products (stored popularity_score)
+    4. Remaining products, in a fixed order (product_key)
     """
     try:
         with get_db() as conn:
-            cursor = conn.cursor(cursor_factory=psycopg2.extras.RealDictCursor)
+            cursor = conn.cursor()
 
             # Get last viewed product category
             last_viewed = get_last_viewed_product(user_email)
@@ -1361,11 +2879,10 @@ def get_personalized_products(user_email, excluded_seller_emails=None):
                                 LIMIT 5
                             ) THEN 2
                             ELSE 3
-                        END as priority,
-                        (clicks + likes * 2) as popularity_score
+                        END as priority
                     FROM products
                     WHERE 1=1 {exclusion_clause}
-                    ORDER BY priority ASC, popularity_score DESC, RANDOM()
+                    ORDER BY priority ASC, popularity_score DESC, product_key DESC
                 '''
 
                 params.insert(1, user_email)
@@ -1381,43 +2898,14 @@ def get_personalized_products(user_email, excluded_seller_emails=None):
                     params.extend(excluded_seller_emails)
 
                 query = f'''
-                    SELECT *,
-                        (clicks + likes * 2) as popularity_score
-                    FROM products
+                    SELECT * FROM products
                     {exclusion_clause}
-                    ORDER BY popularity_score DESC, RANDOM()
+                    ORDER BY popularity_score DESC, product_key DESC
                 '''
 
                 cursor.execute(query, params)
 
-            products = {}
-            for row in cursor.fetchall():
-                product = dict(row)
-                # Handle JSON fields
-                image_urls = product.get('image_urls', [])
-                if isinstance(image_urls, str):
-                    try:
-                        product['image_urls'] = json.loads(image_urls)
-                    except:
-                        product['image_urls'] = []
-                elif isinstance(image_urls, list):
-                    product['image_urls'] = image_urls
-                else:
-                    product['image_urls'] = []
-
-                sizes = product.get('sizes', {})
-                if isinstance(sizes, str):
-                    try:
-                        product['sizes'] = json.loads(sizes)
-                    except:
-                        product['sizes'] = {}
-                elif isinstance(sizes, dict):
-                    product['sizes'] = sizes
-                else:
-                    product['sizes'] = {}
-                products[product['product_key']] = product
-
-            return products
+            return {product['product_key']: product for product in fetch_products(cursor)}
 
     except Exception as e:
         logger.error(f"Error getting personalized products: {e}")
@@ -1425,13 +2913,171 @@ def get_personalized_products(user_email, excluded_seller_emails=None):
         return get_all_products()
 
 
+# Homepage feed - one page at a time instead of the whole catalog
+FEED_PAGE_SIZE = int(os.getenv('FEED_PAGE_SIZE', '48'))
+
+
+def encode_feed_cursor(values):
+    """Opaque, URL-safe token for the position after the last product on a page"""
+    raw = json.dumps(values, separators=(',', ':')).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def _decode_cursor_token(token):
+    """The list encoded by encode_feed_cursor(), or None if the token is missing or malformed"""
+    if not token:
+        return None
+    try:
+        values = json.loads(base64.urlsafe_b64decode(token + '=' * (-len(token) % 4)))
+    except (ValueError, TypeError):
+        return None
+    if not isinstance(values, list) or not values:
+        return None
+    return values
+
+
+def decode_feed_cursor(token):
+    """Values from encode_feed_cursor(), or None if the token is missing or malformed"""
+    values = _decode_cursor_token(token)
+    if values is None:
+        return None
+    if values[0] == 'personal' and len(values) == 5:
+        return values
+    if values[0] == 'popular' and len(values) == 3:
+        return values
+    return None
+
+
+def get_product_feed(user_email=None, excluded_seller_emails=None, after=None, limit=FEED_PAGE_SIZE):
+    """
+    One page of the homepage feed, keyset-paginated
+
+    Logged-in users with a viewing history get the personalized order of
+    get_personalized_products(); everyone else gets the popularity order. Each
+    page continues from the (sort key, product_key) of the previous page's last
+    product, so page N costs the same as page 1 and nothing is repeated or
+    skipped when products are added in between.
+
+    Returns (products keyed by product_key, cursor for the next page or None).
+    """
+    position = decode_feed_cursor(after)
+    excluded = list(excluded_seller_emails or [])
+
+    try:
+        with get_db() as conn:
+            cursor = conn.cursor()
+
+            if position:
+                mode = position[0]
+                last_category = position[1] if mode == 'personal' else None
+            else:
+                last_viewed = get_last_viewed_product(user_email) if user_email else None
+                last_category = last_viewed['category'] if last_viewed else None
+                mode = 'personal' if last_category else 'popular'
+
+            if mode == 'personal':
+                # The last-viewed category is carried in the cursor so the order
+                # stays stable while the user scrolls
+                keyset = 'WHERE (-priority, popularity_score, product_key) < (%s, %s, %s)' if position else ''
+                params = [last_category, user_email, excluded] + (position[2:] if position else []) + [limit + 1]
+                cursor.execute(f'''
+                    SELECT * FROM (
+                        SELECT *,
+                            CASE
+                                WHEN category = %s THEN 1
+                                WHEN category IN (
+                                    SELECT DISTINCT category
+                                    FROM user_product_views
+                                    WHERE user_email = %s
+                                    LIMIT 5
+                                ) THEN 2
+                                ELSE 3
+                            END as priority
+                        FROM products
+                        WHERE seller_email <> ALL(%s)
+                    ) feed
+                    {keyset}
+                    ORDER BY priority ASC, popularity_score DESC, product_key DESC
+                    LIMIT %s
+                ''', params)
+            else:
+                # Served by idx_products_popularity
+                keyset = 'AND (popularity_score, product_key) < (%s, %s)' if position else ''
+                params = [excluded] + (position[1:] if position else []) + [limit + 1]
+                cursor.execute(f'''
+                    SELECT * FROM products
+                    WHERE seller_email <> ALL(%s)
+                    {keyset}
+                    ORDER BY popularity_score DESC, product_key DESC
+                    LIMIT %s
+                ''', params)
+
+            rows = fetch_products(cursor)
+            next_cursor = None
+            if len(rows) > limit:
+                rows = rows[:limit]
+                last = rows[-1]
+                if mode == 'personal':
+                    next_cursor = encode_feed_cursor(['personal', last_category, -last['priority'],
+                                                      last['popularity_score'], last['product_key']])
+                else:
+                    next_cursor = encode_feed_cursor(['popular', last['popularity_score'], last['product_key']])
+
+            return {product['product_key']: product for product in rows}, next_cursor
+
+    except Exception as e:
+        logger.error(f"Error getting product feed: {e}")
+        return {}, None
+
+
+def shuffle_feed_ties(products, seed):
+    """
+    Reorder a feed page so products with the same priority and popularity_score
+    come in an order fixed by seed, instead of ORDER BY ... RANDOM(). The query
+    keeps its index-friendly (popularity_score, product_key) order, so pages
+    stay cacheable and the keyset cursor is unaffected; each shopper (one seed
+    per session) still sees ties in their own order.
+    """
+    def tie_break(product):
+        digest = hashlib.md5(f"{seed}:{product['product_key']}".encode()).digest()
+        return (product.get('priority', 0), -(product['popularity_score'] or 0), digest)
+
+    return {product['product_key']: product for product in sorted(products.values(), key=tie_break)}
+
+
 if __name__ == "__main__":
-    # Test the database when running this file directly
-    print("🔧 Testing Zo-Zi PostgreSQL database connection...")
-    print(f"📁 Database URL: {get_database_url()}")
+    # Usage:
+    #   python database_postgres.py                    test the connection
+    #   python database_postgres.py migrate            apply pending schema migrations
+    #   python database_postgres.py status             show the schema version
+    #   python database_postgres.py rebuild-ratings    recompute product_rating_summary
+    import sys
+    command = sys.argv[1] if len(sys.argv) > 1 else 'test'
+
+    if command == 'migrate':
+        print(f"🔄 Migrating {get_database_url().split('@')[-1]} to schema version {LATEST_SCHEMA_VERSION}...")
+        sys.exit(0 if run_migrations() else 1)
+
+    elif command == 'rebuild-ratings':
+        with get_db(independent=True) as conn:
+            count = rebuild_rating_summary(conn.cursor())
+        print(f"✅ Rebuilt rating summary for {count} products")
+
+    elif command == 'status':
+        version, pending = migration_status()
+        print(f"📋 Schema version: {version} (latest: {LATEST_SCHEMA_VERSION})")
+        if pending:
+            print(f"⚠ Pending migrations: {', '.join(str(v) for v in pending)}")
+        else:
+            print("✅ Up to date")
 
-    if test_connection():
-        print("✅ Ready to migrate from SQLite to PostgreSQL!")
     else:
-        print("❌ Please check your PostgreSQL configuration and ensure the database is running.")
-        print("💡 Create a database named 'zozi_marketplace' in PostgreSQL first.")
\ No newline at end of file
+        # Test the database when running this file directly
+        print("🔧 Testing Zo-Zi PostgreSQL database connection...")
+        print(f"📁 Database URL: {get_database_url()}")
+
+        if test_connection():
+            print("✅ Ready to migrate from SQLite to PostgreSQL!")
+        else:
+            print("❌ Please check your PostgreSQL configuration and ensure the database is running.")
+            print("💡 Create a database named 'zozi_marketplace' in PostgreSQL first.")
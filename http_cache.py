@@ -0,0 +1,122 @@
+"""
+HTTP conditional requests for Zo-Zi Marketplace
+
+The browser polls /cart/data, /get_conversations, /seller/notifications and
+the admin dashboard APIs on timers, and most polls find nothing changed.
+Views wrapped in @conditional(stamp) first call stamp(), a cheap version
+lookup (a session hash, one indexed COUNT/MAX, or the table modification
+counters in pg_stat_user_tables), and turn it into an ETag. If the browser
+already holds that ETag (If-None-Match) the view never runs and a bodyless
+304 goes back; otherwise the full response is sent with the ETag attached.
+
+Responses are marked `Cache-Control: private, no-cache`, so browsers keep
+them but revalidate every time. Every ETag also changes at least every
+HTTP_VALIDATOR_TTL seconds, bounding staleness for anything a stamp misses
+(a renamed counterpart in a conversation, "today" rolling over...).
+"""
+
+import os
+import time
+import uuid
+import hashlib
+import logging
+from functools import wraps
+from flask import request, session, make_response
+
+logger = logging.getLogger(__name__)
+
+HTTP_VALIDATOR_TTL = int(os.getenv('HTTP_VALIDATOR_TTL', '300'))
+HTTP_CONDITIONAL_ENABLED = os.getenv('HTTP_CONDITIONAL_ENABLED', 'true').lower() in ('1', 'true', 'yes')
+
+# Changes on every restart, so ETags handed out by an older deploy never match
+BOOT_ID = uuid.uuid4().hex
+
+_stats = {'checks': 0, 'not_modified': 0, 'stamp_errors': 0}
+
+
+def make_etag(*parts):
+    """
+    ETag for a version stamp. The visitor (user, admin) is always part of it:
+    the browser cache is per URL, not per login, so a different account in the
+    same browser must never match a validator issued to the previous one.
+    """
+    user = session.get('user') or {}
+    admin = session.get('admin_user') or {}
+    key = (BOOT_ID, int(time.time() // HTTP_VALIDATOR_TTL), user.get('email'), admin.get('email')) + parts
+    return hashlib.blake2b(repr(key).encode(), digest_size=16).hexdigest()
+
+
+def not_modified(etag):
+    """A 304 response if the request already holds etag, else None"""
+    _stats['checks'] += 1
+    if etag in request.if_none_match:
+        _stats['not_modified'] += 1
+        response = make_response('', 304)
+        response.set_etag(etag)
+        response.headers['Cache-Control'] = 'private, no-cache'
+        return response
+    return None
+
+
+def with_etag(response, etag):
+    """Attach etag to a successful response (errors and redirects are left alone)"""
+    response = make_response(response)
+    if response.status_code == 200:
+        response.set_etag(etag)
+        response.headers['Cache-Control'] = 'private, no-cache'
+    return response
+
+
+def conditional(stamp):
+    """
+    Decorator: answer 304 when stamp(*view_args) matches If-None-Match. stamp
+    returns a tuple of version values, or None to skip validation (logged out,
+    SQLite...). A failing stamp never breaks the view, it just runs it.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            if not HTTP_CONDITIONAL_ENABLED:
+                return view(*args, **kwargs)
+            try:
+                parts = stamp(*args, **kwargs)
+            except Exception as e:
+                _stats['stamp_errors'] += 1
+                logger.error(f"Error computing version stamp for {request.path}: {e}")
+                parts = None
+            if parts is None:
+                return view(*args, **kwargs)
+
+            etag = make_etag(request.path, *parts)
+            return not_modified(etag) or with_etag(view(*args, **kwargs), etag)
+        return wrapper
+    return decorator
+
+
+def table_versions(cursor, tables):
+    """
+    Modification counters (inserted + updated + deleted rows) for tables, from
+    pg_stat_user_tables. One catalog lookup that moves whenever any writer, in
+    any process, changes the table; the statistics collector can lag a few
+    seconds behind a commit.
+    """
+    cursor.execute('''
+        SELECT relname, n_tup_ins + n_tup_upd + n_tup_del
+        FROM pg_stat_user_tables
+        WHERE relname = ANY(%s)
+        ORDER BY relname
+    ''', (list(tables),))
+    return tuple(tuple(row.values()) if isinstance(row, dict) else tuple(row) for row in cursor.fetchall())
+
+
+def get_stats():
+    """Counters for /admin/api/http_cache_stats"""
+    checks = _stats['checks']
+    return {
+        'enabled': HTTP_CONDITIONAL_ENABLED,
+        'validator_ttl_seconds': HTTP_VALIDATOR_TTL,
+        'checks': checks,
+        'not_modified': _stats['not_modified'],
+        'not_modified_rate': round(_stats['not_modified'] / checks, 3) if checks else None,
+        'stamp_errors': _stats['stamp_errors'],
+    }
@@ -0,0 +1,396 @@
+"""
+In-process prefix index for /autocomplete
+
+Every keystroke in the search box used to cost a pooled connection and a
+round-trip, even with the trigram indexes behind it. This keeps the names
+people type towards - products, seller businesses and categories - in
+memory as a sorted array of normalized tokens searched with bisect, each
+token pointing at an entry that carries its popularity score:
+
+    tokens   ['dress', 'earrings', 'gold', 'red', 'sandals', ...]   (sorted)
+    entries  [<Red Dress>, <Gold Earrings>, <Gold Earrings>, ...]   (parallel)
+
+A query matches an entry when every typed word is a prefix of one of the
+entry's tokens ("gold ear" -> "Gold Hoop Earrings"); the best-scored
+matches win. Lookups never touch the database and take microseconds.
+
+The index is loaded in a background thread at startup and rebuilt every
+PREFIX_INDEX_REFRESH seconds to pick up popularity drift, new categories
+and renamed stores. Under the eventlet worker that thread is a green
+thread, so the CPU-bound part of a build runs on a real OS thread
+(eventlet.tpool) instead of holding the hub, and every request, for the
+seconds a large catalog takes. Product create/edit/delete update it in place. Until
+the first build finishes, and for queries with no prefix match (typos),
+/autocomplete falls back to the pg_trgm query.
+"""
+
+import os
+import re
+import sys
+import time
+import heapq
+import logging
+import threading
+import unicodedata
+from bisect import bisect_left
+from collections import OrderedDict, deque
+
+logger = logging.getLogger(__name__)
+
+PREFIX_INDEX_ENABLED = os.getenv('PREFIX_INDEX_ENABLED', 'true').lower() in ('1', 'true', 'yes')
+PREFIX_INDEX_REFRESH = float(os.getenv('PREFIX_INDEX_REFRESH', '600'))
+PREFIX_INDEX_MAX_RESULTS_CACHED = 2000
+# Above this many token hits a prefix is "broad" ("sa", "gol") and is answered
+# by walking each kind in popularity order until its limit is filled
+BROAD_PREFIX_TOKENS = 2000
+
+# Suggestions per kind, as returned by the trigram query
+LIMITS = {'product': 5, 'seller': 2, 'category': 2}
+
+
+class Entry:
+    """One suggestion: a product, seller business or category"""
+
+    __slots__ = ('kind', 'key', 'name', 'image_url', 'score', 'owner', 'tokens', 'text')
+
+    def __init__(self, kind, key, name, image_url, score, owner):
+        self.kind = kind
+        self.key = key
+        self.name = name
+        self.image_url = image_url
+        self.score = score or 0
+        self.owner = owner
+        self.tokens = tuple(sorted(set(tokenize(name))))
+        # " gold hoop earrings": a word prefixes a token iff " word" occurs in it
+        self.text = ' ' + ' '.join(self.tokens)
+
+    def suggestion(self):
+        suggestion = {'type': self.kind, 'name': self.name,
+                      'image_url': self.image_url or 'product-placeholder.svg'}
+        suggestion[{'product': 'product_key', 'seller': 'seller_email', 'category': 'category'}[self.kind]] = self.key
+        return suggestion
+
+
+def tokenize(text):
+    """Lowercased words with accents and apostrophes removed ("Tiffany's Café" -> tiffanys, cafe)"""
+    text = (text or '').lower()
+    if not text.isascii():
+        text = ''.join(ch for ch in unicodedata.normalize('NFKD', text) if not unicodedata.combining(ch))
+    # Interned: the same few thousand words repeat across the whole catalog
+    return [sys.intern(word) for word in re.findall(r'[^\W_]+', re.sub(r"['’]", '', text))]
+
+
+def _rank(entry):
+    return (-entry.score, entry.key)
+
+
+def _matches(entry, needles):
+    for needle in needles:
+        if needle not in entry.text:
+            return False
+    return True
+
+
+class PrefixIndex:
+    """
+    Sorted token array with parallel entry references, searched by prefix
+    range, plus each kind's entries in popularity order for broad prefixes
+    """
+
+    def __init__(self, entries=()):
+        self._lock = threading.Lock()
+        self._items = {}  # (kind, key) -> Entry
+        pairs = []
+        for entry in entries:
+            self._items[(entry.kind, entry.key)] = entry
+            pairs.extend((token, entry) for token in entry.tokens)
+        pairs.sort(key=lambda pair: pair[0])
+        self._tokens = [token for token, _ in pairs]
+        self._entries = [entry for _, entry in pairs]
+        self._ranks = {}  # kind -> sorted [(-score, key)]
+        self._ranked = {}  # kind -> entries in the same order
+        for entry in sorted(self._items.values(), key=_rank):
+            self._ranks.setdefault(entry.kind, []).append(_rank(entry))
+            self._ranked.setdefault(entry.kind, []).append(entry)
+        self._results = OrderedDict()
+        # Walking every object is as slow as a build, so it is done once here
+        self._memory_bytes = self._footprint()
+
+    def __len__(self):
+        return len(self._items)
+
+    def add(self, entry):
+        """Insert entry, replacing any entry of the same kind and key"""
+        with self._lock:
+            self._remove((entry.kind, entry.key))
+            self._items[(entry.kind, entry.key)] = entry
+            for token in entry.tokens:
+                position = bisect_left(self._tokens, token)
+                self._tokens.insert(position, token)
+                self._entries.insert(position, entry)
+            ranks = self._ranks.setdefault(entry.kind, [])
+            position = bisect_left(ranks, _rank(entry))
+            ranks.insert(position, _rank(entry))
+            self._ranked.setdefault(entry.kind, []).insert(position, entry)
+            self._results.clear()
+
+    def remove(self, kind, key):
+        with self._lock:
+            if self._remove((kind, key)):
+                self._results.clear()
+
+    def get(self, kind, key):
+        return self._items.get((kind, key))
+
+    def _remove(self, item_key):
+        entry = self._items.pop(item_key, None)
+        if entry is None:
+            return False
+        for token in entry.tokens:
+            position = bisect_left(self._tokens, token)
+            while position < len(self._tokens) and self._tokens[position] == token:
+                if self._entries[position] is entry:
+                    del self._tokens[position]
+                    del self._entries[position]
+                    break
+                position += 1
+        position = bisect_left(self._ranks[entry.kind], _rank(entry))
+        del self._ranks[entry.kind][position]
+        del self._ranked[entry.kind][position]
+        return True
+
+    def search(self, query, excluded=frozenset(), limits=LIMITS):
+        """
+        Best-scored entries of each kind whose tokens cover every word of query
+        by prefix, skipping entries owned by an excluded (flagged) seller.
+        Returns a list of Entry, products first.
+        """
+        words = sorted(set(tokenize(query)))
+        if not words:
+            return []
+        cache_key = (tuple(words), excluded)
+        with self._lock:
+            cached = self._results.get(cache_key)
+            if cached is not None:
+                self._results.move_to_end(cache_key)
+                return cached
+
+            # Token range of the most selective word; the others are checked per entry
+            ranges = []
+            for word in words:
+                start = bisect_left(self._tokens, word)
+                ranges.append((bisect_left(self._tokens, word + '\uffff', start) - start, start, word))
+            hits, start, first = min(ranges)
+            needles = [' ' + word for word in words]
+            rest = [needle for needle in needles if needle != ' ' + first]
+
+            results = []
+            if hits > BROAD_PREFIX_TOKENS:
+                # Many hits: the most popular entries match early, stop at each kind's limit
+                for kind, limit in limits.items():
+                    found = 0
+                    for entry in self._ranked.get(kind, ()):
+                        if entry.owner not in excluded and _matches(entry, needles):
+                            results.append(entry)
+                            found += 1
+                            if found == limit:
+                                break
+            else:
+                matches = {kind: {} for kind in limits}
+                for position in range(start, start + hits):
+                    entry = self._entries[position]
+                    if entry.kind in matches and entry.owner not in excluded and _matches(entry, rest):
+                        matches[entry.kind][id(entry)] = entry
+                for kind, limit in limits.items():
+                    results.extend(heapq.nsmallest(limit, matches[kind].values(), key=_rank))
+
+            self._results[cache_key] = results
+            while len(self._results) > PREFIX_INDEX_MAX_RESULTS_CACHED:
+                self._results.popitem(last=False)
+            return results
+
+    def memory_bytes(self):
+        """
+        Approximate footprint as built: the arrays, entries, their strings and
+        the lookup dict. Incremental add/remove since are not counted.
+        """
+        return self._memory_bytes
+
+    def _footprint(self):
+        seen = set()
+        total = 0
+
+        def size(obj):
+            nonlocal total
+            if id(obj) not in seen:
+                seen.add(id(obj))
+                total += sys.getsizeof(obj)
+
+        for container in (self._tokens, self._entries, self._items):
+            size(container)
+        for kind in self._ranks:
+            size(self._ranks[kind])
+            size(self._ranked[kind])
+            for rank in self._ranks[kind]:
+                size(rank)
+                size(rank[0])
+        for token in self._tokens:
+            size(token)
+        for item_key, entry in self._items.items():
+            size(item_key)
+            size(entry)
+            size(entry.tokens)
+            size(entry.text)
+            for value in (entry.kind, entry.key, entry.name, entry.image_url, entry.owner) + entry.tokens:
+                size(value)
+        return total
+
+    def token_count(self):
+        return len(self._tokens)
+
+
+_index = PrefixIndex()
+_state = {'built_at': None, 'building': False, 'build_seconds': None, 'builds': 0, 'build_errors': 0}
+# Incremental changes made while a rebuild is loading, replayed onto the new index
+_pending = []
+_state_lock = threading.Lock()
+_latencies_us = deque(maxlen=1000)
+_stats = {'lookups': 0, 'answered': 0, 'updates': 0}
+
+
+def is_ready():
+    return PREFIX_INDEX_ENABLED and _state['built_at'] is not None
+
+
+def _offload(function, *args):
+    """
+    function(*args) on a real OS thread when eventlet has patched threading
+    (gunicorn eventlet worker), so pure-Python work doesn't block the hub;
+    a plain call otherwise
+    """
+    try:
+        import eventlet.patcher
+        import eventlet.tpool
+    except ImportError:
+        return function(*args)
+    if not eventlet.patcher.is_monkey_patched('thread'):
+        return function(*args)
+    return eventlet.tpool.execute(function, *args)
+
+
+def _new_index(rows):
+    return PrefixIndex(Entry(*row) for row in rows if row[2])
+
+
+def build(rows):
+    """
+    Replace the index with rows of (kind, key, name, image_url, score, owner).
+    Changes applied while the rows were being loaded are replayed on top.
+    """
+    global _index
+    start = time.monotonic()
+    index = _offload(_new_index, rows)
+    with _state_lock:
+        for change in _pending:
+            change(index)
+        _pending.clear()
+        _index = index
+        _state['built_at'] = time.monotonic()
+        _state['build_seconds'] = round(time.monotonic() - start, 3)
+        _state['builds'] += 1
+    return index
+
+
+def _rebuild(loader):
+    try:
+        start = time.monotonic()
+        index = build(loader())
+        logger.info(f"🔤 Prefix index built: {len(index):,} entries, {index.token_count():,} tokens "
+                    f"in {time.monotonic() - start:.2f}s")
+    except Exception as e:
+        _state['build_errors'] += 1
+        logger.error(f"Error building prefix index: {e}")
+    finally:
+        with _state_lock:
+            _state['building'] = False
+            _pending.clear()
+
+
+def ensure_fresh(loader):
+    """
+    Start a background (re)build from loader() if the index has never been
+    built or is older than PREFIX_INDEX_REFRESH. Cheap to call per request.
+    """
+    if not PREFIX_INDEX_ENABLED or _state['building']:
+        return
+    built_at = _state['built_at']
+    if built_at is not None and time.monotonic() - built_at < PREFIX_INDEX_REFRESH:
+        return
+    with _state_lock:
+        if _state['building']:
+            return
+        _state['building'] = True
+    threading.Thread(target=_rebuild, args=(loader,), name='prefix-index-build', daemon=True).start()
+
+
+def _apply(change):
+    """Apply change(index) now, and again to a rebuild that is still loading"""
+    _stats['updates'] += 1
+    with _state_lock:
+        change(_index)
+        if _state['building']:
+            _pending.append(change)
+
+
+def add_product(product_key, name, image_url, seller_email, score=None):
+    """Call after creating or editing a product; score=None keeps the current popularity"""
+    def change(index):
+        current = index.get('product', product_key)
+        index.add(Entry('product', product_key, name, image_url,
+                        (current.score if current else 0) if score is None else score, seller_email))
+    _apply(change)
+
+
+def remove_product(product_key):
+    """Call after deleting a product"""
+    _apply(lambda index: index.remove('product', product_key))
+
+
+def search(query, excluded=frozenset()):
+    """Suggestion dicts for query (same shape as autocomplete_suggestions), or [] if nothing matches"""
+    start = time.perf_counter()
+    _stats['lookups'] += 1
+    suggestions = [entry.suggestion() for entry in _index.search(query, excluded)]
+    if suggestions:
+        _stats['answered'] += 1
+    _latencies_us.append((time.perf_counter() - start) * 1_000_000)
+    return suggestions
+
+
+def get_stats():
+    """Size, memory footprint, build age and lookup latency for /admin/api/autocomplete_stats"""
+    index = _index
+    kinds = {kind: len(entries) for kind, entries in index._ranked.items()}
+    latencies = sorted(_latencies_us)
+    built_at = _state['built_at']
+    stats = {
+        'enabled': PREFIX_INDEX_ENABLED,
+        'ready': is_ready(),
+        'building': _state['building'],
+        'entries': kinds,
+        'tokens': index.token_count(),
+        'memory_bytes': index.memory_bytes(),
+        'age_seconds': round(time.monotonic() - built_at, 1) if built_at is not None else None,
+        'refresh_seconds': PREFIX_INDEX_REFRESH,
+        'build_seconds': _state['build_seconds'],
+        'builds': _state['builds'],
+        'build_errors': _state['build_errors'],
+        'updates': _stats['updates'],
+        'lookups': _stats['lookups'],
+        'answered': _stats['answered'],
+    }
+    if latencies:
+        stats['p50_us'] = round(latencies[len(latencies) // 2], 1)
+        stats['p99_us'] = round(latencies[min(int(len(latencies) * 0.99), len(latencies) - 1)], 1)
+    stats['memory_mb'] = round(stats['memory_bytes'] / (1024 * 1024), 2)
+    return stats
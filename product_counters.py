@@ -0,0 +1,61 @@
+"""
+Write-behind product counters for Zo-Zi Marketplace
+
+Page views, likes and sales used to bump products.clicks / likes / sold
+with an UPDATE inside the request, taking a row lock on the most viewed
+rows of the busiest table - a viral product's page views queued up behind
+each other on it. add() now only adds to an in-memory total per product
+key; a background flusher hands the totals to the writer registered with
+init_product_counters() (database_postgres.save_product_counters: one
+UPDATE ... FROM (VALUES ...) for the whole batch, which also moves
+popularity_score through its trigger).
+
+The buffer is a write_behind.WriteBehindCounters: one entry per product
+touched since the last flush, so it is bounded by the catalog. A failed
+flush puts its totals back to be retried; whatever is buffered at shutdown
+is flushed from an atexit hook.
+"""
+
+import os
+
+from write_behind import WriteBehindCounters
+
+PRODUCT_COUNTERS_FLUSH_INTERVAL = float(os.getenv('PRODUCT_COUNTERS_FLUSH_INTERVAL', '5'))
+PRODUCT_COUNTERS_BATCH_SIZE = int(os.getenv('PRODUCT_COUNTERS_BATCH_SIZE', '1000'))
+
+COUNTERS = ('clicks', 'likes', 'sold')
+
+_counters = WriteBehindCounters('product-counters', 'product counters', PRODUCT_COUNTERS_FLUSH_INTERVAL,
+                                PRODUCT_COUNTERS_BATCH_SIZE, COUNTERS)
+
+
+def is_active():
+    """True once a writer is registered (PostgreSQL)"""
+    return _counters.is_active()
+
+
+def add(product_key, clicks=0, likes=0, sold=0):
+    """Add to a product's counters; written by the next flush, never by the caller"""
+    if not is_active() or not product_key or not (clicks or likes or sold):
+        return
+    _counters.add(product_key, clicks=clicks, likes=likes, sold=sold)
+
+
+def pending(product_key):
+    """{'clicks', 'likes', 'sold'} not yet written for product_key, to add to what the database returns"""
+    return _counters.pending(product_key)
+
+
+def flush():
+    """Write every buffered total, in batches of PRODUCT_COUNTERS_BATCH_SIZE; returns the number of products written"""
+    return _counters.flush()
+
+
+def init_product_counters(writer):
+    """Register writer(rows) - rows are (product_key, clicks, likes, sold) increments"""
+    _counters.init(writer)
+
+
+def get_stats():
+    """Buffer and flush counters for /admin/api/write_behind_stats"""
+    return dict(_counters.stats(), buffered_products=len(_counters))
@@ -0,0 +1,138 @@
+"""
+Product rows for Zo-Zi Marketplace
+
+Every products query goes through fetch_products() / fetch_product() instead of
+building a dict per row and decoding the JSON columns by hand.
+
+A Product keeps the row tuple exactly as the cursor returned it, plus a column
+map shared by every row of the same result set. Listing pages that render
+thousands of products therefore allocate one small object per row, and the
+image_urls / sizes JSON is only parsed when something actually reads it (the
+homepage and search grid never do).
+
+Products behave like the dicts they replace: product['name'], product.get(),
+product['avg_rating'] = ..., dict(product), and attribute access in templates.
+"""
+
+import json
+
+# JSON columns and the empty value each one decodes to
+JSON_FIELDS = {
+    'image_urls': list,
+    'sizes': dict,
+}
+
+
+def decode_json_field(value, kind):
+    """
+    Decode a JSON column into `kind` (list or dict)
+
+    PostgreSQL JSONB comes back already parsed; TEXT columns (SQLite and older
+    PostgreSQL schemas) come back as strings. Anything unparseable or of the
+    wrong shape decodes to an empty value rather than breaking the page.
+    """
+    if isinstance(value, kind):
+        return value
+    if isinstance(value, str) and value:
+        try:
+            value = json.loads(value)
+        except ValueError:
+            return kind()
+        if isinstance(value, kind):
+            return value
+    return kind()
+
+
+class Product:
+    """A products row, decoded lazily"""
+
+    __slots__ = ('_row', '_columns', '_extra')
+
+    def __init__(self, row, columns):
+        self._row = row          # values in column order
+        self._columns = columns  # {column name: index}, shared by the result set
+        self._extra = None       # decoded JSON fields and values set after loading
+
+    def __getitem__(self, key):
+        extra = self._extra
+        if extra is not None and key in extra:
+            return extra[key]
+        value = self._row[self._columns[key]]
+        kind = JSON_FIELDS.get(key)
+        if kind is not None:
+            value = decode_json_field(value, kind)
+            self[key] = value
+        return value
+
+    def __setitem__(self, key, value):
+        if self._extra is None:
+            self._extra = {}
+        self._extra[key] = value
+
+    def __getattr__(self, name):
+        # Only reached when normal lookup fails; lets templates use product.name
+        if name.startswith('_'):
+            raise AttributeError(name)
+        try:
+            return self[name]
+        except KeyError:
+            raise AttributeError(name) from None
+
+    def __contains__(self, key):
+        return key in self._columns or (self._extra is not None and key in self._extra)
+
+    def __iter__(self):
+        return iter(self.keys())
+
+    def __len__(self):
+        return len(self.keys())
+
+    def __repr__(self):
+        return f"<Product {self.get('product_key')!r}>"
+
+    def get(self, key, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def keys(self):
+        if not self._extra:
+            return list(self._columns)
+        return list(self._columns) + [k for k in self._extra if k not in self._columns]
+
+    def values(self):
+        return [self[k] for k in self.keys()]
+
+    def items(self):
+        return [(k, self[k]) for k in self.keys()]
+
+    def to_dict(self):
+        """Plain dict with the JSON fields decoded (for jsonify / session storage)"""
+        return {k: self[k] for k in self.keys()}
+
+
+def _column_map(cursor):
+    return {column[0]: index for index, column in enumerate(cursor.description)}
+
+
+def _values(row):
+    # Dict cursors (RealDictCursor) keep column order; tuple cursors and sqlite3.Row index directly
+    return tuple(row.values()) if isinstance(row, dict) else row
+
+
+def fetch_products(cursor):
+    """All remaining rows of a products query as Product objects"""
+    rows = cursor.fetchall()
+    if not rows:
+        return []
+    columns = _column_map(cursor)
+    return [Product(_values(row), columns) for row in rows]
+
+
+def fetch_product(cursor):
+    """The next row of a products query as a Product, or None"""
+    row = cursor.fetchone()
+    if row is None:
+        return None
+    return Product(_values(row), _column_map(cursor))
@@ -0,0 +1,56 @@
+"""
+Product view tracking for Zo-Zi Marketplace personalization
+
+Every logged-in product page view used to insert its own row into
+user_product_views on a connection of its own. record() now appends the
+view to an in-process queue, and a background flusher hands batches to the
+writer registered with init_product_views() (database_postgres.
+save_product_views: one execute_values insert per batch). The flusher runs
+every PRODUCT_VIEWS_FLUSH_INTERVAL seconds, or as soon as a full batch is
+waiting.
+
+The queue is a write_behind.WriteBehindQueue: bounded, so when the
+database falls behind new views are dropped and counted instead of slowing
+down the page. Flush latency and batch sizes are kept for
+/admin/api/write_behind_stats; whatever is queued at shutdown is flushed
+from an atexit hook.
+"""
+
+import os
+from datetime import datetime
+
+from write_behind import WriteBehindQueue
+
+PRODUCT_VIEWS_FLUSH_INTERVAL = float(os.getenv('PRODUCT_VIEWS_FLUSH_INTERVAL', '2'))
+PRODUCT_VIEWS_BATCH_SIZE = int(os.getenv('PRODUCT_VIEWS_BATCH_SIZE', '500'))
+PRODUCT_VIEWS_QUEUE_MAX = int(os.getenv('PRODUCT_VIEWS_QUEUE_MAX', '10000'))
+
+_queue = WriteBehindQueue('product-views', 'product views', PRODUCT_VIEWS_FLUSH_INTERVAL,
+                          PRODUCT_VIEWS_BATCH_SIZE, PRODUCT_VIEWS_QUEUE_MAX)
+
+
+def is_active():
+    """True once a writer is registered (PostgreSQL)"""
+    return _queue.is_active()
+
+
+def record(user_email, product_key, category):
+    """Queue one product view; never touches the database or waits for it"""
+    if not is_active() or not user_email or not product_key:
+        return
+    _queue.append((user_email, product_key, category, datetime.now()))
+
+
+def flush():
+    """Write everything queued, in batches of PRODUCT_VIEWS_BATCH_SIZE; returns the number of views written"""
+    return _queue.flush()
+
+
+def init_product_views(writer):
+    """Register writer(views) - views are (user_email, product_key, category, viewed_at) tuples"""
+    _queue.init(writer)
+
+
+def get_stats():
+    """Queue depth, drops, and flush latency / batch size percentiles over recent flushes"""
+    return dict(_queue.stats(), queued=len(_queue), queue_max=PRODUCT_VIEWS_QUEUE_MAX)
@@ -0,0 +1,273 @@
+#!/usr/bin/env python3
+"""
+Precompute the related products shown on /product/<key>.
+
+Item-to-item cosine similarity over who viewed (user_product_views, last
+RELATED_WINDOW_DAYS days) and who bought (order_items) each product. A
+purchase counts RELATED_PURCHASE_WEIGHT times a view. The user x product
+matrix is kept as sparse coordinate arrays, and its co-occurrence product
+(X^T X) is built in NumPy, a chunk of products at a time. Each product's
+top RELATED_TOP_K neighbours go into product_related, which
+database_postgres.get_related_products() reads through the primary key.
+
+A full run replaces the whole table; run it nightly. --incremental only
+looks at views and purchases since the last run (product_related_state).
+It recomputes the products touched by the shoppers behind those events
+and leaves every other product's neighbours as they are, so it is cheap
+to run every few minutes. Views that age out of the window are only
+dropped by the next full run.
+
+Usage:
+    DATABASE_URL=postgresql://... python related_products.py [--incremental] [--top-k 12]
+"""
+
+import argparse
+import os
+import time
+
+import numpy as np
+import psycopg2.extras
+
+from database_postgres import get_db
+
+RELATED_TOP_K = int(os.getenv('RELATED_TOP_K', '12'))
+RELATED_WINDOW_DAYS = int(os.getenv('RELATED_WINDOW_DAYS', '90'))
+RELATED_PURCHASE_WEIGHT = float(os.getenv('RELATED_PURCHASE_WEIGHT', '3'))
+# Only a shopper's most weighted products count, so a few heavy browsers can't dominate every pair
+RELATED_MAX_ITEMS_PER_USER = int(os.getenv('RELATED_MAX_ITEMS_PER_USER', '100'))
+# Upper bound on co-occurrence pairs held in memory at once
+RELATED_PAIR_BUDGET = int(os.getenv('RELATED_PAIR_BUDGET', '5000000'))
+
+# One weight per (shopper, product): a purchase outweighs any number of views
+INTERACTIONS_SQL = '''
+    WITH interactions AS (
+        SELECT user_email, product_key, 1.0::float8 as weight
+        FROM user_product_views
+        WHERE viewed_at >= NOW() - %(window)s * INTERVAL '1 day' {views_filter}
+        UNION ALL
+        SELECT o.user_email, oi.product_key, %(purchase_weight)s::float8
+        FROM order_items oi
+        JOIN orders o ON o.order_id = oi.order_id
+        WHERE o.status NOT IN ('cancelled', 'refunded') {purchases_filter}
+    )
+    SELECT i.user_email, i.product_key, MAX(i.weight) as weight
+    FROM interactions i
+    JOIN products p ON p.product_key = i.product_key
+    GROUP BY i.user_email, i.product_key
+'''
+
+
+def load_interactions(cursor, users=None):
+    """(user_email, product_key, weight) rows, optionally only for the given shoppers"""
+    if users is None:
+        sql = INTERACTIONS_SQL.format(views_filter='', purchases_filter='')
+    else:
+        sql = INTERACTIONS_SQL.format(views_filter='AND user_email = ANY(%(users)s)',
+                                      purchases_filter='AND o.user_email = ANY(%(users)s)')
+    cursor.execute(sql, {'window': RELATED_WINDOW_DAYS, 'purchase_weight': RELATED_PURCHASE_WEIGHT,
+                         'users': users})
+    return cursor.fetchall()
+
+
+def load_item_norms(cursor):
+    """{product_key: sum of squared weights over every shopper} - the cosine denominators"""
+    interactions = INTERACTIONS_SQL.format(views_filter='', purchases_filter='')
+    cursor.execute(f'SELECT product_key, SUM(weight * weight) FROM ({interactions}) w GROUP BY product_key',
+                   {'window': RELATED_WINDOW_DAYS, 'purchase_weight': RELATED_PURCHASE_WEIGHT})
+    return dict(cursor.fetchall())
+
+
+def item_norms(rows):
+    """load_item_norms() from rows already loaded for every shopper"""
+    norms = {}
+    for _, product_key, weight in rows:
+        norms[product_key] = norms.get(product_key, 0.0) + weight * weight
+    return norms
+
+
+def to_arrays(rows):
+    """
+    Sparse user x product matrix as coordinate arrays sorted by shopper:
+    (users, items, weights, product keys), capped at
+    RELATED_MAX_ITEMS_PER_USER products per shopper
+    """
+    _, users = np.unique(np.array([row[0] for row in rows], dtype=object), return_inverse=True)
+    product_keys, items = np.unique(np.array([row[1] for row in rows], dtype=object), return_inverse=True)
+    weights = np.array([row[2] for row in rows], dtype=np.float64)
+
+    order = np.lexsort((-weights, users))
+    users, items, weights = users[order], items[order], weights[order]
+    starts = _segment_starts(users)
+    position = np.arange(len(users)) - np.repeat(starts, np.diff(np.r_[starts, len(users)]))
+    keep = position < RELATED_MAX_ITEMS_PER_USER
+    return users[keep], items[keep], weights[keep], product_keys
+
+
+def _segment_starts(sorted_values):
+    return np.flatnonzero(np.r_[True, sorted_values[1:] != sorted_values[:-1]])
+
+
+def cooccurrence(users, items, weights, n_items, left_items):
+    """
+    Entries of X^T X for the rows in left_items (a boolean mask over
+    products): arrays (a, b, sum over shoppers of weight_a * weight_b),
+    a != b. Every pair of products a shopper touched is expanded with
+    repeat/offset arithmetic instead of a Python loop per shopper.
+    """
+    starts = _segment_starts(users)
+    lengths = np.diff(np.r_[starts, len(users)])
+    segment_start = np.repeat(starts, lengths)
+    segment_length = np.repeat(lengths, lengths)
+
+    left = np.flatnonzero(left_items[items])
+    reps = segment_length[left]
+    left = np.repeat(left, reps)
+    right = segment_start[left] + (np.arange(len(left)) - np.repeat(np.cumsum(reps) - reps, reps))
+    distinct = items[left] != items[right]
+    left, right = left[distinct], right[distinct]
+
+    pairs, inverse = np.unique(items[left].astype(np.int64) * n_items + items[right], return_inverse=True)
+    scores = np.bincount(inverse, weights=weights[left] * weights[right])
+    return pairs // n_items, pairs % n_items, scores
+
+
+def top_k(a, b, scores, k):
+    """Keep the k highest-scoring b per a; returns (a, rank, b, score) arrays"""
+    order = np.lexsort((b, -scores, a))
+    a, b, scores = a[order], b[order], scores[order]
+    starts = _segment_starts(a)
+    rank = np.arange(len(a)) - np.repeat(starts, np.diff(np.r_[starts, len(a)]))
+    keep = rank < k
+    return a[keep], rank[keep], b[keep], scores[keep]
+
+
+def _chunks(users, items, n_items, targets):
+    """Split the target products into masks whose pair expansion fits RELATED_PAIR_BUDGET"""
+    starts = _segment_starts(users)
+    lengths = np.diff(np.r_[starts, len(users)])
+    pair_counts = np.bincount(items, weights=np.repeat(lengths, lengths), minlength=n_items)
+    target_ids = np.flatnonzero(targets)
+    chunk_of = (np.cumsum(pair_counts[target_ids]) // RELATED_PAIR_BUDGET).astype(np.int64)
+    for chunk in np.split(target_ids, np.flatnonzero(np.diff(chunk_of)) + 1):
+        if len(chunk):
+            mask = np.zeros(n_items, dtype=bool)
+            mask[chunk] = True
+            yield mask
+
+
+def compute(rows, norms, targets=None, k=RELATED_TOP_K):
+    """
+    Top-k neighbours per product from interaction rows; norms supplies the
+    cosine denominators. Only products in targets (keys) get neighbour
+    lists when given. Returns {product_key: [(related_key, score), ...]}.
+    """
+    if not rows:
+        return {}
+    users, items, weights, product_keys = to_arrays(rows)
+    n_items = len(product_keys)
+    norm = np.array([norms.get(key) or 0.0 for key in product_keys]) ** 0.5
+    wanted = np.ones(n_items, dtype=bool) if targets is None else np.isin(product_keys, list(targets))
+
+    related = {}
+    for mask in _chunks(users, items, n_items, wanted):
+        a, b, co = cooccurrence(users, items, weights, n_items, mask)
+        denominator = norm[a] * norm[b]
+        similarity = np.divide(co, denominator, out=np.zeros_like(co), where=denominator > 0)
+        for product, rank, neighbour, score in zip(*top_k(a, b, similarity, k)):
+            related.setdefault(product_keys[product], []).append((product_keys[neighbour], float(score)))
+    return related
+
+
+def watermark(cursor):
+    """The newest user_product_views and order_items ids this run covers"""
+    cursor.execute('''
+        SELECT (SELECT COALESCE(MAX(id), 0) FROM user_product_views),
+               (SELECT COALESCE(MAX(id), 0) FROM order_items)
+    ''')
+    return cursor.fetchone()
+
+
+def changed_shoppers(cursor, last_view_id, last_order_item_id, view_id, order_item_id):
+    """Shoppers with a view or purchase between the last run's watermark and this one's"""
+    cursor.execute('''
+        SELECT user_email FROM user_product_views WHERE id > %s AND id <= %s
+        UNION
+        SELECT o.user_email FROM order_items oi JOIN orders o ON o.order_id = oi.order_id
+        WHERE oi.id > %s AND oi.id <= %s
+    ''', (last_view_id, view_id, last_order_item_id, order_item_id))
+    return [row[0] for row in cursor.fetchall()]
+
+
+def shoppers_of(cursor, product_keys):
+    """Everyone who viewed (in the window) or bought any of product_keys"""
+    cursor.execute('''
+        SELECT user_email FROM user_product_views
+        WHERE product_key = ANY(%s) AND viewed_at >= NOW() - %s * INTERVAL '1 day'
+        UNION
+        SELECT o.user_email FROM order_items oi JOIN orders o ON o.order_id = oi.order_id
+        WHERE oi.product_key = ANY(%s)
+    ''', (product_keys, RELATED_WINDOW_DAYS, product_keys))
+    return [row[0] for row in cursor.fetchall()]
+
+
+def save(cursor, related, replace_all):
+    """Write neighbour lists into product_related, replacing the old rows for the same products"""
+    if replace_all:
+        # DELETE, not TRUNCATE: product pages keep reading the old rows until this commits
+        cursor.execute('DELETE FROM product_related')
+    elif related:
+        cursor.execute('DELETE FROM product_related WHERE product_key = ANY(%s)', (list(related),))
+    psycopg2.extras.execute_values(cursor, '''
+        INSERT INTO product_related (product_key, rank, related_key, score) VALUES %s
+    ''', [(product_key, rank, neighbour, score)
+          for product_key, neighbours in related.items()
+          for rank, (neighbour, score) in enumerate(neighbours)], page_size=1000)
+
+
+def refresh(cursor, incremental=False, k=RELATED_TOP_K):
+    """Recompute product_related (all of it, or what changed since the last run); returns products written"""
+    cursor.execute('SELECT last_view_id, last_order_item_id FROM product_related_state')
+    state = cursor.fetchone()
+    # The first run is always a full one
+    incremental = incremental and state is not None
+    view_id, order_item_id = watermark(cursor)
+    if incremental:
+        shoppers = changed_shoppers(cursor, *state, view_id, order_item_id)
+        if not shoppers:
+            return 0
+        # Every product those shoppers touched may have gained or changed a pair
+        touched = {row[1] for row in load_interactions(cursor, shoppers)}
+        rows = load_interactions(cursor, shoppers_of(cursor, list(touched)))
+        related = compute(rows, load_item_norms(cursor), targets=touched, k=k)
+        # A touched product that lost all its neighbours gets an empty list
+        related = {key: related.get(key, []) for key in touched}
+    else:
+        rows = load_interactions(cursor)
+        related = compute(rows, item_norms(rows), k=k)
+    save(cursor, related, replace_all=not incremental)
+    cursor.execute('''
+        INSERT INTO product_related_state (id, last_view_id, last_order_item_id, refreshed_at)
+        VALUES (true, %s, %s, NOW())
+        ON CONFLICT (id) DO UPDATE SET last_view_id = EXCLUDED.last_view_id,
+            last_order_item_id = EXCLUDED.last_order_item_id, refreshed_at = EXCLUDED.refreshed_at
+    ''', (view_id, order_item_id))
+    return len(related)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Precompute related products")
+    parser.add_argument('--incremental', action='store_true', help='only products affected since the last run')
+    parser.add_argument('--top-k', type=int, default=RELATED_TOP_K, help='neighbours kept per product')
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    with get_db(independent=True) as conn:
+        cursor = conn.cursor()
+        count = refresh(cursor, incremental=args.incremental, k=args.top_k)
+        conn.commit()
+    mode = 'incremental' if args.incremental else 'full'
+    print(f"✅ Related products ({mode}): {count:,} products updated in {time.perf_counter() - start:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
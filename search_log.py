@@ -0,0 +1,75 @@
+"""
+Search query log for Zo-Zi Marketplace
+
+Records what shoppers type into /search and /autocomplete, how many
+results they got, and which results they opened, without adding a write
+to the request: record() appends to an in-memory buffer, and a background
+flusher hands batches to the writer registered with init_search_log()
+(database_postgres.save_search_log: one execute_values insert into
+search_queries plus an upsert of the per-day rollup the admin report
+reads).
+
+The buffer is a write_behind.WriteBehindQueue: bounded, so when the
+database falls behind new events are dropped and counted rather than
+growing memory, and flushed once more at shutdown.
+"""
+
+import os
+import re
+from datetime import datetime
+
+from write_behind import WriteBehindQueue
+
+SEARCH_LOG_ENABLED = os.getenv('SEARCH_LOG_ENABLED', 'true').lower() in ('1', 'true', 'yes')
+SEARCH_LOG_FLUSH_INTERVAL = float(os.getenv('SEARCH_LOG_FLUSH_INTERVAL', '5'))
+SEARCH_LOG_BATCH_SIZE = int(os.getenv('SEARCH_LOG_BATCH_SIZE', '1000'))
+SEARCH_LOG_BUFFER_MAX = int(os.getenv('SEARCH_LOG_BUFFER_MAX', '20000'))
+MAX_QUERY_LENGTH = 200
+
+# Event kinds
+SEARCH = 'search'
+AUTOCOMPLETE = 'autocomplete'
+SEARCH_CLICK = 'search_click'
+AUTOCOMPLETE_CLICK = 'autocomplete_click'
+
+_buffer = WriteBehindQueue('search-log', 'search log events', SEARCH_LOG_FLUSH_INTERVAL,
+                           SEARCH_LOG_BATCH_SIZE, SEARCH_LOG_BUFFER_MAX)
+
+
+def normalize(query):
+    """Lowercased, whitespace-collapsed query, so "Red  Dress" and "red dress" roll up together"""
+    return re.sub(r'\s+', ' ', (query or '').strip().lower())[:MAX_QUERY_LENGTH]
+
+
+def is_active():
+    """True once a writer is registered (PostgreSQL) and logging is enabled"""
+    return SEARCH_LOG_ENABLED and _buffer.is_active()
+
+
+def record(kind, query, results=None, target=None):
+    """
+    Buffer one event: a search or autocomplete with its result count, or a
+    click from one (target is what was opened, e.g. 'product:<key>').
+    Never touches the database.
+    """
+    if not is_active():
+        return
+    query = normalize(query)
+    if not query:
+        return
+    _buffer.append((datetime.now(), query, kind, results, target))
+
+
+def flush():
+    """Write everything buffered, in batches of SEARCH_LOG_BATCH_SIZE; returns the number of events written"""
+    return _buffer.flush()
+
+
+def init_search_log(writer):
+    """Register writer(events) - events are (created_at, query, kind, results, target) tuples"""
+    _buffer.init(writer)
+
+
+def get_stats():
+    """Buffer and flush counters for /admin/api/search_queries"""
+    return dict(_buffer.stats(), enabled=SEARCH_LOG_ENABLED, buffered=len(_buffer), buffer_max=SEARCH_LOG_BUFFER_MAX)
@@ -0,0 +1,16 @@
+"""
+/search settings shared by both database backends and app.py
+
+database_postgres.search_products() turns SEARCH_PRICE_BUCKETS into its
+width_bucket() array, database.search_products() (SQLite) into price
+ranges, and app.py into the price facet labels, so they are defined once
+here. Nothing in this module touches a database driver.
+"""
+
+import os
+
+# Search results per page (/search and its infinite scroll)
+SEARCH_PAGE_SIZE = int(os.getenv('SEARCH_PAGE_SIZE', '48'))
+
+# Lower bounds (JMD) of the /search price facet buckets; the last is open-ended
+SEARCH_PRICE_BUCKETS = (0, 1000, 2500, 5000, 10000)
@@ -0,0 +1,233 @@
+#!/usr/bin/env python3
+"""
+Seed a large synthetic catalog for index checks and benchmarks.
+
+Everything created here uses a 'seed-' prefix (product keys, emails, order ids)
+so it can be removed again with --clear. Run it against a scratch database,
+never production.
+
+Usage:
+    DATABASE_URL=postgresql://... python seed_catalog.py --products 100000
+    DATABASE_URL=postgresql://... python seed_catalog.py --clear
+"""
+
+import argparse
+import time
+
+import psycopg2
+
+from database_postgres import get_db
+
+CATEGORIES = [
+    'Accessories', 'Baby & Maternity', 'Beachwear', 'Beauty & Health', 'Home & Kitchen',
+    'Jewelry', 'Kids', 'Men Clothing', 'Shoes', 'Sports & Outdoors',
+    'Underwear & Sleepwear', 'Women Clothing'
+]
+
+ADJECTIVES = ['Red', 'Blue', 'Black', 'White', 'Gold', 'Vintage', 'Classic', 'Summer', 'Island', 'Yaad']
+
+NOUNS = [
+    'Dress', 'Sandals', 'Bikini', 'Earrings', 'Backpack', 'Sneakers', 'Jerk Seasoning', 'Face Roller',
+    'Dumbbell', 'Bra', 'Lip Gloss', 'T-Shirt', 'Jeans', 'Bucket Hat', 'Necklace', 'Baby Onesie',
+    'Blender', 'Yoga Mat', 'Watch', 'Perfume'
+]
+
+PARISHES = ['Kingston', 'Saint Andrew', 'Saint Catherine', 'Saint James', 'Manchester', 'Saint Ann']
+
+
+def _sql_array(values):
+    return "ARRAY[" + ", ".join("'" + v.replace("'", "''") + "'" for v in values) + "]"
+
+
+def _table_exists(cursor, table):
+    cursor.execute('SELECT to_regclass(%s) IS NOT NULL', (table,))
+    return cursor.fetchone()[0]
+
+
+def _optional(cursor, table, sql, params):
+    """Seed a table that not every deployment has (or has with different columns)"""
+    if not _table_exists(cursor, table):
+        print(f"   ⚠ {table}: table missing, skipped")
+        return
+    cursor.execute('SAVEPOINT seed_optional')
+    try:
+        cursor.execute(sql, params)
+        cursor.execute('RELEASE SAVEPOINT seed_optional')
+        print(f"   ✓ {table}: {cursor.rowcount} rows")
+    except psycopg2.Error as e:
+        cursor.execute('ROLLBACK TO SAVEPOINT seed_optional')
+        print(f"   ⚠ {table}: skipped ({str(e).strip().splitlines()[0]})")
+
+
+def seed(cursor, products=100000):
+    """Insert `products` seed products plus proportional users, orders, reviews, views..."""
+    sellers = max(products // 100, 1)
+    buyers = max(products // 20, 1)
+    categories = _sql_array(CATEGORIES)
+    adjectives = _sql_array(ADJECTIVES)
+    nouns = _sql_array(NOUNS)
+    parishes = _sql_array(PARISHES)
+
+    cursor.execute(f'''
+        INSERT INTO users (email, password, first_name, last_name, is_seller, business_name, parish)
+        SELECT 'seed-seller-' || i || '@example.com', 'x', 'Seed', 'Seller ' || i, TRUE,
+               'Seed Shop ' || i, ({parishes})[1 + i %% {len(PARISHES)}]
+        FROM generate_series(1, %s) AS i
+        UNION ALL
+        SELECT 'seed-buyer-' || i || '@example.com', 'x', 'Seed', 'Buyer ' || i, FALSE,
+               NULL, ({parishes})[1 + i %% {len(PARISHES)}]
+        FROM generate_series(1, %s) AS i
+        ON CONFLICT (email) DO NOTHING
+    ''', (sellers, buyers))
+    print(f"   ✓ users: {cursor.rowcount} rows")
+
+    cursor.execute(f'''
+        INSERT INTO products (product_key, seller_email, name, description, price, category,
+                              sizes, image_urls, image_url, clicks, likes, sold, amount,
+                              shipping_method, cod_available, posted_date)
+        SELECT 'seed-product-' || i,
+               'seed-seller-' || (1 + i %% %s) || '@example.com',
+               ({adjectives})[1 + i %% {len(ADJECTIVES)}] || ' ' || ({nouns})[1 + (i / 7) %% {len(NOUNS)}] || ' ' || i,
+               'Seeded product ' || i || ' - nice quality, ships island wide',
+               (500 + (i * 37) %% 20000)::numeric,
+               ({categories})[1 + i %% {len(CATEGORIES)}],
+               '{{}}'::jsonb, '["product-placeholder.svg"]'::jsonb, 'product-placeholder.svg',
+               (random() * 2000)::int, (random() * 300)::int, (random() * 100)::int,
+               (random() * 50)::int,
+               CASE WHEN i %% 5 = 0 THEN 'free' ELSE 'standard' END,
+               i %% 3 <> 0,
+               NOW() - (i %% 365) * INTERVAL '1 day'
+        FROM generate_series(1, %s) AS i
+        ON CONFLICT (product_key) DO NOTHING
+    ''', (sellers, products))
+    print(f"   ✓ products: {cursor.rowcount} rows")
+
+    orders = max(products // 2, 1)
+    cursor.execute('''
+        INSERT INTO orders (order_id, user_email, total, status, payment_method, order_date)
+        SELECT 'seed-order-' || i, 'seed-buyer-' || (1 + i %% %s) || '@example.com',
+               (1000 + i %% 9000)::numeric,
+               (ARRAY['pending', 'shipped', 'delivered', 'cancelled'])[1 + i %% 4],
+               'cod', NOW() - (i %% 365) * INTERVAL '1 day'
+        FROM generate_series(1, %s) AS i
+        ON CONFLICT (order_id) DO NOTHING
+    ''', (buyers, orders))
+    print(f"   ✓ orders: {cursor.rowcount} rows")
+
+    cursor.execute('''
+        INSERT INTO order_items (order_id, product_key, quantity, price)
+        SELECT 'seed-order-' || (1 + i %% %s), 'seed-product-' || (1 + (i * 7919) %% %s), 1 + i %% 3, 1000
+        FROM generate_series(1, %s) AS i
+    ''', (orders, products, orders * 2))
+    print(f"   ✓ order_items: {cursor.rowcount} rows")
+
+    cursor.execute('''
+        INSERT INTO product_reviews (product_key, buyer_email, seller_email, rating, review_text, created_at)
+        SELECT 'seed-product-' || i, 'seed-buyer-' || (1 + (i * 7) %% %s) || '@example.com',
+               'seed-seller-' || (1 + i %% %s) || '@example.com',
+               1 + i %% 5, 'Seeded review ' || i, NOW() - (i %% 365) * INTERVAL '1 day'
+        FROM generate_series(1, %s) AS i
+        ON CONFLICT (product_key, buyer_email) DO NOTHING
+    ''', (buyers, sellers, products))
+    print(f"   ✓ product_reviews: {cursor.rowcount} rows")
+
+    cursor.execute(f'''
+        INSERT INTO user_product_views (user_email, product_key, category, viewed_at)
+        SELECT 'seed-buyer-' || (1 + i %% %s) || '@example.com', 'seed-product-' || (1 + (i * 31) %% %s),
+               ({categories})[1 + ((i * 31) %% %s + 1) %% {len(CATEGORIES)}],
+               NOW() - (i %% 10000) * INTERVAL '1 minute'
+        FROM generate_series(1, %s) AS i
+    ''', (buyers, products, products, products * 2))
+    print(f"   ✓ user_product_views: {cursor.rowcount} rows")
+
+    conversations = max(products // 10, 1)
+    _optional(cursor, 'conversations', '''
+        INSERT INTO conversations (buyer_email, seller_email, created_at, last_message_at)
+        SELECT 'seed-buyer-' || (1 + i %% %s) || '@example.com', 'seed-seller-' || (1 + i %% %s) || '@example.com',
+               NOW() - i * INTERVAL '1 minute', NOW() - i * INTERVAL '1 minute'
+        FROM generate_series(1, %s) AS i
+        ON CONFLICT DO NOTHING
+    ''', (buyers, sellers, conversations))
+    _optional(cursor, 'messages', '''
+        INSERT INTO messages (conversation_id, sender_email, receiver_email, message, timestamp, read_status)
+        SELECT c.id, c.buyer_email, c.seller_email, 'Seeded message ' || g, NOW() - g * INTERVAL '1 minute', g % 2 = 0
+        FROM conversations c CROSS JOIN generate_series(1, 5) AS g
+        WHERE c.buyer_email LIKE 'seed-%'
+    ''', None)
+    _optional(cursor, 'contact_messages', '''
+        INSERT INTO contact_messages (user_email, session_id, sender, message, timestamp, unread)
+        SELECT 'seed-buyer-' || (1 + i %% %s) || '@example.com', 'seed-session-' || (i / 4),
+               CASE WHEN i %% 2 = 0 THEN 'user' ELSE 'agent' END, 'Seeded contact message ' || i,
+               NOW() - i * INTERVAL '1 minute', i %% 3 = 0
+        FROM generate_series(1, %s) AS i
+    ''', (buyers, max(products // 5, 1)))
+    _optional(cursor, 'sales_log', '''
+        INSERT INTO sales_log (seller_email, product_key, quantity, price, sale_date, buyer_email)
+        SELECT 'seed-seller-' || (1 + i %% %s) || '@example.com', 'seed-product-' || (1 + i %% %s), 1 + i %% 3, 1000,
+               NOW() - (i %% 365) * INTERVAL '1 day', 'seed-buyer-' || (1 + i %% %s) || '@example.com'
+        FROM generate_series(1, %s) AS i
+    ''', (sellers, products, buyers, products))
+    _optional(cursor, 'seller_notifications', '''
+        INSERT INTO seller_notifications (seller_email, notification_type, product_key, product_name, quantity,
+                                          is_read, created_at)
+        SELECT 'seed-seller-' || (1 + i %% %s) || '@example.com', 'sale', 'seed-product-' || (1 + i %% %s),
+               'Seed product ' || i, 1, i %% 4 <> 0, NOW() - i * INTERVAL '1 minute'
+        FROM generate_series(1, %s) AS i
+    ''', (sellers, products, max(products // 2, 1)))
+    _optional(cursor, 'cart_log', '''
+        INSERT INTO cart_log (user_email, product_key, quantity)
+        SELECT 'seed-buyer-' || (1 + i %% %s) || '@example.com', 'seed-product-' || (1 + i %% %s), 1
+        FROM generate_series(1, %s) AS i
+    ''', (buyers, products, max(products // 10, 1)))
+
+    for table in ('users', 'products', 'orders', 'order_items', 'product_reviews', 'user_product_views'):
+        cursor.execute(f'ANALYZE {table}')
+    for table in ('conversations', 'messages', 'contact_messages', 'sales_log', 'seller_notifications', 'cart_log',
+                  'product_rating_summary'):
+        if _table_exists(cursor, table):
+            cursor.execute(f'ANALYZE {table}')
+
+
+def clear(cursor):
+    """Remove everything seed() created"""
+    statements = [
+        ('cart_log', "DELETE FROM cart_log WHERE user_email LIKE 'seed-%'"),
+        ('seller_notifications', "DELETE FROM seller_notifications WHERE seller_email LIKE 'seed-%'"),
+        ('sales_log', "DELETE FROM sales_log WHERE seller_email LIKE 'seed-%'"),
+        ('contact_messages', "DELETE FROM contact_messages WHERE user_email LIKE 'seed-%'"),
+        ('messages', "DELETE FROM messages WHERE sender_email LIKE 'seed-%'"),
+        ('conversations', "DELETE FROM conversations WHERE buyer_email LIKE 'seed-%'"),
+        ('user_product_views', "DELETE FROM user_product_views WHERE user_email LIKE 'seed-%'"),
+        ('product_reviews', "DELETE FROM product_reviews WHERE product_key LIKE 'seed-%'"),
+        ('product_rating_summary', "DELETE FROM product_rating_summary WHERE product_key LIKE 'seed-%'"),
+        ('order_items', "DELETE FROM order_items WHERE order_id LIKE 'seed-%'"),
+        ('orders', "DELETE FROM orders WHERE order_id LIKE 'seed-%'"),
+        ('products', "DELETE FROM products WHERE product_key LIKE 'seed-%'"),
+        ('users', "DELETE FROM users WHERE email LIKE 'seed-%'"),
+    ]
+    for table, sql in statements:
+        if _table_exists(cursor, table):
+            cursor.execute(sql)
+            print(f"   🗑️ {table}: {cursor.rowcount} rows")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Seed (or clear) a synthetic catalog in a scratch database")
+    parser.add_argument('--products', type=int, default=100000, help='number of products to create')
+    parser.add_argument('--clear', action='store_true', help='remove seeded rows instead of adding them')
+    args = parser.parse_args()
+
+    start = time.monotonic()
+    with get_db() as conn:
+        cursor = conn.cursor()
+        if args.clear:
+            print("🧹 Removing seeded data...")
+            clear(cursor)
+        else:
+            print(f"🌱 Seeding {args.products:,} products...")
+            seed(cursor, args.products)
+    print(f"✅ Done in {time.monotonic() - start:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
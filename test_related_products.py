@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+Checks related_products.compute() against a dense brute-force cosine on a
+small synthetic catalog, in one chunk and split into many chunks by a tiny
+RELATED_PAIR_BUDGET. No database needed:
+
+    python -m pytest -q test_related_products.py
+"""
+
+import random
+
+import numpy as np
+import pytest
+
+import related_products
+
+K = 5
+
+
+def synthetic_rows(shoppers=300, products=60, seed=1):
+    """(user_email, product_key, weight) with a long-tailed product popularity and some purchases"""
+    rng = random.Random(seed)
+    weights = {}
+    for user in range(shoppers):
+        for _ in range(rng.randint(1, 15)):
+            product = f'p{int(rng.paretovariate(1.2)) % products}'
+            weight = rng.choice([1.0, 1.0, related_products.RELATED_PURCHASE_WEIGHT])
+            weights[(f'u{user}', product)] = max(weights.get((f'u{user}', product), 0.0), weight)
+    return [(user, product, weight) for (user, product), weight in weights.items()]
+
+
+def brute_force(rows, k):
+    """{product_key: [(related_key, score), ...]} from the full dense X^T X"""
+    users = sorted({row[0] for row in rows})
+    products = sorted({row[1] for row in rows})
+    matrix = np.zeros((len(users), len(products)))
+    for user, product, weight in rows:
+        matrix[users.index(user), products.index(product)] = weight
+    co = matrix.T @ matrix
+    norm = np.sqrt(np.diag(co))
+    similarity = co / np.outer(norm, norm)
+    np.fill_diagonal(similarity, 0)
+    related = {}
+    for a, product in enumerate(products):
+        neighbours = sorted((-similarity[a, b], products[b]) for b in range(len(products)) if similarity[a, b] > 0)
+        if neighbours:
+            related[product] = [(key, -score) for score, key in neighbours[:k]]
+    return related
+
+
+def assert_same(got, expected):
+    assert set(got) == set(expected)
+    for product, neighbours in expected.items():
+        assert [key for key, _ in got[product]] == [key for key, _ in neighbours], product
+        assert np.allclose([score for _, score in got[product]], [score for _, score in neighbours]), product
+
+
+@pytest.mark.parametrize('budget', [10 ** 9, 500])
+def test_compute_matches_brute_force(monkeypatch, budget):
+    monkeypatch.setattr(related_products, 'RELATED_PAIR_BUDGET', budget)
+    rows = synthetic_rows()
+    got = related_products.compute(rows, related_products.item_norms(rows), k=K)
+    assert_same(got, brute_force(rows, K))
+
+
+def test_small_budget_splits_into_chunks(monkeypatch):
+    monkeypatch.setattr(related_products, 'RELATED_PAIR_BUDGET', 500)
+    rows = synthetic_rows()
+    users, items, _, product_keys = related_products.to_arrays(rows)
+    masks = list(related_products._chunks(users, items, len(product_keys), np.ones(len(product_keys), dtype=bool)))
+    assert len(masks) > 1
+    # Every product lands in exactly one chunk
+    assert (np.sum(masks, axis=0) == 1).all()
+
+
+def test_targets_only_get_their_own_lists():
+    rows = synthetic_rows()
+    norms = related_products.item_norms(rows)
+    full = related_products.compute(rows, norms, k=3)
+    partial = related_products.compute(rows, norms, targets={'p1', 'p2'}, k=3)
+    assert set(partial) == {'p1', 'p2'}
+    for product in partial:
+        assert partial[product] == full[product]
@@ -0,0 +1,263 @@
+#!/usr/bin/env python3
+"""
+Check that the hot queries in app.py are served by index scans.
+
+Runs EXPLAIN on each query (copied from the route that issues it) against a
+seeded catalog and fails if any of the tables it should hit by index is read
+with a sequential scan. Seed a scratch database first (seed_catalog.py), or
+pass --seed to do it here.
+
+Usage:
+    DATABASE_URL=postgresql://... python verify_indexes.py [--seed 100000]
+"""
+
+import argparse
+import json
+import sys
+
+from database_postgres import get_db
+import seed_catalog
+
+PRODUCT = 'seed-product-500'
+BUYER = 'seed-buyer-5@example.com'
+SELLER = 'seed-seller-5@example.com'
+ORDER = 'seed-order-5'
+SESSION = 'seed-session-5'
+
+# (route, query as issued by app.py, params, tables that must be read through an index)
+HOT_QUERIES = [
+    ('/product/<key>', 'SELECT * FROM products WHERE product_key = %s', (PRODUCT,), ['products']),
+    ('/product/<key> (case fallback)', 'SELECT * FROM products WHERE LOWER(product_key) = LOWER(%s)',
+     (PRODUCT.upper(),), ['products']),
+    ('/product/<key>/reviews (newest)', '''
+        SELECT pr.id, pr.rating, pr.review_text, pr.created_at::text as created_at, u.first_name, u.last_name
+        FROM product_reviews pr
+        JOIN users u ON u.email = pr.buyer_email
+        WHERE pr.product_key = %s
+        AND (COALESCE(pr.created_at, '-infinity'::timestamp), pr.id) < (%s::timestamp, %s)
+        ORDER BY COALESCE(pr.created_at, '-infinity'::timestamp) DESC, pr.id DESC
+        LIMIT %s
+     ''', (PRODUCT, '2100-01-01 00:00:00', 0, 11), ['product_reviews', 'users']),
+    ('/product/<key>/reviews (highest rated)', '''
+        SELECT pr.id, pr.rating, pr.review_text, pr.created_at::text as created_at, u.first_name, u.last_name
+        FROM product_reviews pr
+        JOIN users u ON u.email = pr.buyer_email
+        WHERE pr.product_key = %s
+        AND (pr.rating, COALESCE(pr.created_at, '-infinity'::timestamp), pr.id) < (%s, %s::timestamp, %s)
+        ORDER BY pr.rating DESC, COALESCE(pr.created_at, '-infinity'::timestamp) DESC, pr.id DESC
+        LIMIT %s
+     ''', (PRODUCT, 5, '2100-01-01 00:00:00', 0, 11), ['product_reviews', 'users']),
+    ('/product/<key> rating', '''
+        SELECT avg_rating as avg_product_rating, rating_count as product_review_count
+        FROM product_rating_summary
+        WHERE product_key = %s
+     ''', (PRODUCT,), ['product_rating_summary']),
+    ('/product/<key> related', '''
+        SELECT p.*
+        FROM product_related r
+        JOIN products p ON p.product_key = r.related_key
+        WHERE r.product_key = %s
+        ORDER BY r.rank
+        LIMIT %s
+     ''', (PRODUCT, 4), ['products']),
+    ('/product/<key> related (category top-up)', '''
+        SELECT * FROM products
+        WHERE category = %s AND product_key <> ALL(%s)
+        ORDER BY popularity_score DESC, product_key DESC
+        LIMIT %s
+     ''', ('Women Clothing', [PRODUCT], 4), ['products']),
+    ('/ and /feed (popularity page)', '''
+        SELECT * FROM products
+        WHERE seller_email <> ALL(%s)
+        AND (popularity_score, product_key) < (%s, %s)
+        ORDER BY popularity_score DESC, product_key DESC
+        LIMIT %s
+     ''', ([], 50, PRODUCT, 49), ['products']),
+    ('/ and /feed review averages', '''
+        SELECT product_key, avg_rating, rating_count as review_count
+        FROM product_rating_summary
+        WHERE product_key IN (%s, %s, %s)
+     ''', (PRODUCT, 'seed-product-501', 'seed-product-502'), ['product_rating_summary']),
+    ('/search (full-text)', '''
+        SELECT p.*, ts_rank(search_vector, to_tsquery('english', %s)) as search_rank
+        FROM products p JOIN product_search ps USING (product_key)
+        WHERE search_vector @@ to_tsquery('english', %s)
+        AND seller_email <> ALL(%s)
+        ORDER BY search_rank DESC, popularity_score DESC, product_key DESC
+        LIMIT %s OFFSET %s
+     ''', ('red:* & dress:*', 'red:* & dress:*', [], 49, 0), ['product_search']),
+    ('/search (full-text, narrowed by facets)', '''
+        SELECT p.*, ts_rank(search_vector, to_tsquery('english', %s)) as search_rank
+        FROM products p JOIN product_search ps USING (product_key)
+        WHERE seller_email <> ALL(%s) AND search_vector @@ to_tsquery('english', %s)
+        AND category = %s AND price >= %s AND price < %s AND shipping = %s
+        ORDER BY search_rank DESC, popularity_score DESC, product_key DESC
+        LIMIT %s OFFSET %s
+     ''', ('dress:*', [], 'dress:*', 'Women Clothing', 1000, 2500, 'Kingston', 49, 0), ['product_search']),
+    ('/search?category= (browse)', '''
+        SELECT *, 0 as search_rank
+        FROM products
+        WHERE seller_email <> ALL(%s) AND category = %s
+        ORDER BY popularity_score DESC, product_key DESC
+        LIMIT %s OFFSET %s
+     ''', ([], 'Women Clothing', 49, 0), ['products']),
+    ('/autocomplete (trigram)', '''
+        SELECT 'product' as type, product_key as key, name, image_url,
+               word_similarity(%s, name) as score, popularity_score
+        FROM products
+        WHERE %s <%% name
+        ORDER BY score DESC, popularity_score DESC
+        LIMIT %s
+     ''', ('sandels', 'sandels', 5), ['products']),
+    ('/orders', 'SELECT * FROM orders WHERE user_email = %s ORDER BY order_date DESC', (BUYER,), ['orders']),
+    ('/orders items', '''
+        SELECT oi.product_key, oi.quantity, oi.price,
+               COALESCE(p.name, oi.product_key) as name,
+               COALESCE(p.image_url, 'placeholder.jpg') as image_url,
+               COALESCE(p.category, 'Unknown') as category
+        FROM order_items oi
+        LEFT JOIN products p ON oi.product_key = p.product_key
+        WHERE oi.order_id = %s
+     ''', (ORDER,), ['order_items', 'products']),
+    ('/submit_product_review verified purchase', '''
+        SELECT COUNT(*) as purchase_count
+        FROM orders o
+        JOIN order_items oi ON o.order_id = oi.order_id
+        WHERE oi.product_key = %s AND o.user_email = %s
+     ''', (PRODUCT, BUYER), ['order_items', 'orders']),
+    ('/ personalization (last viewed)', '''
+        SELECT product_key, category, viewed_at
+        FROM user_product_views
+        WHERE user_email = %s
+        ORDER BY viewed_at DESC
+        LIMIT 1
+     ''', (BUYER,), ['user_product_views']),
+    ('/send_message conversation lookup', '''
+        SELECT id FROM conversations
+        WHERE (buyer_email = %s AND seller_email = %s)
+        OR (buyer_email = %s AND seller_email = %s)
+     ''', (BUYER, SELLER, SELLER, BUYER), ['conversations']),
+    ('/seller/messages', '''
+        SELECT c.id, c.buyer_email, c.last_message_at,
+               (SELECT COUNT(*) FROM messages m
+                WHERE m.conversation_id = c.id
+                AND m.receiver_email = %s
+                AND m.read_status = false) as unread_count,
+               (SELECT message FROM messages m2
+                WHERE m2.conversation_id = c.id
+                ORDER BY m2.timestamp DESC LIMIT 1) as last_message
+        FROM conversations c
+        WHERE c.seller_email = %s
+        ORDER BY c.last_message_at DESC
+     ''', (SELLER, SELLER), ['conversations', 'messages']),
+    ('/contact thread', '''
+        SELECT sender, message, timestamp
+        FROM contact_messages
+        WHERE user_email = %s AND session_id = %s
+        ORDER BY timestamp
+     ''', (BUYER, SESSION), ['contact_messages']),
+    ('/admin/api/conversation/<id>/messages', '''
+        SELECT sender, message, timestamp, unread
+        FROM contact_messages
+        WHERE session_id = %s
+        ORDER BY timestamp ASC
+     ''', (SESSION,), ['contact_messages']),
+    ('/seller_dashboard earnings', '''
+        SELECT COALESCE(SUM(quantity * price), 0) as actual_earnings
+        FROM sales_log
+        WHERE seller_email = %s
+     ''', (SELLER,), ['sales_log']),
+    ('/seller_statistics weekly sales', '''
+        SELECT DATE(sale_date) as date, SUM(quantity) as units
+        FROM sales_log
+        WHERE seller_email = %s
+        AND sale_date >= CURRENT_DATE - INTERVAL '7 days'
+        GROUP BY DATE(sale_date)
+        ORDER BY date ASC
+     ''', (SELLER,), ['sales_log']),
+    ('/seller/notifications', '''
+        SELECT * FROM seller_notifications
+        WHERE seller_email = %s
+        ORDER BY created_at DESC
+        LIMIT 50
+     ''', (SELLER,), ['seller_notifications']),
+    ('/seller/notifications unread badge',
+     'SELECT COUNT(*) as unread_count FROM seller_notifications WHERE seller_email = %s AND is_read = FALSE',
+     (SELLER,), ['seller_notifications']),
+    ('login cart restore', '''
+        SELECT cl.product_key, cl.quantity, p.name, p.price, p.image_url
+        FROM cart_log cl
+        JOIN products p ON cl.product_key = p.product_key
+        WHERE cl.user_email = %s
+        ORDER BY cl.cart_date DESC
+     ''', (BUYER,), ['cart_log', 'products']),
+]
+
+INDEXED_NODES = {'Index Scan', 'Index Only Scan', 'Bitmap Heap Scan'}
+
+
+def _scans(plan, found):
+    """Collect {table: set(node types)} for every scan in an EXPLAIN JSON plan"""
+    if 'Relation Name' in plan:
+        found.setdefault(plan['Relation Name'], set()).add(plan['Node Type'])
+    for child in plan.get('Plans', []):
+        _scans(child, found)
+    return found
+
+
+def check(cursor):
+    """EXPLAIN every hot query; returns the number of failures"""
+    failures = 0
+    for route, sql, params, tables in HOT_QUERIES:
+        missing = [t for t in tables if not seed_catalog._table_exists(cursor, t)]
+        if missing:
+            print(f"  ⏭️  {route}: skipped ({', '.join(missing)} missing)")
+            continue
+
+        cursor.execute('SAVEPOINT explain_check')
+        try:
+            cursor.execute('EXPLAIN (FORMAT JSON) ' + sql, params)
+        except Exception as e:
+            cursor.execute('ROLLBACK TO SAVEPOINT explain_check')
+            print(f"  ⚠️  {route}: could not EXPLAIN ({str(e).strip().splitlines()[0]})")
+            failures += 1
+            continue
+        plan = cursor.fetchone()[0]
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+        scans = _scans(plan[0]['Plan'], {})
+
+        bad = [t for t in tables if 'Seq Scan' in scans.get(t, set()) or not scans.get(t, set()) & INDEXED_NODES]
+        detail = ', '.join(f"{t}: {'/'.join(sorted(scans.get(t, {'not scanned'})))}" for t in tables)
+        if bad:
+            failures += 1
+            print(f"  ❌ {route}: {detail}")
+        else:
+            print(f"  ✅ {route}: {detail}")
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Verify hot queries use index scans")
+    parser.add_argument('--seed', type=int, metavar='PRODUCTS', help='seed this many products first')
+    args = parser.parse_args()
+
+    with get_db() as conn:
+        cursor = conn.cursor()
+        if args.seed:
+            print(f"🌱 Seeding {args.seed:,} products...")
+            seed_catalog.seed(cursor, args.seed)
+            conn.commit()
+
+        print("🔍 Checking query plans...")
+        failures = check(cursor)
+
+    print("=" * 70)
+    if failures:
+        print(f"❌ {failures} hot quer{'ies' if failures != 1 else 'y'} not using an index")
+        sys.exit(1)
+    print("✅ Every hot query uses an index")
+
+
+if __name__ == "__main__":
+    main()
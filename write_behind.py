@@ -0,0 +1,216 @@
+"""
+Write-behind buffers for Zo-Zi Marketplace
+
+The search log, product counters and personalization views all take a
+write out of the request the same way: the request only touches memory,
+and a background flusher hands batches to a writer registered at startup
+(a database_postgres save_* function). This module is that machinery,
+shared so a fix lands once:
+
+    WriteBehindQueue     bounded FIFO of rows; when the database falls
+                         behind, new rows are dropped and counted
+    WriteBehindCounters  one running total per key, so the buffer is
+                         bounded by the keys touched between flushes;
+                         a failed flush puts its totals back
+
+Both flush every flush_interval seconds, or as soon as a full batch is
+waiting, and once more from an atexit hook at shutdown. Flush latency and
+batch sizes over recent flushes are kept for the admin stats endpoints.
+"""
+
+import abc
+import time
+import atexit
+import logging
+import threading
+from collections import deque
+
+logger = logging.getLogger(__name__)
+
+# Recent flushes kept for the latency / batch size percentiles
+FLUSH_HISTORY = 500
+
+
+class WriteBehindBuffer(abc.ABC):
+    """Flusher thread, batching, atexit flush and stats; subclasses hold the rows"""
+
+    def __init__(self, name, description, flush_interval, batch_size):
+        self.name = name
+        self.description = description  # what is being written, for log messages
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._writer = None
+        self._flusher = None
+        self._stats = {'flushed': 0, 'flushes': 0, 'flush_errors': 0, 'last_flush_ms': None, 'last_batch': 0}
+        # (milliseconds, rows) for recent flushes
+        self._history = deque(maxlen=FLUSH_HISTORY)
+
+    def init(self, writer):
+        """Register writer(rows), called with up to batch_size rows at a time"""
+        self._writer = writer
+        atexit.register(self.flush)
+
+    def is_active(self):
+        """True once a writer is registered (PostgreSQL)"""
+        return self._writer is not None
+
+    def flush(self):
+        """Write everything buffered, in batches of batch_size; returns the number of rows written"""
+        written = 0
+        with self._flush_lock:
+            if self._writer is None:
+                return 0
+            items = self._take()
+            for start in range(0, len(items), self.batch_size):
+                batch = items[start:start + self.batch_size]
+                started = time.monotonic()
+                try:
+                    self._writer(self._rows(batch))
+                except Exception as e:
+                    self._stats['flush_errors'] += 1
+                    logger.error(f"Error flushing {len(items) - start} {self.description}: {e}")
+                    self._failed(batch, items[start + self.batch_size:])
+                    break
+                elapsed_ms = (time.monotonic() - started) * 1000
+                self._history.append((elapsed_ms, len(batch)))
+                self._stats['flushes'] += 1
+                self._stats['flushed'] += len(batch)
+                self._stats['last_batch'] = len(batch)
+                self._stats['last_flush_ms'] = round(elapsed_ms, 2)
+                written += len(batch)
+        return written
+
+    def stats(self):
+        """Flush counters, plus latency / batch size percentiles over recent flushes"""
+        stats = dict(self._stats, flush_interval_seconds=self.flush_interval)
+        history = list(self._history)
+        if history:
+            latencies = sorted(ms for ms, _ in history)
+            sizes = sorted(size for _, size in history)
+            stats['flush_p50_ms'] = round(latencies[len(latencies) // 2], 2)
+            stats['flush_p99_ms'] = round(latencies[min(int(len(latencies) * 0.99), len(latencies) - 1)], 2)
+            stats['batch_p50'] = sizes[len(sizes) // 2]
+            stats['batch_max'] = sizes[-1]
+        return stats
+
+    def _added(self, buffered):
+        # Called after buffering a row, outside the lock
+        self._ensure_flusher()
+        if buffered >= self.batch_size:
+            self._wake.set()
+
+    def _flush_loop(self):
+        while True:
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            self.flush()
+
+    def _ensure_flusher(self):
+        if self._flusher is None:
+            with self._lock:
+                if self._flusher is None:
+                    self._flusher = threading.Thread(target=self._flush_loop, name=f'{self.name}-flush', daemon=True)
+                    self._flusher.start()
+
+    @abc.abstractmethod
+    def _take(self):
+        """Remove and return everything buffered, in write order"""
+
+    def _rows(self, batch):
+        """What the writer is called with for a batch of taken items"""
+        return batch
+
+    @abc.abstractmethod
+    def _failed(self, batch, rest):
+        """A batch failed to write; rest (taken, not yet tried) is unwritten too"""
+
+
+class WriteBehindQueue(WriteBehindBuffer):
+    """Bounded FIFO of row tuples; rows beyond max_items, or in a failed batch, are dropped"""
+
+    def __init__(self, name, description, flush_interval, batch_size, max_items):
+        super().__init__(name, description, flush_interval, batch_size)
+        self.max_items = max_items
+        self._queue = deque()
+        self._stats.update(recorded=0, dropped=0)
+
+    def append(self, row):
+        """Queue one row; never touches the database or waits for it. False if it was dropped."""
+        with self._lock:
+            if len(self._queue) >= self.max_items:
+                self._stats['dropped'] += 1
+                return False
+            self._queue.append(row)
+            self._stats['recorded'] += 1
+            buffered = len(self._queue)
+        self._added(buffered)
+        return True
+
+    def __len__(self):
+        return len(self._queue)
+
+    def _take(self):
+        with self._lock:
+            items = list(self._queue)
+            self._queue.clear()
+        return items
+
+    def _failed(self, batch, rest):
+        self._stats['dropped'] += len(batch)
+        # The rest goes back to the front, ahead of anything queued since, for the next flush
+        with self._lock:
+            self._queue.extendleft(reversed(rest))
+
+
+class WriteBehindCounters(WriteBehindBuffer):
+    """Running totals per key, written as (key, *totals) rows in key order"""
+
+    def __init__(self, name, description, flush_interval, batch_size, counters):
+        super().__init__(name, description, flush_interval, batch_size)
+        self.counters = tuple(counters)
+        self._pending = {}
+        self._stats.update(added=0)
+
+    def add(self, key, **amounts):
+        """Add to key's totals; written by the next flush, never by the caller"""
+        with self._lock:
+            totals = self._pending.get(key)
+            if totals is None:
+                totals = self._pending[key] = [0] * len(self.counters)
+            for i, counter in enumerate(self.counters):
+                totals[i] += amounts.get(counter, 0)
+            self._stats['added'] += 1
+            buffered = len(self._pending)
+        self._added(buffered)
+
+    def pending(self, key):
+        """{counter: amount} not yet written for key"""
+        with self._lock:
+            totals = self._pending.get(key)
+            return dict(zip(self.counters, totals or [0] * len(self.counters)))
+
+    def __len__(self):
+        return len(self._pending)
+
+    def _take(self):
+        with self._lock:
+            # Totals that cancelled out (a like and an unlike) have nothing to write
+            items = [(key, totals) for key, totals in self._pending.items() if any(totals)]
+            self._pending.clear()
+        # Same row order in every batch, so concurrent flushes (several workers) can't deadlock
+        items.sort()
+        return items
+
+    def _rows(self, batch):
+        return [(key,) + tuple(totals) for key, totals in batch]
+
+    def _failed(self, batch, rest):
+        # Put the totals back, merged with anything added since they were taken
+        with self._lock:
+            for key, totals in batch + rest:
+                current = self._pending.setdefault(key, [0] * len(self.counters))
+                for i, amount in enumerate(totals):
+                    current[i] += amount